@@ -1,6 +1,10 @@
 #!/usr/bin/env bash
 set -o errexit
 pip install -r requirements.txt
+# Self-hosted front-end assets must match their pinned checksums.
+if [ -f static/vendor/SHA256SUMS ]; then
+  python manage.py fetch_vendor_assets --check
+fi
 python manage.py collectstatic --noinput
 python manage.py migrate
 python manage.py shell -c "
@@ -2,6 +2,7 @@ from django.contrib import admin
 from django.contrib.auth.models import Group
 from django.contrib.auth.admin import UserAdmin
 from django.contrib.auth.models import User
+from django.db.models import Count
 from django.utils.html import format_html
 from .models import Category, Task, Session
 
@@ -39,9 +40,13 @@ class CategoryAdmin(admin.ModelAdmin):
     readonly_fields = ('created_at',)
     actions = None 
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(num_tasks=Count('task'))
+
     def task_count(self, obj):
-        return format_html('<b>{}</b>', obj.task_set.count())
+        return format_html('<b>{}</b>', obj.num_tasks)
     task_count.short_description = 'Tasks'
+    task_count.admin_order_field = 'num_tasks'
 
     def delete_button(self, obj):
         return format_html(
@@ -56,10 +61,12 @@ class CategoryAdmin(admin.ModelAdmin):
 @admin.register(Task)
 class TaskAdmin(admin.ModelAdmin):
     list_display = ('title', 'user', 'category', 'is_active', 'created_at')
+    list_select_related = ('user', 'category')
     list_filter = ('is_active', 'category')
     search_fields = ('title', 'user__username')
     readonly_fields = ('user', 'title', 'description', 'category', 
-                       'target_minutes', 'is_active', 'created_at')
+                       'target_minutes', 'is_active', 'created_at',
+                       'logged_minutes', 'quality_sum', 'quality_count')
 
     def has_add_permission(self, request):
         return False  
@@ -71,6 +78,7 @@ class TaskAdmin(admin.ModelAdmin):
 @admin.register(Session)
 class SessionAdmin(admin.ModelAdmin):
     list_display = ('task', 'user', 'planned_start', 'planned_end', 'status', 'completion_percent')
+    list_select_related = ('task', 'user')
     list_filter = ('status', 'user')
     search_fields = ('task__title', 'user__username')
     readonly_fields = ('task', 'user', 'planned_start', 'planned_end',
@@ -0,0 +1,222 @@
+"""JSON endpoints for tasks, sessions and progress.
+
+Lists use keyset pagination (an opaque cursor over the ordering columns)
+instead of Paginator offsets. GET responses carry an ETag derived from the
+user's last data change (core.conditional), so revalidation is answered
+with a 304 before any list query runs.
+"""
+import json
+from functools import wraps
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_http_methods
+
+from .conditional import user_data_conditional
+from .forms import SessionBookForm, TaskForm
+from .models import Session, Task
+from .pagination import InvalidCursor, KeysetPaginator
+from .services import book_sessions, update_progress
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def api_login_required(view):
+    """Like login_required, but answers 401 JSON instead of redirecting."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse({'error': 'Authentication required.'}, status=401)
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+def _json(request, payload, status=200):
+    body = json.dumps(payload, cls=DjangoJSONEncoder)
+    return HttpResponse(body, status=status, content_type='application/json')
+
+
+def _error(message, status=400):
+    return JsonResponse({'error': message}, status=status)
+
+
+def _body(request):
+    data = json.loads(request.body or b'{}')
+    if not isinstance(data, dict):
+        raise ValueError('Expected a JSON object.')
+    return data
+
+
+def _form_errors(form):
+    return JsonResponse({'error': 'Invalid data.', 'fields': form.errors.get_json_data()}, status=400)
+
+
+def _page_size(request):
+    try:
+        return max(1, min(int(request.GET.get('limit', DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE))
+    except ValueError:
+        return DEFAULT_PAGE_SIZE
+
+
+def _keyset_page(request, queryset, ordering):
+    """Return (rows, next_cursor) for rows after the request's cursor."""
+    paginator = KeysetPaginator(queryset, ordering, _page_size(request), count=None)
+    page = paginator.page(after=request.GET.get('cursor'))
+    return page.object_list, page.next_cursor
+
+
+# ========== Serialisers ==========
+
+def task_data(task):
+    return {
+        'id': task.pk,
+        'title': task.title,
+        'description': task.description,
+        'category': task.category.name if task.category else None,
+        'category_id': task.category_id,
+        'target_minutes': task.target_minutes,
+        'is_active': task.is_active,
+        'actual_minutes': task.total_actual_minutes(),
+        'progress_percent': task.progress_percent(),
+        'extra_minutes': task.extra_minutes(),
+        'average_quality': task.average_quality(),
+        'recent_streak': task.recent_streak(),
+        'is_completed': task.is_completed(),
+    }
+
+
+def session_data(session):
+    return {
+        'id': session.pk,
+        'task_id': session.task_id,
+        'planned_start': session.planned_start,
+        'planned_end': session.planned_end,
+        'planned_minutes': session.planned_minutes(),
+        'actual_minutes': session.actual_minutes,
+        'completion_percent': session.completion_percent,
+        'status': session.effective_status,
+        'notes': session.notes,
+    }
+
+
+# ========== Tasks ==========
+
+@api_login_required
+@user_data_conditional
+@require_http_methods(['GET', 'POST'])
+def task_collection(request):
+    if request.method == 'POST':
+        try:
+            form = TaskForm(_body(request))
+        except ValueError as e:
+            return _error(f'Invalid data: {e}')
+        if not form.is_valid():
+            return _form_errors(form)
+        task = form.save(commit=False)
+        task.user = request.user
+        task.save()
+        return _json(request, task_data(task), status=201)
+
+    tasks = Task.objects.filter(user=request.user).select_related('category').with_progress()
+    if request.GET.get('active') in ('1', 'true'):
+        tasks = tasks.filter(is_active=True)
+    try:
+        rows, next_cursor = _keyset_page(request, tasks, ['id'])
+    except InvalidCursor:
+        return _error('Invalid cursor.')
+    return _json(request, {
+        'results': [task_data(task) for task in rows],
+        'next_cursor': next_cursor,
+    })
+
+
+@api_login_required
+@user_data_conditional
+@require_http_methods(['GET', 'PATCH'])
+def task_item(request, pk):
+    task = get_object_or_404(
+        Task.objects.select_related('category').with_progress(), pk=pk, user=request.user
+    )
+    if request.method == 'PATCH':
+        try:
+            changes = _body(request)
+        except ValueError as e:
+            return _error(f'Invalid data: {e}')
+        current = {f: getattr(task, f) for f in ('title', 'description', 'target_minutes')}
+        current['category'] = task.category_id
+        form = TaskForm({**current, **changes}, instance=task)
+        if not form.is_valid():
+            return _form_errors(form)
+        task = form.save()
+    return _json(request, task_data(task))
+
+
+# ========== Sessions ==========
+
+@api_login_required
+@user_data_conditional
+@require_http_methods(['GET', 'POST'])
+def session_collection(request):
+    if request.method == 'POST':
+        try:
+            form = SessionBookForm(_body(request), user=request.user)
+        except ValueError as e:
+            return _error(f'Invalid data: {e}')
+        booked = book_sessions(form, request.user)
+        if booked is None:
+            return _form_errors(form)
+        return _json(request, {
+            'results': [session_data(session) for session in booked],
+            'skipped': [{'planned_start': start, 'planned_end': end} for start, end in form.skipped],
+            'warning': getattr(form, 'overtime_warning', None),
+        }, status=201)
+
+    sessions = Session.objects.filter(user=request.user)
+    if request.GET.get('status'):
+        sessions = sessions.with_status(request.GET['status'])
+    if request.GET.get('task'):
+        try:
+            task_id = int(request.GET['task'])
+            # Out-of-range ids overflow the database integer instead of matching nothing.
+            Task._meta.pk.run_validators(task_id)
+        except (ValueError, ValidationError):
+            return _error('Invalid task.')
+        sessions = sessions.filter(task_id=task_id)
+    try:
+        rows, next_cursor = _keyset_page(request, sessions, ['planned_start', 'id'])
+    except InvalidCursor:
+        return _error('Invalid cursor.')
+    return _json(request, {
+        'results': [session_data(session) for session in rows],
+        'next_cursor': next_cursor,
+    })
+
+
+@api_login_required
+@user_data_conditional
+@require_http_methods(['GET', 'PATCH'])
+def session_item(request, pk):
+    session = get_object_or_404(Session, pk=pk, user=request.user)
+    if request.method == 'PATCH':
+        try:
+            error = update_progress(session, _body(request))
+        except (ValueError, TypeError) as e:
+            return _error(f'Invalid data: {e}')
+        if error:
+            return _error(error)
+    return _json(request, session_data(session))
+
+
+# ========== Progress ==========
+
+@api_login_required
+@user_data_conditional
+@require_http_methods(['GET'])
+def progress_summary(request):
+    tasks = Task.objects.filter(
+        user=request.user, is_active=True
+    ).select_related('category').with_progress().order_by('-created_at')
+    return _json(request, {'results': [task_data(task) for task in tasks]})
@@ -0,0 +1,183 @@
+"""View benchmarks: query count, DB time and wall time per page.
+
+Pages are driven through the test Client against data from seed_trackit,
+at two sizes: the lightest user of a small dataset, then the heaviest user
+after seeding `scale` times as many sessions again. Each page must stay
+within its query budget in benchmark_budgets.json and issue no more queries
+at the larger size; more means the page is O(rows) in queries.
+"""
+import json
+import statistics
+import time
+from datetime import datetime, time as dt_time, timedelta
+from io import StringIO
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .instrumentation import QueryRecorder
+from .models import Session, Task, local_timezone
+
+BUDGETS_PATH = Path(__file__).with_name('benchmark_budgets.json')
+
+# Benchmarks clear the cache between runs; this keeps them off the shared
+# file/db cache (and every user's version keys) when CACHE_BACKEND is set.
+BENCHMARK_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'trackit-benchmark',
+    }
+}
+
+# name -> (who requests it, method, URL name)
+PAGES = {
+    'dashboard': ('user', 'get', 'dashboard'),
+    'statistics': ('user', 'get', 'statistics'),
+    'progress_list': ('user', 'get', 'progress_list'),
+    'task_list': ('user', 'get', 'task_list'),
+    'session_list': ('user', 'get', 'session_list'),
+    'session_book': ('user', 'get', 'session_book'),
+    'session_book_post': ('user', 'post', 'session_book'),
+    'admin_dashboard': ('staff', 'get', 'admin_dashboard'),
+    'admin_user_list': ('staff', 'get', 'admin_user_list'),
+    'admin_task_list': ('staff', 'get', 'admin_task_list'),
+    'admin_session_list': ('staff', 'get', 'admin_session_list'),
+    'admin_category_list': ('staff', 'get', 'admin_category_list'),
+}
+
+
+def load_budgets(path=BUDGETS_PATH):
+    with open(path) as f:
+        return json.load(f)
+
+
+def _booking(user, iteration, days_ahead):
+    # Early-morning slots past the seeded range, so bookings never conflict.
+    task = Task.objects.filter(user=user, is_active=True).order_by('pk').first()
+    day = timezone.localdate(timezone=local_timezone()) + timedelta(days=days_ahead + 1 + iteration)
+    start = datetime.combine(day, dt_time(3, 0))
+    return {
+        'task': task.pk,
+        'planned_start': start.strftime('%Y-%m-%dT%H:%M'),
+        'planned_end': (start + timedelta(minutes=30)).strftime('%Y-%m-%dT%H:%M'),
+    }
+
+
+def measure(client, method, url, data=None, iterations=5):
+    """Request `url` with a cold cache `iterations` times, then once warm."""
+    runs = []
+    for i in range(iterations + 1):
+        if i < iterations:
+            cache.clear()
+        recorder = QueryRecorder()
+        payload = data(i) if callable(data) else data
+        with connection.execute_wrapper(recorder):
+            started = time.perf_counter()
+            response = getattr(client, method)(url, payload)
+            elapsed = time.perf_counter() - started
+        if response.status_code >= 400 or (method == 'get' and response.status_code != 200):
+            raise AssertionError(f'{method.upper()} {url} returned {response.status_code}')
+        runs.append((recorder.count, recorder.seconds * 1000, elapsed * 1000))
+    cold, warm = runs[:-1], runs[-1]
+    return {
+        'queries': max(run[0] for run in cold),
+        'warm_queries': warm[0],
+        'db_ms': round(statistics.median(run[1] for run in cold), 2),
+        'wall_ms': round(statistics.median(run[2] for run in cold), 2),
+    }
+
+
+def _seed(prefix, users, tasks, sessions, seed, days, days_ahead):
+    call_command('seed_trackit', users=users, tasks_per_user=tasks, sessions=sessions, prefix=prefix,
+                 seed=seed, days=days, days_ahead=days_ahead, stdout=StringIO())
+    # As the start_due_sessions sweeper would have, so stored statuses are current.
+    call_command('start_due_sessions', stdout=StringIO())
+    return User.objects.filter(username__startswith=prefix).annotate(
+        session_count=Count('sessions')
+    ).order_by('session_count', 'pk')
+
+
+def _measure_round(user, staff, iterations, days_ahead):
+    clients = {'user': Client(), 'staff': Client()}
+    clients['user'].force_login(user)
+    clients['staff'].force_login(staff)
+    results = {}
+    for name, (who, method, url_name) in PAGES.items():
+        data = None
+        if method == 'post':
+            def data(i):
+                return _booking(user, i, days_ahead)
+        results[name] = measure(clients[who], method, reverse(url_name), data, iterations)
+    return results
+
+
+def check(report, budgets, latency=False):
+    """Return a list of budget violations in `report`."""
+    problems = []
+    for name, views in report['views'].items():
+        budget = budgets.get(name)
+        small, large = views['small'], views['large']
+        if budget is None:
+            problems.append(f'{name}: no budget in {BUDGETS_PATH.name}')
+            continue
+        if large['queries'] > small['queries']:
+            problems.append(
+                f"{name}: {small['queries']} queries on the small dataset but {large['queries']} "
+                f'on the large one; query count grows with rows'
+            )
+        for key in ('queries', 'warm_queries') + (('wall_ms',) if latency else ()):
+            if key in budget and large[key] > budget[key]:
+                problems.append(f'{name}: {key} {large[key]} over budget {budget[key]}')
+    return problems
+
+
+def run_benchmarks(users=20, tasks_per_user=5, sessions=5000, scale=4, iterations=5, seed=42, budgets=None, latency=False):
+    """Seed, measure every page at both sizes and return the report dict.
+
+    Leaves the seeded rows behind; run inside a transaction that is rolled back.
+    """
+    budgets = load_budgets() if budgets is None else budgets
+    days_ahead = 14
+    staff = User.objects.create_user(username=f'bench-staff-{time.time_ns()}', is_staff=True)
+    hosts = [*settings.ALLOWED_HOSTS, 'testserver']
+    storages = {**settings.STORAGES, 'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    }}
+    dataset = {}
+    views = {}
+    with override_settings(ALLOWED_HOSTS=hosts, STORAGES=storages, CACHES=BENCHMARK_CACHES,
+                           SERVER_TIMING_SAMPLE_RATE=0):
+        # The large round gives each user `scale` times the tasks, and spreads
+        # `scale` times the sessions over `scale` times the history.
+        for size, prefix, factor, pick in (('small', 'benchs', 1, 0), ('large', 'benchl', scale, -1)):
+            seeded = list(_seed(prefix, users, tasks_per_user * factor, sessions * factor, seed,
+                                365 * factor, days_ahead))
+            user = seeded[pick]
+            dataset[size] = {
+                'users': User.objects.count(),
+                'sessions': Session.objects.count(),
+                'user_tasks': tasks_per_user * factor,
+                'user_sessions': user.session_count,
+            }
+            for name, result in _measure_round(user, staff, iterations, days_ahead).items():
+                views.setdefault(name, {})[size] = result
+    for name, views_by_size in views.items():
+        views_by_size['budget'] = budgets.get(name)
+    report = {
+        'generated_at': timezone.now().isoformat(),
+        'vendor': connection.vendor,
+        'iterations': iterations,
+        'dataset': dataset,
+        'views': views,
+    }
+    report['violations'] = check(report, budgets, latency=latency)
+    return report
@@ -0,0 +1,110 @@
+"""Cache keys and invalidation helpers shared by views, models and signals."""
+import math
+import random
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from . import metrics
+
+ADMIN_SNAPSHOT_KEY = 'trackit:admin-dashboard'
+# Pending session start times of a user, per UserDataChange.changed_at.
+PENDING_STARTS_KEY = 'trackit:pending-starts:{}:{}'
+# Seconds the last build of each single_flight label took.
+BUILD_SECONDS_KEY = 'trackit:build-seconds:{}'
+
+
+def mark_stale(key):
+    """Make single_flight rebuild `key` on its next read, still serving the old value meanwhile."""
+    cache.set(f'{key}:stale-before', time.time(), None)
+
+
+def invalidate_admin_snapshot():
+    """Mark the cached admin dashboard numbers stale once the current transaction commits."""
+    transaction.on_commit(lambda: mark_stale(ADMIN_SNAPSHOT_KEY))
+
+
+def single_flight(key, build, timeout, stale_timeout=None, lock_timeout=30, beta=1.0, wait=2.0, label='other'):
+    """Return build() through the cache, recomputing it in one process at a time.
+
+    - Entries are refreshed early with probability rising towards expiry
+      (XFetch: scaled by how long the last build took and `beta`), so a hot
+      key is usually rebuilt before it ever expires.
+    - A refresh is guarded by a per-key lock taken with cache.add(), which is
+      atomic in every backend. Whoever loses the race serves the stale value
+      (kept `stale_timeout` seconds past expiry, default `timeout`) instead
+      of recomputing it.
+    - An entry built before mark_stale(key) counts as expired, but is still
+      served as the stale value while one process rebuilds it.
+    - On a cold key the losers poll for the winner's value for `wait`
+      seconds, or twice as long as the label's last build took if that is
+      longer (never past `lock_timeout`), then build it themselves.
+    - The owner deletes the lock only while it certainly still holds it
+      (within `lock_timeout` of taking it). A build that overran leaves the
+      lock to expire, since it may by then belong to another process.
+
+    Outcomes are counted in trackit_cache_requests_total under `label`.
+    """
+    if stale_timeout is None:
+        stale_timeout = timeout
+    stale_key = f'{key}:stale-before'
+    found = cache.get_many([key, stale_key])
+    entry = found.get(key)
+    if entry is not None:
+        # -log(random()) is exponentially distributed: usually small, so
+        # early refreshes concentrate just before expiry.
+        early = entry['delta'] * beta * -math.log(1.0 - random.random())
+        fresh = entry['started'] >= found.get(stale_key, 0)
+        if fresh and time.time() + early < entry['expires']:
+            metrics.inc('trackit_cache_requests_total', cache=label, result='hit')
+            return entry['value']
+
+    lock_key = f'{key}:lock'
+    locked_at = time.monotonic()
+    if not cache.add(lock_key, 1, lock_timeout):
+        if entry is not None:
+            metrics.inc('trackit_cache_requests_total', cache=label, result='stale')
+            return entry['value']
+        expected = cache.get(BUILD_SECONDS_KEY.format(label)) or 0
+        deadline = time.monotonic() + min(max(wait, 2 * expected), lock_timeout)
+        while time.monotonic() < deadline:
+            time.sleep(0.025)
+            entry = cache.get(key)
+            if entry is not None:
+                metrics.inc('trackit_cache_requests_total', cache=label, result='hit')
+                return entry['value']
+        metrics.inc('trackit_cache_requests_total', cache=label, result='miss')
+        return build()
+
+    metrics.inc('trackit_cache_requests_total', cache=label, result='miss')
+    try:
+        started = time.time()
+        value = build()
+        finished = time.time()
+        cache.set(key, {
+            'value': value,
+            'started': started,
+            'delta': finished - started,
+            'expires': finished + timeout,
+        }, timeout + stale_timeout)
+        cache.set(BUILD_SECONDS_KEY.format(label), finished - started, None)
+        return value
+    finally:
+        # A one-second margin covers backends that round expiry to seconds.
+        if time.monotonic() - locked_at < lock_timeout - 1:
+            cache.delete(lock_key)
+
+
+def cached_user_context(user_id, version, name, build, *parts):
+    """Return build() cached under the user's data version.
+
+    `version` is core.conditional.user_data_version(): it comes from the
+    database, so a write seen by one worker moves every worker onto a new
+    key. `parts` are whatever else the context depends on (the day, query
+    parameters); the entry is refreshed after USER_PAGE_CACHE_SECONDS regardless.
+    """
+    suffix = ':'.join(str(part) for part in parts)
+    key = f'trackit:user:{user_id}:{version}:{name}:{suffix}'
+    return single_flight(key, build, settings.USER_PAGE_CACHE_SECONDS, label=name)
@@ -0,0 +1,69 @@
+"""Conditional GET for pages and endpoints built only from the user's own data.
+
+The ETag comes from UserDataChange and the user's cached pending start
+times, so a revalidation costs one primary key lookup and answers 304
+before the view runs any aggregate queries.
+There is deliberately no Last-Modified: these pages also change with the
+day and the session, which If-Modified-Since cannot express.
+"""
+import hashlib
+from functools import wraps
+
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from .models import UserDataChange, started_pending_count
+from .streaks import local_today
+
+
+def user_data_version(request):
+    """Token for the state of the request user's data, computed once per request.
+
+    It is the user's last data change plus how many of their pending
+    sessions have started since, as effective status moves with the clock.
+    """
+    if not hasattr(request, '_user_data_version'):
+        changed_at = UserDataChange.objects.changed_at(request.user)
+        started = started_pending_count(request.user, changed_at)
+        request._user_data_version = f'{changed_at.timestamp()}.{started}'
+    return request._user_data_version
+
+
+def _etag(request, *args, **kwargs):
+    # The day (streaks, "today" totals), the URL and the session (CSRF token
+    # in the page) change the response too. The only shared data shown is
+    # category names, and Category writes touch their users' changed_at
+    # (core.signals). Flash messages live in their own cookie;
+    # user_data_conditional never answers 304 while one is pending.
+    raw = ':'.join(str(part) for part in (
+        request.user.pk,
+        user_data_version(request),
+        local_today(),
+        request.get_full_path(),
+        request.session.session_key,
+    ))
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def user_data_conditional(view):
+    """Answer If-None-Match from the user's last data change.
+
+    Apply inside login_required (or api_login_required). A session reaching
+    its start changes the validators (see user_data_version), so it is not
+    served as pending from a 304. Requests carrying flash messages
+    (MESSAGE_STORAGE is the cookie storage) always get the full page, so the
+    messages are rendered and cleared.
+    """
+    conditional_view = condition(etag_func=_etag)(view)
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.COOKIES.get(CookieStorage.cookie_name):
+            response = view(request, *args, **kwargs)
+        else:
+            response = conditional_view(request, *args, **kwargs)
+        # Per-user content: browsers may keep it but must revalidate.
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+    return wrapper
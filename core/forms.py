@@ -1,7 +1,16 @@
+from datetime import datetime, timedelta
+
 from django import forms
 from django.utils import timezone
-from django.db.models import Sum
-from .models import Session, Task
+from .models import Session, Task, local_timezone
+
+SLOT_CONFLICT_ERROR = "This time slot conflicts with an existing session."
+
+MAX_REPEAT_WEEKS = 26
+
+WEEKDAY_CHOICES = [
+    (0, 'Mon'), (1, 'Tue'), (2, 'Wed'), (3, 'Thu'), (4, 'Fri'), (5, 'Sat'), (6, 'Sun'),
+]
 
 
 class TaskForm(forms.ModelForm):
@@ -36,6 +45,26 @@ class TaskForm(forms.ModelForm):
 
 
 class SessionBookForm(forms.ModelForm):
+    repeat_days = forms.TypedMultipleChoiceField(
+        choices=WEEKDAY_CHOICES,
+        coerce=int,
+        required=False,
+        widget=forms.CheckboxSelectMultiple(attrs={'class': 'form-check-input'}),
+        label='Repeat on (optional)',
+    )
+    repeat_weeks = forms.IntegerField(
+        required=False,
+        min_value=1,
+        max_value=MAX_REPEAT_WEEKS,
+        widget=forms.NumberInput(attrs={
+            'class': 'form-control',
+            'min': 1,
+            'max': MAX_REPEAT_WEEKS,
+            'placeholder': 'e.g. 12',
+        }),
+        label='For how many weeks',
+    )
+
     class Meta:
         model = Session
         fields = ['task', 'planned_start', 'planned_end', 'notes']
@@ -70,35 +99,64 @@ class SessionBookForm(forms.ModelForm):
         if user:
             self.fields['task'].queryset = user.tasks.filter(is_active=True)
 
+    def is_recurring(self):
+        return bool(self.cleaned_data.get('repeat_days'))
+
+    def expand_occurrences(self, start, end):
+        """Expand the recurrence rule into (start, end) slots, or just the one slot.
+
+        Occurrences keep the local wall-clock time of the first session and
+        fall on the selected weekdays from its date for `repeat_weeks` weeks.
+        """
+        days = set(self.cleaned_data.get('repeat_days') or [])
+        if not days:
+            return [(start, end)]
+        tz = local_timezone()
+        local_start = timezone.localtime(start, tz)
+        duration = end - start
+        occurrences = []
+        for offset in range((self.cleaned_data.get('repeat_weeks') or 1) * 7):
+            day = local_start.date() + timedelta(days=offset)
+            if day.weekday() in days:
+                occurrence = datetime.combine(day, local_start.time(), tzinfo=tz)
+                occurrences.append((occurrence, occurrence + duration))
+        return occurrences
+
     def clean(self):
         cleaned_data = super().clean()
         start = cleaned_data.get('planned_start')
         end = cleaned_data.get('planned_end')
         task = cleaned_data.get('task')
+        self.occurrences = []
+        self.skipped = []
 
         if start and end:
             if end <= start:
                 raise forms.ValidationError("End time must be after start time.")
 
+            self.occurrences = self.expand_occurrences(start, end)
+            if not self.occurrences:
+                raise forms.ValidationError(
+                    "No sessions fall on the selected days in that period."
+                )
             if self.current_user:
-                conflicts = Session.objects.filter(
-                    user=self.current_user,
-                    planned_start__lt=end,
-                    planned_end__gt=start,
-                ).exclude(status='cancelled')
+                conflicts = Session.objects.filter(user=self.current_user)
                 if self.instance.pk:
                     conflicts = conflicts.exclude(pk=self.instance.pk)
-                if conflicts.exists():
+                self.skipped = conflicts.conflicting_slots(self.occurrences)
+                if self.skipped and not self.is_recurring():
+                    raise forms.ValidationError(SLOT_CONFLICT_ERROR)
+                if len(self.skipped) == len(self.occurrences):
                     raise forms.ValidationError(
-                        "This time slot conflicts with an existing session."
+                        "Every session in this series conflicts with an existing session."
                     )
+                self.occurrences = [o for o in self.occurrences if o not in self.skipped]
 
-        if start and end and task:
-            session_minutes = int((end - start).total_seconds() / 60)
-            used_minutes = task.sessions.exclude(
-                status__in=['cancelled', 'pending']
-            ).aggregate(total=Sum('actual_minutes'))['total'] or 0
-            remaining = task.target_minutes - used_minutes
+        if self.occurrences and task:
+            session_minutes = sum(
+                int((o_end - o_start).total_seconds() / 60) for o_start, o_end in self.occurrences
+            )
+            remaining = task.target_minutes - task.total_actual_minutes()
 
             if remaining <= 0:
                 raise forms.ValidationError(
@@ -107,14 +165,32 @@ class SessionBookForm(forms.ModelForm):
                 )
 
             if session_minutes > remaining:
+                booked = (
+                    f'these {len(self.occurrences)} sessions ({session_minutes} min) exceed'
+                    if self.is_recurring()
+                    else f'this session ({session_minutes} min) exceeds'
+                )
                 self.overtime_warning = (
-                    f'Heads up: this session ({session_minutes} min) exceeds your '
+                    f'Heads up: {booked} your '
                     f'remaining target ({remaining} min) for "{task.title}". '
                     f'Progress will be capped at 100%.'
                 )
 
         return cleaned_data
 
+    def build_sessions(self, user):
+        """Unsaved Session instances for every non-conflicting occurrence."""
+        return [
+            Session(
+                task=self.cleaned_data['task'],
+                user=user,
+                planned_start=start,
+                planned_end=end,
+                notes=self.cleaned_data.get('notes', ''),
+            )
+            for start, end in self.occurrences
+        ]
+
 
 class ProgressUpdateForm(forms.ModelForm):
     class Meta:
@@ -0,0 +1,90 @@
+"""Per-request timing of SQL and template rendering.
+
+SQL goes through connection.execute_wrapper. Templates are timed by wrapping
+Template.render (installed by install_template_timing()); the
+template_rendered signal can't be used, as Django only sends it under the
+test runner. Only the outermost render of a request is timed, and queries
+that run while it renders (lazy querysets) count as DB time, not template
+time.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import connection
+from django.template.base import Template
+
+
+class QueryRecorder:
+    """connection.execute_wrapper that counts queries and their time."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - started
+
+
+class RequestTimer(QueryRecorder):
+
+    def __init__(self):
+        super().__init__()
+        self.template_seconds = 0.0
+        self.template_db_seconds = 0.0
+        self.template_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        before = self.seconds
+        try:
+            return super().__call__(execute, sql, params, many, context)
+        finally:
+            if self.template_depth:
+                self.template_db_seconds += self.seconds - before
+
+    @property
+    def template_only_seconds(self):
+        return max(self.template_seconds - self.template_db_seconds, 0.0)
+
+
+_current_timer = ContextVar('trackit_request_timer', default=None)
+
+# view_name of the request being handled, set by ServerTimingMiddleware.
+current_view = ContextVar('trackit_current_view', default=None)
+
+
+@contextmanager
+def request_timer():
+    """Time SQL and template rendering inside the block."""
+    timer = RequestTimer()
+    token = _current_timer.set(timer)
+    try:
+        with connection.execute_wrapper(timer):
+            yield timer
+    finally:
+        _current_timer.reset(token)
+
+
+_original_render = Template.render
+
+
+def _timed_render(self, context):
+    timer = _current_timer.get()
+    if timer is None or timer.template_depth:
+        return _original_render(self, context)
+    timer.template_depth += 1
+    started = time.perf_counter()
+    try:
+        return _original_render(self, context)
+    finally:
+        timer.template_seconds += time.perf_counter() - started
+        timer.template_depth -= 1
+
+
+def install_template_timing():
+    Template.render = _timed_render
@@ -0,0 +1,89 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+
+from core.benchmarks import BENCHMARK_CACHES
+from core.models import ROLLUP_FIELDS, Session, Task, apply_rollup_deltas, rollup_deltas
+
+ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+PAGES = {'dashboard': '/dashboard/', 'session_list': '/sessions/'}
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure queries (total and against django_session) and latency per request '
+        'for dashboard and session_list under each session engine. Runs inside a '
+        'transaction that is rolled back and against a private in-memory cache, so it '
+        'leaves no data behind and never clears the shared cache.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20, help='Requests per page and engine.')
+        parser.add_argument('--engine', choices=sorted(ENGINES), action='append',
+                            help='Engine(s) to measure (default: all).')
+
+    def handle(self, *args, iterations=20, engine=None, **options):
+        results = []
+        try:
+            with transaction.atomic():
+                user = self.seed()
+                for name in engine or ENGINES:
+                    results.extend(self.measure(name, user, iterations))
+                raise Rollback
+        except Rollback:
+            pass
+
+        self.stdout.write(f"{'engine':<16}{'page':<14}{'queries':>9}{'session':>9}{'ms':>9}")
+        for name, page, queries, session_queries, ms in results:
+            self.stdout.write(f'{name:<16}{page:<14}{queries:>9.1f}{session_queries:>9.1f}{ms:>9.2f}')
+
+    def seed(self):
+        user = User.objects.create_user(username=f'bench-{time.time_ns()}', password='unused')
+        task = Task.objects.create(user=user, title='Benchmark', target_minutes=600)
+        now = timezone.now()
+        sessions = Session.objects.bulk_create([
+            Session(
+                task=task, user=user, status='completed', actual_minutes=30, completion_percent=80,
+                planned_start=now - timedelta(days=i, hours=1), planned_end=now - timedelta(days=i),
+            )
+            for i in range(30)
+        ])
+        # bulk_create skips Session.save(), so shift the rollups it would have.
+        apply_rollup_deltas(*rollup_deltas(
+            ({field: getattr(session, field) for field in ROLLUP_FIELDS}, 1) for session in sessions
+        ))
+        return user
+
+    def measure(self, name, user, iterations):
+        hosts = [*settings.ALLOWED_HOSTS, 'testserver']
+        with override_settings(SESSION_ENGINE=ENGINES[name], ALLOWED_HOSTS=hosts, CACHES=BENCHMARK_CACHES):
+            cache.clear()
+            client = Client()
+            client.force_login(user)
+            for page, url in PAGES.items():
+                client.get(url)  # warm caches
+                queries = session_queries = 0
+                started = time.perf_counter()
+                for _ in range(iterations):
+                    with CaptureQueriesContext(connection) as ctx:
+                        client.get(url)
+                    queries += len(ctx.captured_queries)
+                    session_queries += sum('django_session' in q['sql'] for q in ctx.captured_queries)
+                elapsed = (time.perf_counter() - started) * 1000
+                yield name, page, queries / iterations, session_queries / iterations, elapsed / iterations
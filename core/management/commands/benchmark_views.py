@@ -0,0 +1,66 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.benchmarks import BUDGETS_PATH, load_budgets, run_benchmarks
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a dataset, measure query count, DB time and wall time for the main pages '
+        'and compare them with core/benchmark_budgets.json. Runs inside a transaction '
+        'that is rolled back, so it leaves no data behind.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20, help='Users per seeding round.')
+        parser.add_argument('--tasks-per-user', type=int, default=5, help='Tasks per user in the small round.')
+        parser.add_argument('--sessions', type=int, default=5000, help='Sessions in the small round.')
+        parser.add_argument('--scale', type=int, default=4, help='Growth factor for the large round.')
+        parser.add_argument('--iterations', type=int, default=5, help='Cold-cache requests per page.')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--budgets', default=str(BUDGETS_PATH), help='Budget file to compare against.')
+        parser.add_argument('--latency', action='store_true',
+                            help='Also fail on wall time over budget (only meaningful on production-like hardware).')
+        parser.add_argument('--output', help='Write the JSON report to this file.')
+
+    def handle(self, *args, **options):
+        report = None
+        try:
+            with transaction.atomic():
+                report = run_benchmarks(
+                    users=options['users'], tasks_per_user=options['tasks_per_user'],
+                    sessions=options['sessions'], scale=options['scale'],
+                    iterations=options['iterations'], seed=options['seed'],
+                    budgets=load_budgets(options['budgets']), latency=options['latency'],
+                )
+                raise Rollback
+        except Rollback:
+            pass
+
+        self.stdout.write(
+            f"{'page':<22}{'queries':>9}{'warm':>6}{'budget':>8}{'db ms':>9}{'wall ms':>9}"
+        )
+        for name, views in report['views'].items():
+            large, budget = views['large'], views['budget'] or {}
+            queries = f"{views['small']['queries']}/{large['queries']}"
+            self.stdout.write(
+                f"{name:<22}{queries:>9}{large['warm_queries']:>6}{budget.get('queries', '-'):>8}"
+                f"{large['db_ms']:>9.2f}{large['wall_ms']:>9.2f}"
+            )
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2, sort_keys=True)
+                f.write('\n')
+            self.stdout.write(f"Report written to {options['output']}.")
+
+        for problem in report['violations']:
+            self.stderr.write(problem)
+        if report['violations']:
+            raise CommandError(f"{len(report['violations'])} benchmark budget(s) exceeded.")
+        self.stdout.write(self.style.SUCCESS('All pages within budget.'))
@@ -0,0 +1,36 @@
+import time
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete expired rows from django_session in small chunks, so the cleanup '
+        'never holds long locks on the table (unlike a single clearsessions DELETE).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Rows deleted per statement.')
+        parser.add_argument('--pause', type=float, default=0.0,
+                            help='Seconds to sleep between chunks.')
+
+    def handle(self, *args, chunk_size=1000, pause=0.0, **options):
+        if settings.SESSION_ENGINE.endswith('signed_cookies'):
+            self.stdout.write('Sessions are stored in cookies; nothing to clear.')
+            return
+        now = timezone.now()
+        expired = Session.objects.filter(expire_date__lt=now).order_by('expire_date')
+        deleted = 0
+        while True:
+            keys = list(expired.values_list('session_key', flat=True)[:chunk_size])
+            if not keys:
+                break
+            deleted += Session.objects.filter(session_key__in=keys).delete()[0]
+            if len(keys) < chunk_size:
+                break
+            if pause:
+                time.sleep(pause)
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} expired session(s).'))
@@ -0,0 +1,99 @@
+import hashlib
+import re
+import urllib.request
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.vendor import ASSETS, font_css
+
+# Source maps aren't vendored; ManifestStaticFilesStorage would otherwise
+# fail collectstatic looking for the .map files these comments reference.
+SOURCE_MAP = re.compile(rb'\n?/[*/]# sourceMappingURL=[^\n]*?(?:\*/)?\s*$')
+
+
+# "<sha256>  <path>" per line (sha256sum format), committed with the files.
+SUMS_FILE = 'SHA256SUMS'
+
+
+def sha256(body):
+    return hashlib.sha256(body).hexdigest()
+
+
+def read_sums(vendor):
+    path = vendor / SUMS_FILE
+    if not path.exists():
+        return {}
+    return dict(reversed(line.split(None, 1)) for line in path.read_text().splitlines() if line.strip())
+
+
+def write_sums(vendor, sums):
+    (vendor / SUMS_FILE).write_text(''.join(f'{sums[path]}  {path}\n' for path in sorted(sums)))
+
+
+class Command(BaseCommand):
+    help = (
+        'Download the pinned front-end assets (core.vendor.ASSETS) into static/vendor/, '
+        'verifying each against static/vendor/SHA256SUMS. Commit the files with SHA256SUMS '
+        'to serve them instead of the CDN (VENDOR_ASSETS_SELF_HOSTED).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Re-download files that already exist.')
+        parser.add_argument('--check', action='store_true',
+                            help='Verify the committed files against SHA256SUMS without downloading; '
+                                 'exit with an error if any are missing or differ.')
+        parser.add_argument('--pin', action='store_true',
+                            help='Record the checksum of assets that have none pinned yet (after a '
+                                 'version bump). Review and commit SHA256SUMS with the files.')
+
+    def handle(self, *args, force=False, check=False, pin=False, **options):
+        vendor = Path(settings.BASE_DIR) / 'static' / 'vendor'
+        sums = read_sums(vendor)
+        if check:
+            problems = []
+            for _, path in ASSETS:
+                file = vendor / path
+                if path not in sums:
+                    problems.append(f'No checksum pinned for {path}')
+                elif not file.exists():
+                    problems.append(f'Missing {path}')
+                elif sha256(file.read_bytes()) != sums[path]:
+                    problems.append(f'Checksum mismatch for {path}')
+            for problem in problems:
+                self.stdout.write(problem)
+            if problems:
+                raise CommandError(f'{len(problems)} vendored asset(s) missing or unverified.')
+            self.stdout.write(self.style.SUCCESS(f'All {len(ASSETS)} vendored assets present and verified.'))
+            return
+
+        missing = [(url, path) for url, path in ASSETS if force or not (vendor / path).exists()]
+        unpinned = [path for _, path in missing if path not in sums]
+        if unpinned and not pin:
+            raise CommandError(
+                f'No checksum pinned for {", ".join(unpinned)}; rerun with --pin to record them.'
+            )
+        for url, path in missing:
+            if url is None:
+                body = font_css().encode()
+            else:
+                try:
+                    with urllib.request.urlopen(url, timeout=30) as response:
+                        body = response.read()
+                except OSError as e:
+                    raise CommandError(f'Could not download {url}: {e}') from e
+            if path.endswith(('.css', '.js')):
+                body = SOURCE_MAP.sub(b'\n', body)
+            digest = sha256(body)
+            if path not in sums:
+                sums[path] = digest
+                write_sums(vendor, sums)
+                self.stdout.write(f'Pinned {path} {digest}')
+            elif digest != sums[path]:
+                raise CommandError(f'Checksum mismatch for {url or path}: got {digest}, expected {sums[path]}.')
+            file = vendor / path
+            file.parent.mkdir(parents=True, exist_ok=True)
+            file.write_bytes(body)
+            self.stdout.write(f'Fetched {path}')
+        self.stdout.write(self.style.SUCCESS(f'{len(missing)} asset(s) fetched, {len(ASSETS) - len(missing)} already present.'))
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.models import DailyActivity, Session
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the per-user DailyActivity rollup from the raw Session rows.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Only verify the rollup; exit with an error if any day is out of date.',
+        )
+
+    def handle(self, *args, check=False, **options):
+        fields = ('minutes', 'session_count', 'quality_sum', 'quality_count')
+        with transaction.atomic():
+            expected = Session.objects.daily_rollups()
+            stored = {
+                (row[0], row[1]): tuple(row[2:])
+                for row in DailyActivity.objects.select_for_update().values_list(
+                    'user_id', 'day', *fields
+                ).order_by()
+            }
+            stale = {
+                key: expected.get(key, (0, 0, 0, 0))
+                for key in expected.keys() | stored.keys()
+                if expected.get(key, (0, 0, 0, 0)) != stored.get(key, (0, 0, 0, 0))
+            }
+
+            for (user_id, day), values in sorted(stale.items()):
+                self.stdout.write(
+                    f'User {user_id} on {day}: stored {stored.get((user_id, day))}, expected {values}'
+                )
+                if not check:
+                    DailyActivity.objects.update_or_create(
+                        user_id=user_id, day=day, defaults=dict(zip(fields, values)),
+                    )
+
+        if check and stale:
+            raise CommandError(f'{len(stale)} daily activity row(s) out of date.')
+        if check:
+            self.stdout.write(self.style.SUCCESS(f'All {len(stored)} daily activity row(s) up to date.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt {len(stale)} daily activity row(s).'))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from core import search
+
+
+class Command(BaseCommand):
+    help = 'Repopulate the SQLite FTS5 search tables from users, tasks and sessions.'
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            self.stdout.write('Search uses database indexes on this backend; nothing to rebuild.')
+            return
+        with transaction.atomic():
+            search.rebuild_index()
+        self.stdout.write(self.style.SUCCESS('Rebuilt the search index.'))
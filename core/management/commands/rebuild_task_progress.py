@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.models import Session, Task
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the per-task progress rollup columns from the raw Session rows.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Only verify the rollups; exit with an error if any are out of date.',
+        )
+
+    def handle(self, *args, check=False, **options):
+        with transaction.atomic():
+            expected = Session.objects.progress_rollups()
+            tasks = Task.objects.select_for_update().only(
+                'pk', 'logged_minutes', 'quality_sum', 'quality_count'
+            )
+            stale = []
+            total = 0
+            for task in tasks.iterator():
+                total += 1
+                values = expected.get(task.pk, (0, 0, 0))
+                if (task.logged_minutes, task.quality_sum, task.quality_count) != values:
+                    stale.append((task, values))
+
+            for task, (minutes, quality_sum, quality_count) in stale:
+                self.stdout.write(
+                    f'Task {task.pk}: stored {task.logged_minutes}/{task.quality_sum}/'
+                    f'{task.quality_count}, expected {minutes}/{quality_sum}/{quality_count}'
+                )
+                if not check:
+                    Task.objects.filter(pk=task.pk).update(
+                        logged_minutes=minutes,
+                        quality_sum=quality_sum,
+                        quality_count=quality_count,
+                    )
+
+        if check and stale:
+            raise CommandError(f'{len(stale)} task rollup(s) out of date.')
+        if check:
+            self.stdout.write(self.style.SUCCESS(f'All {total} task rollup(s) up to date.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt {len(stale)} of {total} task rollup(s).'))
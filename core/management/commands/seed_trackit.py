@@ -0,0 +1,237 @@
+import math
+import random
+import re
+import time
+from datetime import datetime, time as dt_time, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from core import search
+from core.cache import invalidate_admin_snapshot
+from core.models import Category, DailyActivity, Session, Task, UserDataChange, local_timezone, rollup_deltas
+
+CATEGORIES = {
+    'Programming': ['Python', 'Django', 'SQL', 'Algorithms', 'Rust', 'Testing'],
+    'Mathematics': ['Calculus', 'Linear algebra', 'Statistics', 'Probability'],
+    'Languages': ['Spanish', 'German', 'Japanese', 'French vocabulary'],
+    'Music': ['Piano scales', 'Guitar chords', 'Music theory'],
+    'Reading': ['Fiction', 'History', 'Papers'],
+    'Fitness': ['Running', 'Yoga', 'Strength training'],
+}
+TITLE_SUFFIXES = ['basics', 'practice', 'deep dive', 'project', 'review', 'course']
+NOTES = [
+    '', '', '', '', 'Good focus', 'Got distracted', 'Finished the chapter',
+    'Need to revisit this', 'Worked through exercises', 'Short on time',
+]
+
+# Non-overlapping daily slots (local time); a session starts up to 30 minutes
+# after its slot and lasts at most two hours, so slots never collide.
+SLOT_STARTS = [dt_time(7, 0), dt_time(12, 0), dt_time(17, 0), dt_time(20, 30)]
+DURATIONS = [25, 30, 45, 60, 90, 120]
+DURATION_WEIGHTS = [2, 4, 3, 5, 2, 1]
+
+# (status, weight) for sessions whose start is in the past / future.
+PAST_STATUSES = [('completed', 78), ('cancelled', 12), ('pending', 6), ('in_progress', 4)]
+FUTURE_STATUSES = [('pending', 93), ('cancelled', 7)]
+
+SESSION_COLUMNS = [
+    'task_id', 'user_id', 'planned_start', 'planned_end', 'actual_minutes',
+    'completion_percent', 'status', 'notes', 'created_at',
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate deterministic synthetic users, tasks and sessions for load testing. '
+        'Rows are written in chunks with bulk_create (COPY on PostgreSQL) and the Task '
+        'and DailyActivity rollups are computed alongside, so no rebuild is needed.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100, help='Users to create.')
+        parser.add_argument('--tasks-per-user', type=int, default=5, help='Tasks per user.')
+        parser.add_argument('--sessions', type=int, default=10000,
+                            help='Total sessions, spread unevenly across users.')
+        parser.add_argument('--days', type=int, default=365, help='Days of history before today.')
+        parser.add_argument('--days-ahead', type=int, default=14, help='Days of planned sessions after today.')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed; the same seed gives the same data.')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Rows per insert batch.')
+        parser.add_argument('--prefix', default='seed', help='Username prefix.')
+        parser.add_argument('--password', default='trackit-seed', help='Password for every seeded user.')
+        parser.add_argument('--flush', action='store_true',
+                            help='Delete previously seeded users with this prefix first.')
+        parser.add_argument('--no-copy', action='store_true',
+                            help='Use bulk_create for sessions even on PostgreSQL.')
+
+    def handle(self, *args, **options):
+        users = options['users']
+        if users < 1 or options['tasks_per_user'] < 1 or options['sessions'] < 0:
+            raise CommandError('--users and --tasks-per-user must be positive and --sessions not negative.')
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be positive.')
+        prefix = options['prefix']
+        seeded = User.objects.filter(username__regex=rf'^{re.escape(prefix)}[0-9]{{7}}$')
+        if options['flush']:
+            self.flush(seeded)
+        elif seeded.exists():
+            raise CommandError(f'Users named "{prefix}..." already exist; pass --flush to replace them.')
+
+        self.rng = random.Random(options['seed'])
+        self.options = options
+        self.today = timezone.localdate(timezone=local_timezone())
+        self.slot_count = (options['days'] + options['days_ahead']) * len(SLOT_STARTS)
+        self.password = make_password(options['password'])
+        self.categories = [
+            Category.objects.get_or_create(name=name)[0] for name in CATEGORIES
+        ]
+        self.use_copy = connection.vendor == 'postgresql' and not options['no_copy']
+
+        counts = self.session_counts(users, options['sessions'])
+        per_batch = max(1, options['chunk_size'] // max(1, options['sessions'] // users))
+        started = time.perf_counter()
+        totals = [0, 0, 0]
+        for first in range(0, users, per_batch):
+            with transaction.atomic():
+                batch = self.seed_users(first, counts[first:first + per_batch])
+            totals = [total + n for total, n in zip(totals, batch)]
+            self.stdout.write(
+                f'{first + len(counts[first:first + per_batch])}/{users} users, '
+                f'{totals[2]} sessions ({time.perf_counter() - started:.1f}s)'
+            )
+
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE core_task, core_session, core_dailyactivity')
+        invalidate_admin_snapshot()
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {totals[0]} user(s), {totals[1]} task(s) and {totals[2]} session(s) '
+            f'in {time.perf_counter() - started:.1f}s.'
+        ))
+
+    def flush(self, users):
+        """Delete seeded users with set-based deletes.
+
+        A cascading delete would run the per-row rollup and search signals for
+        every session; the rollup rows belong to these users too, so they go
+        with them and only the search index needs rebuilding.
+        """
+        user_ids = users.values('pk')
+        with transaction.atomic():
+            for model in (Session, DailyActivity, Task, UserDataChange):
+                model.objects.filter(user__in=user_ids)._raw_delete(connection.alias)
+            deleted = users.delete()[0]
+        search.rebuild_index()
+        self.stdout.write(f'Deleted {deleted} existing seeded row(s).')
+
+    def session_counts(self, users, sessions):
+        """Split `sessions` across users by a log-normal activity level."""
+        weights = [self.rng.lognormvariate(0, 0.6) for _ in range(users)]
+        scale = sessions / sum(weights)
+        counts = [math.floor(weight * scale) for weight in weights]
+        for i in range(sessions - sum(counts)):
+            counts[i % users] += 1
+        if max(counts) > self.slot_count:
+            raise CommandError(
+                f'A user would need {max(counts)} sessions but only {self.slot_count} slots fit '
+                f'in the date range; raise --days or --users.'
+            )
+        return counts
+
+    def seed_users(self, first, counts):
+        prefix = self.options['prefix']
+        users = User.objects.bulk_create([
+            User(username=f'{prefix}{first + i:07d}', email=f'{prefix}{first + i:07d}@example.com',
+                 password=self.password, date_joined=timezone.now())
+            for i in range(len(counts))
+        ])
+        UserDataChange.objects.bulk_create(
+            [UserDataChange(user=user, changed_at=timezone.now()) for user in users]
+        )
+
+        # Sessions reference their task by list position until the tasks exist.
+        tasks, sessions = [], []
+        for user, count in zip(users, counts):
+            offset = len(tasks)
+            tasks.extend(self.make_tasks(user))
+            sessions.extend(self.make_sessions(user, count, offset))
+        task_deltas, day_deltas = rollup_deltas((row, 1) for row in sessions)
+        for position, (minutes, quality_sum, quality_count) in task_deltas.items():
+            tasks[position].logged_minutes = minutes
+            tasks[position].quality_sum = quality_sum
+            tasks[position].quality_count = quality_count
+
+        chunk_size = self.options['chunk_size']
+        Task.objects.bulk_create(tasks, batch_size=chunk_size)
+        for row in sessions:
+            row['task_id'] = tasks[row['task_id']].pk
+        self.insert_sessions(sessions)
+        DailyActivity.objects.bulk_create([
+            DailyActivity(user_id=user_id, day=day, minutes=minutes, session_count=count,
+                          quality_sum=quality_sum, quality_count=quality_count)
+            for (user_id, day), (minutes, count, quality_sum, quality_count) in day_deltas.items()
+        ], batch_size=chunk_size)
+        search.index_objects('user', users)
+        search.index_objects('task', tasks)
+        return len(users), len(tasks), len(sessions)
+
+    def make_tasks(self, user):
+        rng = self.rng
+        for _ in range(self.options['tasks_per_user']):
+            category = rng.choice(self.categories)
+            yield Task(
+                user=user, category=category,
+                title=f'{rng.choice(CATEGORIES[category.name])} {rng.choice(TITLE_SUFFIXES)}',
+                target_minutes=rng.choice([60, 120, 300, 600, 1200, 3000]),
+                is_active=rng.random() < 0.85,
+            )
+
+    def make_sessions(self, user, count, offset):
+        rng = self.rng
+        tz = local_timezone()
+        now = timezone.now()
+        first_day = self.today - timedelta(days=self.options['days'])
+        tasks_per_user = self.options['tasks_per_user']
+        # Most time goes to a few favourite tasks.
+        task_weights = [1 / (rank + 1) for rank in range(tasks_per_user)]
+        for slot in sorted(rng.sample(range(self.slot_count), count)):
+            day = first_day + timedelta(days=slot // len(SLOT_STARTS))
+            start = datetime.combine(day, SLOT_STARTS[slot % len(SLOT_STARTS)], tz)
+            start += timedelta(minutes=rng.randrange(0, 31, 5))
+            planned = rng.choices(DURATIONS, DURATION_WEIGHTS)[0]
+            statuses = PAST_STATUSES if start <= now else FUTURE_STATUSES
+            status = rng.choices(*zip(*statuses))[0]
+            actual_minutes = completion_percent = 0
+            if status == 'completed':
+                actual_minutes = max(5, round(planned * rng.uniform(0.6, 1.2)))
+                completion_percent = 5 * round(rng.triangular(40, 100, 85) / 5)
+            elif status == 'in_progress':
+                actual_minutes = round(planned * rng.uniform(0, 0.8))
+            yield {
+                'task_id': offset + rng.choices(range(tasks_per_user), task_weights)[0],
+                'user_id': user.pk,
+                'planned_start': start,
+                'planned_end': start + timedelta(minutes=planned),
+                'actual_minutes': actual_minutes,
+                'completion_percent': completion_percent,
+                'status': status,
+                'notes': rng.choice(NOTES),
+                'created_at': now,
+            }
+
+    def insert_sessions(self, sessions):
+        if self.use_copy:
+            with connection.cursor() as cursor:
+                with cursor.copy(
+                    f'COPY core_session ({", ".join(SESSION_COLUMNS)}) FROM STDIN'
+                ) as copy:
+                    for row in sessions:
+                        copy.write_row([row[column] for column in SESSION_COLUMNS])
+            return
+        objects = Session.objects.bulk_create(
+            [Session(**row) for row in sessions], batch_size=self.options['chunk_size']
+        )
+        search.index_objects('session', objects)
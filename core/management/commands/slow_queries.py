@@ -0,0 +1,96 @@
+import json
+import math
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.slow_queries import log_files
+
+SORT_KEYS = {
+    'total': lambda row: row['total'],
+    'p95': lambda row: row['p95'],
+    'calls': lambda row: row['calls'],
+    'max': lambda row: row['max'],
+}
+
+
+def percentile(values, p):
+    """Nearest-rank percentile of sorted `values`."""
+    return values[max(math.ceil(p / 100 * len(values)) - 1, 0)]
+
+
+class Command(BaseCommand):
+    help = (
+        'Summarise the slow-query logs (one file per process next to SLOW_QUERY_LOG, '
+        'plus rotated copies) by query fingerprint: calls, p50/p95/p99/max latency, '
+        'total time, and the views and core/ call sites that issue each query.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', default=settings.SLOW_QUERY_LOG,
+                            help='SLOW_QUERY_LOG path; the per-process files next to it are read.')
+        parser.add_argument('--hours', type=float, help='Only include queries from the last N hours.')
+        parser.add_argument('--view', help='Only include queries issued by this view name.')
+        parser.add_argument('--sort', choices=sorted(SORT_KEYS), default='total')
+        parser.add_argument('--limit', type=int, default=20, help='Fingerprints to show.')
+
+    def handle(self, *args, file, hours=None, view=None, sort='total', limit=20, **options):
+        files = log_files(file)
+        if not files:
+            raise CommandError(f'No slow-query log at {file}.')
+        since = timezone.now() - timedelta(hours=hours) if hours else None
+
+        groups = defaultdict(lambda: {'durations': [], 'views': Counter(), 'frames': Counter()})
+        for log in files:
+            with open(log) as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # partial line from a rotation or crash
+                    if since and parse_datetime(record['ts']) < since:
+                        continue
+                    if view and record.get('view') != view:
+                        continue
+                    group = groups[record['fingerprint']]
+                    group['query'] = record['query']
+                    group['durations'].append(record['ms'])
+                    group['views'][record.get('view') or '-'] += 1
+                    stack = record.get('stack') or [record.get('frame') or '-']
+                    group['frames'][' < '.join(stack)] += 1
+
+        rows = []
+        for key, group in groups.items():
+            durations = sorted(group['durations'])
+            rows.append({
+                'fingerprint': key,
+                'query': group['query'],
+                'calls': len(durations),
+                'p50': percentile(durations, 50),
+                'p95': percentile(durations, 95),
+                'p99': percentile(durations, 99),
+                'max': durations[-1],
+                'total': sum(durations),
+                'view': group['views'].most_common(1)[0][0],
+                'frame': group['frames'].most_common(1)[0][0],
+            })
+        rows.sort(key=SORT_KEYS[sort], reverse=True)
+
+        self.stdout.write(
+            f"{'fingerprint':<14}{'calls':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}{'total s':>9}"
+        )
+        for row in rows[:limit]:
+            self.stdout.write(
+                f"{row['fingerprint']:<14}{row['calls']:>7}{row['p50']:>9.1f}{row['p95']:>9.1f}"
+                f"{row['p99']:>9.1f}{row['max']:>9.1f}{row['total'] / 1000:>9.2f}"
+            )
+            self.stdout.write(f"    {row['view']} — {row['frame']}")
+            self.stdout.write(f"    {row['query'][:300]}")
+        self.stdout.write(self.style.SUCCESS(
+            f'{sum(row["calls"] for row in rows)} slow queries in {len(rows)} fingerprint(s) '
+            f'from {len(files)} file(s).'
+        ))
@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.models import Session
+
+
+class Command(BaseCommand):
+    help = (
+        'Persist pending -> in_progress for sessions whose start time has passed. '
+        'Pages derive effective status at read time, but the stored status and the '
+        'progress rollups only catch up through this sweep. Run it every minute '
+        'from cron, or as a long-running worker with --interval 60.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Sessions flipped per transaction (default 500).',
+        )
+        parser.add_argument(
+            '--interval', type=int, default=0,
+            help='Keep running and sweep every N seconds instead of once.',
+        )
+
+    def handle(self, *args, batch_size=500, interval=0, **options):
+        while True:
+            started = self.sweep(batch_size)
+            self.stdout.write(self.style.SUCCESS(f'Started {started} due session(s).'))
+            if not interval:
+                return
+            time.sleep(interval)
+
+    def sweep(self, batch_size):
+        now = timezone.now()
+        due = Session.objects.filter(status='pending', planned_start__lte=now).order_by('planned_start', 'id')
+        started = 0
+        while True:
+            # Each batch locks and flips its own rows in one short transaction.
+            pks = list(due.values_list('pk', flat=True)[:batch_size])
+            if not pks:
+                return started
+            started += Session.objects.filter(pk__in=pks).start_due(now)
+            if len(pks) < batch_size:
+                return started
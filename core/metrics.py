@@ -0,0 +1,263 @@
+"""Prometheus text-format metrics, aggregated across worker processes.
+
+Each process that serves requests counts in memory and writes its totals
+to its own file in METRICS_DIR at most every METRICS_FLUSH_SECONDS (and at
+exit); /metrics sums every file. The files of exited workers are folded
+into one exited.json, so counters never go backwards and neither the file
+count nor trackit_worker_info grows with restarts. METRICS_DIR must be
+local to the host, as liveness is checked by pid. With METRICS_DIR unset
+only the current process is reported.
+"""
+import atexit
+import fcntl
+import ipaddress
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METHODS = {'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'}
+
+# name -> (type, help)
+METRICS = {
+    'trackit_http_requests_total': ('counter', 'HTTP requests by view, method and status code.'),
+    'trackit_http_request_duration_seconds': ('histogram', 'HTTP request latency by view.'),
+    'trackit_db_queries_total': ('counter', 'Database queries issued by requests, by view.'),
+    'trackit_db_query_seconds_total': ('counter', 'Time requests spent in database queries, by view.'),
+    'trackit_cache_requests_total': ('counter', 'Cached value lookups by cache and result (hit, stale, miss).'),
+    'trackit_sessions_booked_total': ('counter', 'Study sessions booked.'),
+    'trackit_session_status_changes_total': ('counter', 'Study sessions created in or moved to each status.'),
+    'trackit_worker_requests_total': ('counter', 'HTTP requests served by each worker process.'),
+    'trackit_worker_info': ('gauge', 'Worker processes that have reported metrics.'),
+}
+
+
+class _Store:
+    """This process's counters and histograms, keyed by (name, label pairs)."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.pid = os.getpid()
+        self.started = time.time()
+        self.counters = defaultdict(float)
+        # [count per bucket..., +Inf count, sum]
+        self.histograms = defaultdict(lambda: [0] * (len(LATENCY_BUCKETS) + 1) + [0.0])
+        self.flushed_at = 0.0
+        self.flush_at_exit = False
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'pid': self.pid,
+                'ppid': os.getppid(),
+                'started': self.started,
+                'counters': [[name, list(labels), value] for (name, labels), value in self.counters.items()],
+                'histograms': [[name, list(labels), list(values)] for (name, labels), values in self.histograms.items()],
+            }
+
+
+_store = _Store()
+# A forked worker (gunicorn --preload) starts from empty totals of its own.
+os.register_at_fork(after_in_child=_store.reset)
+
+
+def _labels(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def inc(name, value=1, **labels):
+    with _store.lock:
+        _store.counters[name, _labels(labels)] += value
+
+
+def observe(name, value, **labels):
+    with _store.lock:
+        values = _store.histograms[name, _labels(labels)]
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if value <= bound:
+                values[i] += 1
+                break
+        else:
+            values[len(LATENCY_BUCKETS)] += 1
+        values[-1] += value
+
+
+def record_request(view, method, status, seconds, queries, query_seconds):
+    method = method if method in METHODS else 'other'
+    inc('trackit_http_requests_total', view=view, method=method, status=status)
+    observe('trackit_http_request_duration_seconds', seconds, view=view)
+    inc('trackit_db_queries_total', queries, view=view)
+    inc('trackit_db_query_seconds_total', query_seconds, view=view)
+    inc('trackit_worker_requests_total', worker=_store.pid)
+
+
+def _path():
+    return Path(settings.METRICS_DIR) / f'{_store.pid}-{int(_store.started * 1000)}.json'
+
+
+def flush(force=False):
+    """Write this process's totals for other workers' /metrics to read.
+
+    Called by MetricsMiddleware after every request; the first call also
+    arranges a final flush at exit, so only serving processes leave a file.
+    """
+    if not settings.METRICS_DIR:
+        return
+    if not _store.flush_at_exit:
+        _store.flush_at_exit = True
+        atexit.register(_flush_at_exit)
+    now = time.monotonic()
+    if not force and now - _store.flushed_at < settings.METRICS_FLUSH_SECONDS:
+        return
+    _store.flushed_at = now
+    path = _path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix('.tmp')
+    tmp.write_text(json.dumps(_store.snapshot()))
+    os.replace(tmp, path)
+
+
+def _flush_at_exit():
+    try:
+        flush(force=True)
+    except Exception:
+        pass
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # exists, owned by another user
+    return True
+
+
+def _merge(counters, histograms, snapshot):
+    for name, labels, value in snapshot['counters']:
+        counters[name, tuple(map(tuple, labels))] += value
+    for name, labels, values in snapshot['histograms']:
+        merged = histograms[name, tuple(map(tuple, labels))]
+        for i, value in enumerate(values):
+            merged[i] += value
+
+
+def _empty_totals():
+    return defaultdict(float), defaultdict(lambda: [0] * (len(LATENCY_BUCKETS) + 1) + [0.0])
+
+
+def _retire(path, snapshot):
+    """Fold an exited worker's totals into exited.json and remove its file."""
+    directory = path.parent
+    claimed = path.with_suffix('.retiring')
+    try:
+        # Only one reader wins the rename, so the totals are folded in once.
+        os.rename(path, claimed)
+    except OSError:
+        return
+    with open(directory / 'exited.lock', 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        archive = directory / 'exited.json'
+        counters, histograms = _empty_totals()
+        try:
+            _merge(counters, histograms, json.loads(archive.read_text()))
+        except (OSError, ValueError):
+            pass
+        _merge(counters, histograms, snapshot)
+        tmp = archive.with_suffix('.tmp')
+        tmp.write_text(json.dumps({
+            'counters': [[name, list(labels), value] for (name, labels), value in counters.items()],
+            'histograms': [[name, list(labels), values] for (name, labels), values in histograms.items()],
+        }))
+        os.replace(tmp, archive)
+    claimed.unlink()
+
+
+def _snapshots():
+    """This process's totals, then every other file's (exited.json has no pid)."""
+    own = _store.snapshot()
+    if not settings.METRICS_DIR:
+        return [own]
+    own_path = _path()
+    snapshots = [own]
+    for path in Path(settings.METRICS_DIR).glob('*.json'):
+        if path == own_path:
+            continue
+        try:
+            snapshot = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue  # being replaced or removed
+        if 'pid' in snapshot and not _alive(snapshot['pid']):
+            _retire(path, snapshot)
+        snapshots.append(snapshot)
+    return snapshots
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (
+        (key, value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in labels
+    )
+    return '{' + ','.join(f'{key}="{value}"' for key, value in escaped) + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+def render():
+    """All processes' metrics in the Prometheus text exposition format."""
+    snapshots = _snapshots()
+    counters, histograms = _empty_totals()
+    for snapshot in snapshots:
+        _merge(counters, histograms, snapshot)
+    gauges = {
+        ('trackit_worker_info', _labels({
+            'worker': snapshot['pid'], 'parent': snapshot['ppid'], 'started': int(snapshot['started']),
+        })): 1
+        for snapshot in snapshots
+        if 'pid' in snapshot and _alive(snapshot['pid'])
+    }
+
+    lines = []
+    for name, (kind, help_text) in METRICS.items():
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+        if kind == 'histogram':
+            for (series, labels), values in sorted(histograms.items()):
+                if series != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip([*map(str, LATENCY_BUCKETS), '+Inf'], values[:-1]):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{_format_labels(labels + (("le", bound),))} {cumulative}')
+                lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(values[-1])}')
+                lines.append(f'{name}_count{_format_labels(labels)} {cumulative}')
+        else:
+            series = gauges if kind == 'gauge' else counters
+            for (series_name, labels), value in sorted(series.items()):
+                if series_name == name:
+                    lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+    return '\n'.join(lines) + '\n'
+
+
+def client_allowed(request):
+    """Whether the request comes from an address in METRICS_ALLOWED_IPS."""
+    try:
+        address = ipaddress.ip_address(request.META.get('REMOTE_ADDR', ''))
+    except ValueError:
+        return False
+    return any(
+        address in ipaddress.ip_network(network, strict=False)
+        for network in settings.METRICS_ALLOWED_IPS
+    )
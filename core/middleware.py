@@ -0,0 +1,124 @@
+import json
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.db import connection
+
+from . import metrics
+from .instrumentation import QueryRecorder, current_view, install_template_timing, request_timer
+from .nplusone import detect_n_plus_one
+from .profiling import profile_request, profile_requested, wants_profile
+
+timing_logger = logging.getLogger('core.timing')
+
+
+class ServerTimingMiddleware:
+    """Time a sample of requests: SQL, template rendering and the rest.
+
+    Sampled requests get a Server-Timing header (staff only unless
+    SERVER_TIMING_PUBLIC) and one JSON log line on the core.timing logger.
+    Unsampled requests only pay for one random() call. Every request
+    records its view name in instrumentation.current_view for the
+    slow-query log.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        install_template_timing()
+
+    def __call__(self, request):
+        try:
+            return self.respond(request)
+        finally:
+            token = getattr(request, '_current_view_token', None)
+            if token is not None:
+                current_view.reset(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._current_view_token = current_view.set(request.resolver_match.view_name)
+
+    def respond(self, request):
+        rate = settings.SERVER_TIMING_SAMPLE_RATE
+        if rate <= 0 or (rate < 1 and random.random() >= rate):
+            return self.get_response(request)
+
+        started = time.perf_counter()
+        with request_timer() as timer:
+            response = self.get_response(request)
+        total = time.perf_counter() - started
+        db, templates = timer.seconds, timer.template_only_seconds
+        app = max(total - db - templates, 0.0)
+
+        user = getattr(request, 'user', None)
+        if settings.SERVER_TIMING_PUBLIC or (user is not None and user.is_staff):
+            response['Server-Timing'] = ', '.join([
+                f'db;dur={db * 1000:.1f};desc="{timer.count} queries"',
+                f'tpl;dur={templates * 1000:.1f}',
+                f'app;dur={app * 1000:.1f}',
+                f'total;dur={total * 1000:.1f}',
+            ])
+        match = request.resolver_match
+        timing_logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            'user': user.pk if user is not None and user.is_authenticated else None,
+            'queries': timer.count,
+            'db_ms': round(db * 1000, 2),
+            'template_ms': round(templates * 1000, 2),
+            'app_ms': round(app * 1000, 2),
+            'total_ms': round(total * 1000, 2),
+        }))
+        return response
+
+
+class NPlusOneMiddleware:
+    """With N_PLUS_ONE_STRICT, fail requests that repeat a query (see core.nplusone)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.N_PLUS_ONE_STRICT:
+            return self.get_response(request)
+        with detect_n_plus_one():
+            return self.get_response(request)
+
+
+class ProfilerMiddleware:
+    """Profile staff requests that ask for it (see core.profiling).
+
+    Requests without the query parameter or header pass straight through;
+    the user is only looked at when one is present.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not wants_profile(request) or not request.user.is_staff or not profile_requested(request):
+            return self.get_response(request)
+        return profile_request(request, self.get_response)
+
+
+class MetricsMiddleware:
+    """Count every request, its latency and its queries for /metrics (core.metrics)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = QueryRecorder()
+        started = time.perf_counter()
+        with connection.execute_wrapper(queries):
+            response = self.get_response(request)
+        match = request.resolver_match
+        metrics.record_request(
+            match.view_name if match else 'unmatched', request.method, response.status_code,
+            time.perf_counter() - started, queries.count, queries.seconds,
+        )
+        metrics.flush()
+        return response
@@ -0,0 +1,51 @@
+# Generated by Django 6.0.3 on 2026-10-17 19:49
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def backfill_progress(apps, schema_editor):
+    Task = apps.get_model("core", "Task")
+    Session = apps.get_model("core", "Session")
+    rollups = (
+        Session.objects.exclude(status__in=["cancelled", "pending"])
+        .values("task_id")
+        .annotate(
+            logged_minutes=Sum("actual_minutes"),
+            quality_sum=Sum("completion_percent"),
+            quality_count=Count("pk", filter=~Q(completion_percent=0)),
+        )
+        .order_by()
+    )
+    for row in rollups:
+        Task.objects.filter(pk=row["task_id"]).update(
+            logged_minutes=row["logged_minutes"] or 0,
+            quality_sum=row["quality_sum"] or 0,
+            quality_count=row["quality_count"],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="task",
+            name="logged_minutes",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="task",
+            name="quality_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="task",
+            name="quality_sum",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_progress, migrations.RunPython.noop),
+    ]
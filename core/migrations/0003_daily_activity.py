@@ -0,0 +1,88 @@
+# Generated by Django 6.0.3 on 2026-10-17 19:54
+
+from zoneinfo import ZoneInfo
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_daily_activity(apps, schema_editor):
+    Session = apps.get_model("core", "Session")
+    DailyActivity = apps.get_model("core", "DailyActivity")
+    rows = (
+        Session.objects.exclude(status__in=["cancelled", "pending"])
+        .annotate(day=TruncDate("planned_start", tzinfo=ZoneInfo(settings.TIME_ZONE)))
+        .values("user_id", "day")
+        .annotate(
+            minutes=Sum("actual_minutes"),
+            sessions=Count("pk"),
+            quality_sum=Sum("completion_percent"),
+            quality_count=Count("pk", filter=~Q(completion_percent=0)),
+        )
+        .order_by()
+    )
+    DailyActivity.objects.bulk_create(
+        [
+            DailyActivity(
+                user_id=row["user_id"],
+                day=row["day"],
+                minutes=row["minutes"] or 0,
+                session_count=row["sessions"],
+                quality_sum=row["quality_sum"] or 0,
+                quality_count=row["quality_count"],
+            )
+            for row in rows
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0002_task_progress_rollup"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyActivity",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                ("minutes", models.IntegerField(default=0)),
+                ("session_count", models.IntegerField(default=0)),
+                ("quality_sum", models.IntegerField(default=0)),
+                ("quality_count", models.IntegerField(default=0)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_activity",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "Daily activity",
+                "ordering": ["day"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("user", "day"), name="unique_daily_activity"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_daily_activity, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 6.0.3 on 2026-10-17 19:59
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0003_daily_activity"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="session",
+            index=models.Index(
+                fields=["user", "planned_start"], name="session_user_start_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="session",
+            index=models.Index(
+                fields=["user", "status", "planned_start"],
+                name="session_user_status_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="session",
+            index=models.Index(
+                fields=["task", "status"], name="session_task_status_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="session",
+            index=models.Index(fields=["created_at"], name="session_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="session",
+            index=models.Index(
+                condition=models.Q(
+                    ("status__in", ["cancelled", "pending"]), _negated=True
+                ),
+                fields=["user", "planned_start"],
+                name="session_valid_user_start_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                fields=["user", "is_active"], name="task_user_active_idx"
+            ),
+        ),
+        # auth_user belongs to django.contrib.auth, so its expression index is
+        # created with raw SQL. register_view looks emails up by UPPER(email).
+        migrations.RunSQL(
+            sql="CREATE INDEX auth_user_email_upper_idx ON auth_user (UPPER(email));",
+            reverse_sql="DROP INDEX auth_user_email_upper_idx;",
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 6.0.3 on 2026-10-17 20:10
+
+from django.db import migrations
+
+CONSTRAINT = "session_no_overlap"
+
+# Non-cancelled sessions of one user whose [start, end) ranges intersect.
+# Bookings made before this constraint were only checked by a read-then-write
+# in the view, so races may have left such pairs behind.
+OVERLAPS = (
+    "SELECT a.id, b.id FROM core_session a "
+    "JOIN core_session b ON a.user_id = b.user_id AND a.id < b.id "
+    "AND a.planned_start < b.planned_end AND b.planned_start < a.planned_end "
+    "WHERE a.status <> 'cancelled' AND b.status <> 'cancelled' "
+    "ORDER BY a.id, b.id"
+)
+
+
+def check_no_overlaps(schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(OVERLAPS)
+        pairs = cursor.fetchall()
+    if pairs:
+        listed = ", ".join(f"{a}/{b}" for a, b in pairs[:50])
+        more = f" and {len(pairs) - 50} more" if len(pairs) > 50 else ""
+        raise RuntimeError(
+            f"Cannot add {CONSTRAINT}: {len(pairs)} pair(s) of overlapping non-cancelled "
+            f"sessions (id/id): {listed}{more}. Cancel one session of each pair, e.g. the "
+            "later duplicate: UPDATE core_session SET status = 'cancelled' WHERE id IN "
+            f"(SELECT DISTINCT b_id FROM ({OVERLAPS.replace('SELECT a.id, b.id', 'SELECT b.id AS b_id')}) "
+            "AS overlaps); then run manage.py rebuild_task_progress and rebuild_daily_activity, "
+            "and migrate again."
+        )
+
+
+def add_overlap_constraint(apps, schema_editor):
+    # Exclusion constraints are PostgreSQL-only; other backends rely on the
+    # schedule lock taken by the booking views (core.models.schedule_lock).
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    check_no_overlaps(schema_editor)
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    schema_editor.execute(
+        f"ALTER TABLE core_session ADD CONSTRAINT {CONSTRAINT} "
+        "EXCLUDE USING gist ("
+        "user_id WITH =, tstzrange(planned_start, planned_end, '[)') WITH &&"
+        ") WHERE (status <> 'cancelled')"
+    )
+
+
+def remove_overlap_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        f"ALTER TABLE core_session DROP CONSTRAINT IF EXISTS {CONSTRAINT}"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0004_hot_query_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(add_overlap_constraint, remove_overlap_constraint),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 6.0.3 on 2026-10-17 20:31
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0005_session_no_overlap"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="session",
+            name="status_rank",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=models.Case(
+                    models.When(status="in_progress", then=models.Value(3)),
+                    models.When(status="pending", then=models.Value(2)),
+                    models.When(status="completed", then=models.Value(1)),
+                    models.When(status="cancelled", then=models.Value(0)),
+                    default=models.Value(0),
+                ),
+                output_field=models.SmallIntegerField(),
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="session",
+            index=models.Index(
+                fields=["user", "status_rank", "planned_start", "id"],
+                name="session_user_rank_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="session",
+            index=models.Index(
+                fields=["planned_start", "id"], name="session_start_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="session",
+            index=models.Index(
+                fields=["status", "planned_start", "id"],
+                name="session_status_start_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(fields=["created_at", "id"], name="task_created_idx"),
+        ),
+    ]
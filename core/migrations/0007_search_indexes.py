@@ -0,0 +1,57 @@
+# Generated by Django 6.0.3 on 2026-10-17 20:52
+
+from django.db import migrations
+
+# (table, column) pairs searched by core.search.
+SEARCHED = [
+    ("auth_user", "username"),
+    ("core_task", "title"),
+    ("core_session", "notes"),
+]
+
+# FTS5 shadow tables on SQLite, in the same order as SEARCHED.
+FTS_TABLES = ["core_search_user", "core_search_task", "core_search_session"]
+
+
+def create_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        # icontains compiles to UPPER(col::text) LIKE UPPER(%s), so the
+        # trigram index is built on that expression.
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for table, column in SEARCHED:
+            schema_editor.execute(
+                f"CREATE INDEX {table}_{column}_trgm_idx ON {table} "
+                f"USING gin ((UPPER({column}::text)) gin_trgm_ops)"
+            )
+    elif vendor == "sqlite":
+        for (table, column), fts_table in zip(SEARCHED, FTS_TABLES):
+            schema_editor.execute(
+                f"CREATE VIRTUAL TABLE {fts_table} USING fts5(body, tokenize='trigram')"
+            )
+            schema_editor.execute(
+                f"INSERT INTO {fts_table} (rowid, body) "
+                f"SELECT id, {column} FROM {table} WHERE {column} <> ''"
+            )
+
+
+def drop_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        for table, column in SEARCHED:
+            schema_editor.execute(f"DROP INDEX IF EXISTS {table}_{column}_trgm_idx")
+    elif vendor == "sqlite":
+        for fts_table in FTS_TABLES:
+            schema_editor.execute(f"DROP TABLE IF EXISTS {fts_table}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0006_session_list_keyset"),
+        ("auth", "0012_alter_user_first_name_max_length"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
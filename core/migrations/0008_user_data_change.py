@@ -0,0 +1,48 @@
+# Generated by Django 6.0.3 on 2026-10-17 21:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_data_change(apps, schema_editor):
+    # Existing users get "now", so no client holds a validator newer than it.
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split("."))
+    UserDataChange = apps.get_model("core", "UserDataChange")
+    now = timezone.now()
+    UserDataChange.objects.bulk_create(
+        [
+            UserDataChange(user_id=pk, changed_at=now)
+            for pk in User.objects.values_list("pk", flat=True)
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0007_search_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UserDataChange",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="data_change",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ("changed_at", models.DateTimeField()),
+            ],
+        ),
+        migrations.RunPython(backfill_data_change, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,29 @@
-from django.db import models
+import heapq
+from bisect import bisect_right
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import partial
+from datetime import datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, models, transaction
 from django.contrib.auth.models import User
-from django.db.models import Sum, Avg
+from django.db.models import Case, Count, F, Prefetch, Q, Sum, Value, When
+from django.db.models.functions import Now, TruncDate
 from django.utils import timezone
 
+from . import metrics
+from .cache import PENDING_STARTS_KEY, invalidate_admin_snapshot
+from .nplusone import allow_repeated_queries
+
+
+def local_timezone():
+    """Timezone used to bucket sessions into days."""
+    return ZoneInfo(settings.TIME_ZONE)
+
 
 class Category(models.Model):
     name = models.CharField(max_length=128, unique=True)
@@ -16,6 +37,48 @@ class Category(models.Model):
         verbose_name_plural = 'Categories'
 
 
+INVALID_SESSION_STATUSES = ['cancelled', 'pending']
+
+
+def effective_status_q(status):
+    """Q matching sessions whose effective status (Session.effective_status) is `status`.
+
+    This is CASE WHEN status = 'pending' AND planned_start <= now() THEN
+    'in_progress' ELSE status END = `status`, expanded so the status and
+    planned_start indexes still apply.
+    """
+    if status == 'in_progress':
+        return Q(status='in_progress') | Q(status='pending', planned_start__lte=Now())
+    if status == 'pending':
+        return Q(status='pending', planned_start__gt=Now())
+    return Q(status=status)
+
+class TaskQuerySet(models.QuerySet):
+
+    def with_progress(self):
+        """Prefetch the sessions behind each task's recent streak, one query in all.
+
+        Minutes and quality come from the rollup columns on Task, so only
+        recent_streak() needs batching to avoid querying per row.
+        """
+        from .streaks import task_streak_sessions
+        return self.prefetch_related(
+            Prefetch('sessions', queryset=task_streak_sessions(), to_attr='streak_sessions')
+        )
+
+    def add_progress(self, minutes=0, quality_sum=0, quality_count=0):
+        """Atomically shift the progress rollup columns by the given deltas."""
+        return self.update(
+            logged_minutes=F('logged_minutes') + minutes,
+            quality_sum=F('quality_sum') + quality_sum,
+            quality_count=F('quality_count') + quality_count,
+        )
+
+
+# Task columns maintained from its sessions; Task.save() leaves them alone.
+TASK_ROLLUP_FIELDS = ('logged_minutes', 'quality_sum', 'quality_count')
+
+
 class Task(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='tasks')
     category = models.ForeignKey(
@@ -27,14 +90,37 @@ class Task(models.Model):
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Rollup of valid (not cancelled/pending) sessions, maintained by Session.save()
+    # and Session.delete(). Rebuild with `manage.py rebuild_task_progress`.
+    logged_minutes = models.IntegerField(default=0)
+    quality_sum = models.IntegerField(default=0)
+    quality_count = models.IntegerField(default=0)
+
+    objects = TaskQuerySet.as_manager()
+
     def __str__(self):
         return self.title
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'is_active'], name='task_user_active_idx'),
+            models.Index(fields=['created_at', 'id'], name='task_created_idx'),
+        ]
+
+    def save(self, *args, update_fields=None, **kwargs):
+        # Sessions shift the rollup columns in SQL (add_progress), so an update
+        # from a form or the API writes everything but them: the instance's
+        # copies may be stale. Pass update_fields to write them on purpose.
+        if update_fields is None and not self._state.adding and not kwargs.get('force_insert'):
+            update_fields = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in TASK_ROLLUP_FIELDS
+            ]
+        super().save(*args, update_fields=update_fields, **kwargs)
+
     def total_actual_minutes(self):
-        """Calculate total session duration excluding cancelled and pending sessions."""
-        return self.sessions.exclude(
-            status__in=['cancelled', 'pending']
-        ).aggregate(total=Sum('actual_minutes'))['total'] or 0
+        """Return total session duration excluding cancelled and pending sessions."""
+        return self.logged_minutes
 
     def progress_percent(self):
         """Calculate task progress based on time, capped at 100%."""
@@ -48,41 +134,213 @@ class Task(models.Model):
         return extra if extra > 0 else 0
 
     def average_quality(self):
-        """Calculate average completion quality of valid sessions."""
-        result = self.sessions.exclude(
-            status__in=['cancelled', 'pending']
-        ).exclude(
-            completion_percent=0
-        ).aggregate(avg=Avg('completion_percent'))['avg']
-        return round(result) if result else 0
+        """Return average completion quality of valid sessions."""
+        if not self.quality_count:
+            return 0
+        return round(self.quality_sum / self.quality_count)
 
     def recent_streak(self):
-        """Calculate consecutive active days within the last 7 days."""
-        now = timezone.now()
-        streak = 0
-        for i in range(7):
-            day_start = (now - timezone.timedelta(days=i)).replace(
-                hour=0, minute=0, second=0, microsecond=0
-            )
-            day_end = (now - timezone.timedelta(days=i)).replace(
-                hour=23, minute=59, second=59, microsecond=999999
-            )
-            has_session = self.sessions.exclude(
-                status__in=['cancelled', 'pending']
-            ).filter(
-                planned_start__gte=day_start,
-                planned_start__lte=day_end,
-            ).exists()
-            if has_session:
-                streak += 1
-            else:
-                break
-        return streak
+        """Return consecutive active local days within the last 7 days."""
+        from .streaks import TASK_STREAK_DAYS, current_streak, local_today, task_streaks
+        if hasattr(self, 'streak_sessions'):
+            days = {session.day for session in self.streak_sessions}
+            return current_streak(days, local_today(), TASK_STREAK_DAYS)
+        return task_streaks(self.sessions.all()).get(self.pk, 0)
 
     def is_completed(self):
         return self.progress_percent() >= 100
 
 
+ROLLUP_FIELDS = ('task_id', 'user_id', 'planned_start', 'status', 'actual_minutes', 'completion_percent')
+
+
+def session_contribution(status, actual_minutes, completion_percent):
+    """Return what a session with these values adds to its task's progress rollup."""
+    if status in INVALID_SESSION_STATUSES:
+        return 0, 0, 0
+    return actual_minutes, completion_percent, 1 if completion_percent else 0
+
+
+def rollup_deltas(changes):
+    """Net rollup changes for an iterable of (session field values, sign) pairs.
+
+    Returns {task_id: (minutes, quality sum, quality count)} and
+    {(user_id, local day): (minutes, sessions, quality sum, quality count)},
+    leaving out keys whose changes cancel out.
+    """
+    tasks = defaultdict(lambda: [0, 0, 0])
+    days = defaultdict(lambda: [0, 0, 0, 0])
+    for row, sign in changes:
+        if row['status'] in INVALID_SESSION_STATUSES:
+            continue
+        minutes, quality_sum, quality_count = session_contribution(
+            row['status'], row['actual_minutes'], row['completion_percent']
+        )
+        day = timezone.localtime(row['planned_start'], local_timezone()).date()
+        for totals, values in (
+            (tasks[row['task_id']], (minutes, quality_sum, quality_count)),
+            (days[row['user_id'], day], (minutes, 1, quality_sum, quality_count)),
+        ):
+            for i, value in enumerate(values):
+                totals[i] += sign * value
+    return (
+        {key: tuple(v) for key, v in tasks.items() if any(v)},
+        {key: tuple(v) for key, v in days.items() if any(v)},
+    )
+
+
+def count_status_changes(status, sessions=1):
+    """Count sessions entering `status` in /metrics once the transaction commits."""
+    transaction.on_commit(
+        partial(metrics.inc, 'trackit_session_status_changes_total', sessions, status=status)
+    )
+
+
+def apply_rollup_deltas(task_deltas, day_deltas):
+    """Shift the Task and DailyActivity rollups; call inside a transaction."""
+    # One write per distinct task and day is inherent here, not an N+1.
+    with allow_repeated_queries():
+        for task_id, delta in task_deltas.items():
+            Task.objects.filter(pk=task_id).add_progress(*delta)
+        for (user_id, day), delta in day_deltas.items():
+            DailyActivity.objects.add_activity(user_id, day, *delta)
+
+
+class SessionQuerySet(models.QuerySet):
+
+    def start_due(self, now=None):
+        """Flip pending sessions whose start has passed to in_progress.
+
+        Sessions become valid for progress once started, so the rollups are
+        shifted by their contribution in the same transaction.
+        """
+        now = now or timezone.now()
+        with transaction.atomic():
+            rows = list(self.filter(
+                status='pending', planned_start__lte=now
+            ).select_for_update().values('pk', *ROLLUP_FIELDS))
+            if not rows:
+                return 0
+            apply_rollup_deltas(*rollup_deltas(
+                [(row, -1) for row in rows]
+                + [({**row, 'status': 'in_progress'}, 1) for row in rows]
+            ))
+            invalidate_admin_snapshot()
+            note_user_data_change(*{row['user_id'] for row in rows})
+            count_status_changes('in_progress', len(rows))
+            return Session.objects.filter(
+                pk__in=[row['pk'] for row in rows]
+            ).update(status='in_progress')
+
+    def with_status(self, status):
+        """Filter on effective status; see effective_status_q()."""
+        return self.filter(effective_status_q(status))
+
+    def with_effective_rank(self):
+        """Annotate effective_rank: status_rank as of now, for ordering the session list.
+
+        A pending session whose start has passed ranks with the in-progress
+        ones before the start_due_sessions sweep has stored its new status.
+        """
+        return self.annotate(effective_rank=Case(
+            When(status='pending', planned_start__lte=Now(), then=Value(STATUS_RANKS['in_progress'])),
+            default=F('status_rank'),
+            output_field=models.SmallIntegerField(),
+        ))
+
+    def delete(self):
+        with transaction.atomic():
+            rows = self.select_for_update().values(*ROLLUP_FIELDS)
+            apply_rollup_deltas(*rollup_deltas((row, -1) for row in rows))
+            invalidate_admin_snapshot()
+            return super().delete()
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+    def conflicting_slots(self, slots):
+        """Return the (start, end) slots overlapping a non-cancelled session here.
+
+        One range query covers the span of all slots; overlaps are then found
+        with an in-memory sweep over both start-ordered lists.
+        """
+        if not slots:
+            return []
+        slots = sorted(slots)
+        booked = list(self.exclude(status='cancelled').filter(
+            planned_start__lt=max(end for _, end in slots),
+            planned_end__gt=slots[0][0],
+        ).order_by('planned_start').values_list('planned_start', 'planned_end'))
+        conflicts = []
+        open_ends = []
+        i = 0
+        for start, end in slots:
+            while i < len(booked) and booked[i][0] < end:
+                heapq.heappush(open_ends, booked[i][1])
+                i += 1
+            while open_ends and open_ends[0] <= start:
+                heapq.heappop(open_ends)
+            if open_ends:
+                conflicts.append((start, end))
+        return conflicts
+
+    def minutes_by_category(self, start=None, end=None):
+        """Return [(category name, minutes)] for valid sessions, uncategorised last.
+
+        `start` and `end` optionally bound planned_start to whole local days.
+        """
+        sessions = self.exclude(status__in=INVALID_SESSION_STATUSES)
+        if start:
+            sessions = sessions.filter(
+                planned_start__gte=datetime.combine(start, time.min, tzinfo=local_timezone())
+            )
+        if end:
+            sessions = sessions.filter(
+                planned_start__lt=datetime.combine(end + timedelta(days=1), time.min, tzinfo=local_timezone())
+            )
+        rows = sessions.values('task__category_id', 'task__category__name').annotate(
+            minutes=Sum('actual_minutes')
+        ).filter(minutes__gt=0).order_by(F('task__category_id').asc(nulls_last=True))
+        return [
+            (row['task__category__name'] or 'Uncategorised', row['minutes'])
+            for row in rows
+        ]
+
+    def progress_rollups(self):
+        """Aggregate task rollup values from the raw rows, keyed by task id."""
+        rows = self.exclude(status__in=INVALID_SESSION_STATUSES).values('task_id').annotate(
+            minutes=Sum('actual_minutes'),
+            quality_sum=Sum('completion_percent'),
+            quality_count=Count('pk', filter=~Q(completion_percent=0)),
+        ).order_by()
+        return {
+            row['task_id']: (row['minutes'] or 0, row['quality_sum'] or 0, row['quality_count'])
+            for row in rows
+        }
+
+    def daily_rollups(self):
+        """Aggregate DailyActivity values from the raw rows, keyed by (user id, local day)."""
+        rows = self.exclude(status__in=INVALID_SESSION_STATUSES).annotate(
+            day=TruncDate('planned_start', tzinfo=local_timezone())
+        ).values('user_id', 'day').annotate(
+            minutes=Sum('actual_minutes'),
+            sessions=Count('pk'),
+            quality_sum=Sum('completion_percent'),
+            quality_count=Count('pk', filter=~Q(completion_percent=0)),
+        ).order_by()
+        return {
+            (row['user_id'], row['day']): (
+                row['minutes'] or 0, row['sessions'],
+                row['quality_sum'] or 0, row['quality_count'],
+            )
+            for row in rows
+        }
+
+
+# Higher ranks list first; see Session.status_rank.
+STATUS_RANKS = {'in_progress': 3, 'pending': 2, 'completed': 1, 'cancelled': 0}
+
+
 class Session(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
@@ -100,6 +358,71 @@ class Session(models.Model):
     status = models.CharField(max_length=32, choices=STATUS_CHOICES, default='pending')
     notes = models.CharField(max_length=256, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Stored sort key for the session list (in progress, pending, completed,
+    # cancelled), so the list can be ordered and paged from an index.
+    status_rank = models.GeneratedField(
+        expression=Case(
+            *[When(status=status, then=Value(rank)) for status, rank in STATUS_RANKS.items()],
+            default=Value(0),
+        ),
+        output_field=models.SmallIntegerField(),
+        db_persist=True,
+    )
+
+    objects = SessionQuerySet.as_manager()
+
+    def progress_contribution(self):
+        """Return this session's (minutes, quality sum, quality count) towards its task."""
+        return session_contribution(self.status, self.actual_minutes, self.completion_percent)
+
+    def _stored_rollup_row(self):
+        """Lock the stored row and return the fields the rollups depend on."""
+        if self._state.adding or self.pk is None:
+            return None
+        return Session.objects.select_for_update().filter(pk=self.pk).values(*ROLLUP_FIELDS).first()
+
+    def _apply_rollups(self, changes):
+        task_deltas, day_deltas = rollup_deltas(changes)
+        apply_rollup_deltas(task_deltas, day_deltas)
+        # Keep an already-loaded task instance consistent with the row.
+        if Session.task.is_cached(self) and self.task.pk in task_deltas:
+            minutes, quality_sum, quality_count = task_deltas[self.task.pk]
+            self.task.logged_minutes += minutes
+            self.task.quality_sum += quality_sum
+            self.task.quality_count += quality_count
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            old = self._stored_rollup_row()
+            super().save(*args, **kwargs)
+            changes = [({field: getattr(self, field) for field in ROLLUP_FIELDS}, 1)]
+            if old is not None:
+                changes.append((old, -1))
+            self._apply_rollups(changes)
+            if old is None or old['status'] != self.status:
+                count_status_changes(self.status)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            old = self._stored_rollup_row()
+            result = super().delete(*args, **kwargs)
+            if old is not None:
+                self._apply_rollups([(old, -1)])
+        return result
+
+    @property
+    def effective_status(self):
+        """Status as of now: a pending session whose start has passed is in progress.
+
+        The stored status catches up when the start_due_sessions sweeper
+        runs; pages derive it at read time until then.
+        """
+        if self.status == 'pending' and self.planned_start <= timezone.now():
+            return 'in_progress'
+        return self.status
+
+    def get_effective_status_display(self):
+        return dict(self.STATUS_CHOICES)[self.effective_status]
 
     def planned_minutes(self):
         """Calculate planned duration in minutes."""
@@ -109,4 +432,199 @@ class Session(models.Model):
         return f"{self.task.title} — {self.planned_start.strftime('%Y-%m-%d %H:%M')}"
 
     class Meta:
-        ordering = ['planned_start']
\ No newline at end of file
+        ordering = ['planned_start']
+        indexes = [
+            models.Index(fields=['user', 'planned_start'], name='session_user_start_idx'),
+            models.Index(fields=['user', 'status', 'planned_start'], name='session_user_status_idx'),
+            models.Index(fields=['task', 'status'], name='session_task_status_idx'),
+            models.Index(fields=['created_at'], name='session_created_idx'),
+            models.Index(fields=['user', 'status_rank', 'planned_start', 'id'], name='session_user_rank_idx'),
+            models.Index(fields=['planned_start', 'id'], name='session_start_idx'),
+            models.Index(fields=['status', 'planned_start', 'id'], name='session_status_start_idx'),
+            # Streaks and progress only ever read started, non-cancelled sessions.
+            models.Index(
+                fields=['user', 'planned_start'],
+                condition=~Q(status__in=INVALID_SESSION_STATUSES),
+                name='session_valid_user_start_idx',
+            ),
+        ]
+
+
+# PostgreSQL exclusion constraint (migration 0005) rejecting overlapping
+# non-cancelled sessions for the same user.
+SESSION_OVERLAP_CONSTRAINT = 'session_no_overlap'
+
+_schedule_lock = threading.Lock()
+
+
+@contextmanager
+def schedule_lock(user_id):
+    """Run a conflict check and the session write that follows as one unit.
+
+    On PostgreSQL the exclusion constraint makes overlapping writes fail, so
+    only a transaction is needed. Other backends serialise bookings instead:
+    a row lock on the user where supported, otherwise (SQLite) an in-process
+    lock plus an early write that takes SQLite's database write lock.
+    """
+    if connection.vendor == 'postgresql':
+        with transaction.atomic():
+            yield
+    elif connection.features.has_select_for_update:
+        with transaction.atomic():
+            list(User.objects.select_for_update().filter(pk=user_id).values_list('pk'))
+            yield
+    else:
+        with _schedule_lock, transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(f'UPDATE {Session._meta.db_table} SET id = id WHERE 0 = 1')
+            yield
+
+
+def is_overlap_violation(error):
+    """Whether an IntegrityError came from the session overlap constraint."""
+    diag = getattr(error.__cause__, 'diag', None)
+    return (
+        getattr(diag, 'constraint_name', None) == SESSION_OVERLAP_CONSTRAINT
+        or SESSION_OVERLAP_CONSTRAINT in str(error)
+    )
+
+
+class DailyActivityManager(models.Manager):
+
+    def add_activity(self, user_id, day, minutes=0, sessions=0, quality_sum=0, quality_count=0):
+        """Shift a user's totals for one local day, creating the row if needed."""
+        rows = self.filter(user_id=user_id, day=day)
+        changes = {
+            'minutes': F('minutes') + minutes,
+            'session_count': F('session_count') + sessions,
+            'quality_sum': F('quality_sum') + quality_sum,
+            'quality_count': F('quality_count') + quality_count,
+        }
+        if rows.update(**changes):
+            return
+        _, created = self.get_or_create(user_id=user_id, day=day, defaults={
+            'minutes': minutes,
+            'session_count': sessions,
+            'quality_sum': quality_sum,
+            'quality_count': quality_count,
+        })
+        if not created:
+            rows.update(**changes)
+
+
+class DailyActivity(models.Model):
+    """Per-user totals of valid sessions for one local day (settings.TIME_ZONE).
+
+    Maintained alongside the Task rollup by Session writes, so per-day views
+    cost one row per day displayed instead of a scan of the session history.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_activity')
+    day = models.DateField()
+    minutes = models.IntegerField(default=0)
+    session_count = models.IntegerField(default=0)
+    quality_sum = models.IntegerField(default=0)
+    quality_count = models.IntegerField(default=0)
+
+    objects = DailyActivityManager()
+
+    def __str__(self):
+        return f"{self.user} — {self.day}"
+
+    class Meta:
+        ordering = ['day']
+        verbose_name_plural = 'Daily activity'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'day'], name='unique_daily_activity'),
+        ]
+
+
+class UserDataChangeManager(models.Manager):
+
+    def touch(self, *user_ids, create=True):
+        """Record that these users' sessions or tasks changed just now.
+
+        With create=False only existing rows are updated, which is what a
+        delete cascading from the user itself needs.
+        """
+        now = timezone.now()
+        if not create:
+            self.filter(user_id__in=user_ids).update(changed_at=now)
+            return
+        self.bulk_create(
+            [UserDataChange(user_id=pk, changed_at=now) for pk in set(user_ids)],
+            update_conflicts=True, unique_fields=['user'], update_fields=['changed_at'],
+        )
+
+    def changed_at(self, user):
+        """When the user's data last changed; their join date if never recorded."""
+        stamp = self.filter(user=user).values_list('changed_at', flat=True).first()
+        return stamp or user.date_joined
+
+
+class UserDataChange(models.Model):
+    """When a user's sessions or tasks last changed, for conditional GETs.
+
+    Kept in the database rather than the cache so every worker agrees on it.
+    """
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True, related_name='data_change',
+    )
+    changed_at = models.DateTimeField()
+
+    objects = UserDataChangeManager()
+
+    def __str__(self):
+        return f"{self.user} — {self.changed_at}"
+
+
+def note_user_data_change(*user_ids, create=True):
+    """Mark the users' data as changed for both the page cache and conditional GETs."""
+    UserDataChange.objects.touch(*user_ids, create=create)
+
+
+def started_pending_count(user, changed_at):
+    """How many of the user's still-pending sessions have reached their start.
+
+    Effective status turns each of these in_progress as the clock passes
+    its start, so pages showing the sessions must be revalidated and rebuilt
+    whenever this grows. The pending start times are cached under the user's
+    last data change (`changed_at`), so between writes this is a cache read
+    and nothing is written on the request path.
+    """
+    key = PENDING_STARTS_KEY.format(user.pk, changed_at.timestamp())
+    starts = cache.get(key)
+    if starts is None:
+        starts = [
+            start.timestamp() for start in Session.objects.filter(user=user, status='pending').order_by(
+                'planned_start'
+            ).values_list('planned_start', flat=True)
+        ]
+        cache.set(key, starts, settings.USER_PAGE_CACHE_SECONDS)
+    return bisect_right(starts, timezone.now().timestamp())
+
+
+class RequestProfile(models.Model):
+    """A profiled staff request (?_profile=1 or an X-Profile header).
+
+    Written by core.middleware.ProfilerMiddleware; only the newest
+    PROFILE_KEEP rows are kept.
+    """
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+    method = models.CharField(max_length=8)
+    path = models.CharField(max_length=512)
+    view_name = models.CharField(max_length=128, blank=True)
+    status = models.IntegerField()
+    duration_ms = models.FloatField()
+    query_count = models.IntegerField()
+    db_ms = models.FloatField()
+    # [{function, location, calls, primitive_calls, total_ms, cumulative_ms}]
+    functions = models.JSONField(default=list)
+    # [{sql, params, ms, frame}] in execution order
+    queries = models.JSONField(default=list)
+
+    def __str__(self):
+        return f"{self.method} {self.path} — {self.duration_ms:.0f} ms"
+
+    class Meta:
+        ordering = ['-created_at', '-id']
@@ -0,0 +1,87 @@
+"""Strict N+1 detection: fail a request that keeps running the same SELECT.
+
+With N_PLUS_ONE_STRICT on (always under the test runner, optionally in
+DEBUG), NPlusOneMiddleware fingerprints every SELECT a request issues. When
+one query shape runs N_PLUS_ONE_THRESHOLD times, NPlusOneError is raised
+from that query, naming the view, the core/ call sites and the template
+line being rendered. That is the shape of a lazy relation read per row
+(`{{ u.sessions.count }}`, `self.task.title` in __str__) or a per-row
+method that queries. Wrap code that repeats a query on purpose in
+allow_repeated_queries().
+"""
+import sys
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connection
+from django.template.base import Node
+
+from .instrumentation import current_view
+from .slow_queries import call_sites, normalize
+
+_allowed = ContextVar('trackit_repeated_queries_allowed', default=False)
+
+
+class NPlusOneError(Exception):
+    pass
+
+
+@contextmanager
+def allow_repeated_queries():
+    """Don't count queries run inside the block."""
+    token = _allowed.set(True)
+    try:
+        yield
+    finally:
+        _allowed.reset(token)
+
+
+def template_location():
+    """'<template>:<line>' of the innermost template node being rendered, if any."""
+    frame = sys._getframe(1)
+    while frame is not None:
+        node = frame.f_locals.get('self')
+        if isinstance(node, Node) and getattr(node, 'token', None) is not None:
+            origin = getattr(node, 'origin', None)
+            name = getattr(origin, 'template_name', None) or getattr(origin, 'name', '?')
+            return f'{name}:{node.token.lineno}'
+        frame = frame.f_back
+    return None
+
+
+class RepeatedQueryDetector:
+    """connection.execute_wrapper raising on the threshold-th run of one SELECT shape."""
+
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self.counts = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        if not _allowed.get() and sql.lstrip()[:6].upper() == 'SELECT':
+            query = normalize(sql)
+            self.counts[query] += 1
+            if self.counts[query] == self.threshold:
+                raise NPlusOneError(self.describe(query))
+        return execute(sql, params, many, context)
+
+    def describe(self, query):
+        lines = [
+            f'Possible N+1: the same query ran {self.threshold} times in '
+            f'{current_view.get() or "one block"}.',
+            f'  query: {query[:500]}',
+        ]
+        template = template_location()
+        if template:
+            lines.append(f'  template: {template}')
+        lines += [f'  at {site}' for site in call_sites()]
+        return '\n'.join(lines)
+
+
+@contextmanager
+def detect_n_plus_one(threshold=None):
+    """Raise NPlusOneError if a SELECT shape repeats `threshold` times in the block."""
+    detector = RepeatedQueryDetector(threshold or settings.N_PLUS_ONE_THRESHOLD)
+    with connection.execute_wrapper(detector):
+        yield detector
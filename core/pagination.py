@@ -0,0 +1,161 @@
+"""Keyset (cursor) pagination.
+
+Pages are addressed by the ordering values of a boundary row instead of an
+OFFSET, so every page costs the same index range scan no matter how deep it
+is. Totals are optional and can come from planner estimates on PostgreSQL,
+since an exact COUNT(*) over a filtered table is often the slowest query on
+the page.
+"""
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import Q
+
+# Estimates below this are cheap to replace with an exact count.
+EXACT_COUNT_BELOW = 10000
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(*values):
+    # isoformat() keeps full microsecond precision; DjangoJSONEncoder
+    # truncates to milliseconds, which would repeat rows across pages.
+    values = [v.isoformat() if hasattr(v, 'isoformat') else v for v in values]
+    raw = json.dumps(values)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, length):
+    """Decode a cursor into its values; raises InvalidCursor if it is malformed."""
+    padded = cursor + '=' * (-len(cursor) % 4)
+    try:
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except ValueError as e:
+        raise InvalidCursor('Invalid cursor.') from e
+    if not isinstance(values, list) or len(values) != length:
+        raise InvalidCursor('Invalid cursor.')
+    return values
+
+
+def estimated_count(queryset):
+    """Return the planner's row estimate for a queryset on PostgreSQL.
+
+    Small estimates (and other backends) fall back to an exact COUNT.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+    sql, params = queryset.order_by().values('pk').query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    estimate = int(plan[0]['Plan']['Plan Rows'])
+    if estimate < EXACT_COUNT_BELOW:
+        return queryset.count()
+    return estimate
+
+
+class KeysetPage:
+    def __init__(self, object_list, next_cursor, previous_cursor, count=None, estimated=False):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.count = count
+        self.estimated = estimated
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """Page a queryset by cursor over `ordering`.
+
+    `ordering` must end with a unique field (normally 'id' or '-id'), and all
+    fields should share one direction so a single index can serve the scan
+    in either direction. `count` is 'exact', 'estimate' or None.
+    """
+
+    def __init__(self, queryset, ordering, per_page, count='exact'):
+        self.queryset = queryset
+        self.ordering = list(ordering)
+        self.per_page = per_page
+        self.count = count
+        self.fields = [name.lstrip('-') for name in self.ordering]
+
+    def _key(self, obj):
+        return encode_cursor(*(getattr(obj, field) for field in self.fields))
+
+    def _seek(self, values, forward):
+        """Filter for rows strictly after (or before) the cursor values."""
+        seek = Q()
+        for i, name in enumerate(self.ordering):
+            descending = name.startswith('-')
+            lookup = 'lt' if descending == forward else 'gt'
+            tie = Q(**dict(zip(self.fields[:i], values[:i])))
+            seek |= tie & Q(**{f'{self.fields[i]}__{lookup}': values[i]})
+        # Redundant bound on the leading column gives the planner an index range.
+        leading = 'lte' if self.ordering[0].startswith('-') == forward else 'gte'
+        return Q(**{f'{self.fields[0]}__{leading}': values[0]}) & seek
+
+    def _total(self):
+        if self.count == 'estimate':
+            count = estimated_count(self.queryset)
+            vendor = connections[self.queryset.db].vendor
+            return count, vendor == 'postgresql' and count >= EXACT_COUNT_BELOW
+        if self.count == 'exact':
+            return self.queryset.count(), False
+        return None, False
+
+    def page(self, after=None, before=None):
+        """Return the page after (or before) a cursor; raises InvalidCursor."""
+        forward = not before
+        cursor = after if forward else before
+        ordering = self.ordering
+        if not forward:
+            ordering = [name[1:] if name.startswith('-') else f'-{name}' for name in ordering]
+        try:
+            queryset = self.queryset
+            if cursor:
+                queryset = queryset.filter(self._seek(decode_cursor(cursor, len(self.fields)), forward))
+            rows = list(queryset.order_by(*ordering)[:self.per_page + 1])
+        except (ValidationError, TypeError, ValueError) as e:
+            raise InvalidCursor('Invalid cursor.') from e
+        more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if not forward:
+            rows.reverse()
+        has_next = more if forward else True
+        has_previous = bool(cursor) if forward else more
+        count, estimated = self._total()
+        return KeysetPage(
+            rows,
+            next_cursor=self._key(rows[-1]) if rows and has_next else None,
+            previous_cursor=self._key(rows[0]) if rows and has_previous else None,
+            count=count,
+            estimated=estimated,
+        )
+
+    def get_page(self, after=None, before=None):
+        """Like page(), but falls back to the first page on a bad cursor."""
+        try:
+            return self.page(after, before)
+        except InvalidCursor:
+            return self.page()
@@ -0,0 +1,126 @@
+"""cProfile a single staff request and keep the result in RequestProfile.
+
+Staff add ?_profile=1 (or an X-Profile: 1 header) to any URL; the response
+carries an X-Profile-URL header pointing at the stored profile.
+"""
+import cProfile
+import os
+import pstats
+import sys
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.urls import reverse
+
+from .models import RequestProfile
+from .slow_queries import call_sites
+
+PROFILE_PARAM = '_profile'
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+TOP_FUNCTIONS = 100
+MAX_QUERIES = 500
+
+
+def wants_profile(request):
+    """Cheap pre-check on the raw request; profile_requested() confirms it."""
+    return PROFILE_PARAM in request.META.get('QUERY_STRING', '') or PROFILE_HEADER in request.META
+
+
+def profile_requested(request):
+    """Whether ?_profile= or X-Profile is actually set to something other than 0."""
+    return any(
+        value not in (None, '', '0')
+        for value in (request.GET.get(PROFILE_PARAM), request.META.get(PROFILE_HEADER))
+    )
+
+
+class QueryLog:
+    """connection.execute_wrapper keeping each query's SQL, time and call site."""
+
+    def __init__(self):
+        self.queries = []
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.seconds += elapsed
+            if len(self.queries) < MAX_QUERIES:
+                sites = call_sites(limit=1)
+                self.queries.append({
+                    'sql': sql,
+                    'params': repr(params)[:500],
+                    'ms': round(elapsed * 1000, 3),
+                    'frame': sites[0] if sites else None,
+                })
+
+
+def _location(filename, line):
+    # Longest sys.path prefix first, so core/views.py rather than the full path.
+    for prefix in sorted((p for p in sys.path if p), key=len, reverse=True):
+        if filename.startswith(prefix + os.sep):
+            filename = filename[len(prefix) + 1:]
+            break
+    return f'{filename}:{line}' if line else filename
+
+
+def summarize(profiler):
+    """Top functions by cumulative and by own time, as JSON-ready dicts."""
+    rows = [
+        {
+            'function': function,
+            'location': _location(filename, line),
+            'calls': calls,
+            'primitive_calls': primitive,
+            'total_ms': round(total * 1000, 3),
+            'cumulative_ms': round(cumulative * 1000, 3),
+        }
+        for (filename, line, function), (primitive, calls, total, cumulative, _) in
+        pstats.Stats(profiler).stats.items()
+    ]
+    top = {}
+    for key in ('cumulative_ms', 'total_ms'):
+        for row in sorted(rows, key=lambda row: row[key], reverse=True)[:TOP_FUNCTIONS]:
+            top[row['location'], row['function']] = row
+    return sorted(top.values(), key=lambda row: row['cumulative_ms'], reverse=True)
+
+
+def profile_request(request, get_response):
+    profiler = cProfile.Profile()
+    queries = QueryLog()
+    started = time.perf_counter()
+    with connection.execute_wrapper(queries):
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler (a debugger, coverage) is already active.
+            return get_response(request)
+        try:
+            response = get_response(request)
+        finally:
+            profiler.disable()
+    duration = time.perf_counter() - started
+
+    match = request.resolver_match
+    profile = RequestProfile.objects.create(
+        user=request.user,
+        method=request.method,
+        path=request.get_full_path()[:512],
+        view_name=match.view_name if match else '',
+        status=response.status_code,
+        duration_ms=round(duration * 1000, 3),
+        query_count=queries.count,
+        db_ms=round(queries.seconds * 1000, 3),
+        functions=summarize(profiler),
+        queries=queries.queries,
+    )
+    stale = RequestProfile.objects.values_list('pk', flat=True)[settings.PROFILE_KEEP:]
+    RequestProfile.objects.filter(pk__in=list(stale)).delete()
+    response['X-Profile-URL'] = reverse('admin_profile_detail', args=[profile.pk])
+    return response
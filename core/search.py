@@ -0,0 +1,110 @@
+"""Substring search over usernames, task titles and session notes.
+
+PostgreSQL serves icontains from pg_trgm GIN indexes (migration 0007) and
+ranks by trigram word similarity. SQLite keeps one FTS5 shadow table per
+kind, with the trigram tokenizer and rowid = object pk, in sync through
+signals (core.signals). Terms shorter than a trigram can't use either
+index and fall back to a plain icontains.
+"""
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+from .models import Session, Task
+
+SEARCH_LIMIT = 20
+MIN_INDEXED_TERM = 3
+
+# kind -> (model, searched field, FTS5 shadow table on SQLite)
+SEARCH_KINDS = {
+    'user': (User, 'username', 'core_search_user'),
+    'task': (Task, 'title', 'core_search_task'),
+    'session': (Session, 'notes', 'core_search_session'),
+}
+
+
+def kind_for(model):
+    for kind, (kind_model, _, _) in SEARCH_KINDS.items():
+        if kind_model is model:
+            return kind
+    return None
+
+
+def _uses_fts():
+    return connection.vendor == 'sqlite'
+
+
+def _fts_phrase(term):
+    return '"{}"'.format(term.replace('"', '""'))
+
+
+def matching(kind, term):
+    """Return an expression usable as `pk__in` for objects containing `term`."""
+    model, field, table = SEARCH_KINDS[kind]
+    if _uses_fts() and len(term) >= MIN_INDEXED_TERM:
+        return RawSQL(f'SELECT rowid FROM {table} WHERE {table} MATCH %s', [_fts_phrase(term)])
+    return model.objects.filter(**{f'{field}__icontains': term}).values('pk')
+
+
+def search(kind, term, limit=SEARCH_LIMIT):
+    """Return up to `limit` objects of `kind` containing `term`, best match first."""
+    model, field, table = SEARCH_KINDS[kind]
+    term = term.strip()
+    if not term:
+        return []
+    queryset = model.objects.filter(**{f'{field}__icontains': term})
+    if len(term) < MIN_INDEXED_TERM:
+        return list(queryset.order_by('pk')[:limit])
+    if connection.vendor == 'postgresql':
+        from django.contrib.postgres.search import TrigramWordSimilarity
+        return list(
+            queryset.annotate(rank=TrigramWordSimilarity(term, field)).order_by('-rank', 'pk')[:limit]
+        )
+    if _uses_fts():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {table} WHERE {table} MATCH %s ORDER BY rank LIMIT %s',
+                [_fts_phrase(term), limit],
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+        found = model.objects.in_bulk(ids)
+        return [found[pk] for pk in ids if pk in found]
+    return list(queryset.order_by('pk')[:limit])
+
+
+# ========== FTS5 sync (SQLite) ==========
+
+def index_objects(kind, objects):
+    """Replace the FTS rows for `objects`; a no-op outside SQLite."""
+    if not _uses_fts():
+        return
+    _, field, table = SEARCH_KINDS[kind]
+    objects = [obj for obj in objects if obj.pk is not None]
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {table} WHERE rowid = %s', [[obj.pk] for obj in objects])
+        cursor.executemany(
+            f'INSERT INTO {table} (rowid, body) VALUES (%s, %s)',
+            [[obj.pk, getattr(obj, field)] for obj in objects if getattr(obj, field)],
+        )
+
+
+def unindex_object(kind, pk):
+    if not _uses_fts():
+        return
+    _, _, table = SEARCH_KINDS[kind]
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {table} WHERE rowid = %s', [pk])
+
+
+def rebuild_index():
+    """Repopulate every FTS table from its source table."""
+    if not _uses_fts():
+        return
+    with connection.cursor() as cursor:
+        for model, field, table in SEARCH_KINDS.values():
+            column = model._meta.get_field(field).column
+            cursor.execute(f'DELETE FROM {table}')
+            cursor.execute(
+                f'INSERT INTO {table} (rowid, body) '
+                f"SELECT id, {column} FROM {model._meta.db_table} WHERE {column} <> ''"
+            )
@@ -0,0 +1,79 @@
+"""Write paths shared by the HTML views and the JSON API."""
+from django.db import IntegrityError, transaction
+
+from . import metrics, search
+from .cache import invalidate_admin_snapshot
+from .forms import SLOT_CONFLICT_ERROR
+from .models import (
+    Session, count_status_changes, is_overlap_violation, note_user_data_change, schedule_lock,
+)
+
+
+def book_sessions(form, user):
+    """Validate and save a SessionBookForm under the user's schedule lock.
+
+    Validation runs inside the lock so a concurrent booking cannot slip into
+    the same slot between the conflict check and the insert. Returns the
+    booked sessions, or None if the form is invalid or the slot was taken
+    (the error is then on the form).
+    """
+    with schedule_lock(user.pk):
+        if not form.is_valid():
+            return None
+        try:
+            with transaction.atomic():
+                if form.is_recurring():
+                    # New sessions are pending, so no rollups need shifting.
+                    booked = Session.objects.bulk_create(form.build_sessions(user))
+                    # bulk_create sends no signals and skips Session.save().
+                    invalidate_admin_snapshot()
+                    note_user_data_change(user.pk)
+                    search.index_objects('session', booked)
+                    count_status_changes('pending', len(booked))
+                else:
+                    session = form.save(commit=False)
+                    session.user = user
+                    session.save()
+                    booked = [session]
+                transaction.on_commit(lambda: metrics.inc('trackit_sessions_booked_total', len(booked)))
+        except IntegrityError as e:
+            if not is_overlap_violation(e):
+                raise
+            form.add_error(None, SLOT_CONFLICT_ERROR)
+            return None
+    return booked
+
+
+def update_progress(session, data):
+    """Validate a progress payload and save it onto a started session.
+
+    Returns an error message, or None once saved. Raises ValueError or
+    TypeError for non-numeric values.
+    """
+    if session.status == 'cancelled':
+        return 'Cannot update a cancelled session.'
+    if session.effective_status == 'pending':
+        return 'This session has not started yet.'
+
+    actual_minutes = int(data.get('actual_minutes', session.actual_minutes))
+    completion_percent = int(data.get('completion_percent', session.completion_percent))
+    notes = data.get('notes', session.notes)
+    mark_complete = data.get('mark_complete', False)
+
+    if actual_minutes == 0:
+        return 'Please enter actual time spent before saving.'
+    if actual_minutes < 0:
+        return 'Time cannot be negative.'
+
+    max_minutes = session.planned_minutes() * 3
+    if actual_minutes > max_minutes:
+        return f'Time too high. Max allowed: {max_minutes} min.'
+    if not (0 <= completion_percent <= 100):
+        return 'Quality must be between 0 and 100.'
+
+    session.actual_minutes = actual_minutes
+    session.completion_percent = completion_percent
+    session.notes = notes
+    session.status = 'completed' if mark_complete else 'in_progress'
+    session.save()
+    return None
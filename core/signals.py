@@ -0,0 +1,49 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from . import search
+from .cache import invalidate_admin_snapshot
+from .models import Category, Session, Task, note_user_data_change
+
+
+@receiver([post_save, post_delete], sender=User)
+@receiver([post_save, post_delete], sender=Task)
+@receiver([post_save, post_delete], sender=Session)
+def invalidate_platform_stats(sender, **kwargs):
+    invalidate_admin_snapshot()
+
+
+@receiver([post_save, post_delete], sender=Task)
+@receiver([post_save, post_delete], sender=Session)
+def invalidate_user_pages(sender, instance, signal, **kwargs):
+    # A delete may be cascading from the user, so don't create a row for it.
+    note_user_data_change(instance.user_id, create=signal is post_save)
+
+
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+def invalidate_category_users_pages(sender, instance, **kwargs):
+    # Task pages show the category name. Before a delete the tasks still
+    # point at it; afterwards their category is already set to NULL.
+    user_ids = set(Task.objects.filter(category=instance).values_list('user_id', flat=True))
+    if user_ids:
+        note_user_data_change(*user_ids)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Task)
+@receiver(post_save, sender=Session)
+def update_search_index(sender, instance, update_fields=None, **kwargs):
+    kind = search.kind_for(sender)
+    _, field, _ = search.SEARCH_KINDS[kind]
+    if update_fields is not None and field not in update_fields:
+        return
+    search.index_objects(kind, [instance])
+
+
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=Task)
+@receiver(post_delete, sender=Session)
+def remove_from_search_index(sender, instance, **kwargs):
+    search.unindex_object(search.kind_for(sender), instance.pk)
@@ -0,0 +1,154 @@
+"""Log queries slower than SLOW_QUERY_MS to a rotating NDJSON file.
+
+A connection.execute_wrapper is installed on every database connection.
+Each record carries the query fingerprint (literals and placeholders
+replaced by ?, IN lists collapsed), the duration, the resolved view and the
+core/ stack frames that issued it, innermost first. Each live process
+writes and rotates its own file (ProcessFileHandler); `manage.py
+slow_queries` aggregates them all.
+"""
+import fcntl
+import hashlib
+import itertools
+import json
+import logging
+import os
+import re
+import sys
+import time
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .instrumentation import current_view
+
+slow_query_logger = logging.getLogger('core.slow_queries')
+
+CORE_DIR = Path(__file__).parent
+# Frames in these files are plumbing, never the call site.
+_SKIP_FRAMES = {str(CORE_DIR / name) for name in (
+    'slow_queries.py', 'instrumentation.py', 'middleware.py', 'profiling.py', 'nplusone.py',
+)}
+
+_LITERALS = [
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'%s|\$\d+'), '?'),
+    (re.compile(r'(?<![\w"])-?\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.IGNORECASE), 'IN (...)'),
+    (re.compile(r'\s+'), ' '),
+]
+
+
+def normalize(sql):
+    """SQL with literals stripped, so the same query shape compares equal."""
+    for pattern, replacement in _LITERALS:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def fingerprint(normalized):
+    return hashlib.md5(normalized.encode()).hexdigest()[:12]
+
+
+def call_sites(limit=4):
+    """Return up to `limit` 'core/<file>:<line> in <function>' frames, innermost first."""
+    sites = []
+    frame = sys._getframe(1)
+    while frame is not None and len(sites) < limit:
+        filename = frame.f_code.co_filename
+        if filename.startswith(str(CORE_DIR)) and filename not in _SKIP_FRAMES:
+            relative = Path(filename).relative_to(CORE_DIR.parent)
+            sites.append(f'{relative}:{frame.f_lineno} in {frame.f_code.co_name}')
+        frame = frame.f_back
+    return sites
+
+
+def log_files(path):
+    """Every process's log for SLOW_QUERY_LOG `path`, with rotated copies."""
+    path = Path(path)
+    return sorted(path.parent.glob(f'{path.stem}*{path.suffix}*'))
+
+
+class ProcessFileHandler(RotatingFileHandler):
+    """RotatingFileHandler on `<stem>.<slot><suffix>`, one file per live process.
+
+    Rotation renames the file, which is only safe with a single writer, so
+    each process holds an exclusive flock on `<stem>.<slot>.lock` for the
+    lowest free slot. The lock dies with the process: a restarted worker
+    carries on in an exited one's file, so the files are bounded by the most
+    workers alive at once. The slot is claimed at the first write, so
+    workers forked after logging is configured still get their own file.
+    """
+
+    def __init__(self, filename, *args, **kwargs):
+        self.template = Path(filename)
+        self.pid = None
+        self.slot_lock = None
+        kwargs['delay'] = True
+        super().__init__(filename, *args, **kwargs)
+
+    def _claim_slot(self):
+        for slot in itertools.count():
+            lock = open(self.template.with_name(f'{self.template.stem}.{slot}.lock'), 'a')
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                lock.close()
+                continue
+            return slot, lock
+
+    def emit(self, record):
+        if self.pid != os.getpid():
+            if self.stream:
+                self.stream.close()
+                self.stream = None
+            if self.slot_lock:
+                # After a fork this is the parent's lock; closing our copy keeps it held.
+                self.slot_lock.close()
+            self.pid = os.getpid()
+            slot, self.slot_lock = self._claim_slot()
+            self.baseFilename = os.path.abspath(
+                self.template.with_name(f'{self.template.stem}.{slot}{self.template.suffix}')
+            )
+        super().emit(record)
+
+    def close(self):
+        super().close()
+        if self.slot_lock:
+            self.slot_lock.close()
+            self.slot_lock = None
+
+
+def log_slow_queries(execute, sql, params, many, context):
+    threshold = settings.SLOW_QUERY_MS
+    if not threshold:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        ms = (time.perf_counter() - started) * 1000
+        if ms >= threshold:
+            query = normalize(sql)
+            frames = call_sites()
+            slow_query_logger.info(json.dumps({
+                'ts': timezone.now().isoformat(),
+                'ms': round(ms, 2),
+                'fingerprint': fingerprint(query),
+                'query': query[:2000],
+                'many': many,
+                'view': current_view.get(),
+                'frame': frames[0] if frames else None,
+                'stack': frames,
+                'db': context['connection'].alias,
+            }))
+
+
+@receiver(connection_created, dispatch_uid='core.slow_queries')
+def install_wrapper(sender, connection, **kwargs):
+    if log_slow_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(log_slow_queries)
@@ -0,0 +1,88 @@
+"""Streak calculations built on one distinct-active-dates query.
+
+Days are bucketed in settings.TIME_ZONE, so a session at 00:30 local time
+counts towards that local day rather than the UTC one. User streaks read the
+DailyActivity rollup; task streaks bucket sessions with a DB-side TruncDate.
+"""
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import INVALID_SESSION_STATUSES, DailyActivity, Session, local_timezone
+
+USER_STREAK_DAYS = 30
+TASK_STREAK_DAYS = 7
+
+
+def local_today():
+    return timezone.localdate(timezone=local_timezone())
+
+
+def _window(days, today):
+    """Return the aware [start, end) bounds covering `days` local days up to today."""
+    tz = local_timezone()
+    start = datetime.combine(today - timedelta(days=days - 1), time.min, tzinfo=tz)
+    end = datetime.combine(today + timedelta(days=1), time.min, tzinfo=tz)
+    return start, end
+
+
+def active_dates(sessions, days, today=None, *fields):
+    """Distinct (fields..., local date) rows for valid sessions in the window."""
+    today = today or local_today()
+    start, end = _window(days, today)
+    return sessions.exclude(
+        status__in=INVALID_SESSION_STATUSES
+    ).filter(
+        planned_start__gte=start, planned_start__lt=end,
+    ).annotate(
+        day=TruncDate('planned_start', tzinfo=local_timezone())
+    ).values_list(*fields, 'day').distinct().order_by()
+
+
+def current_streak(dates, today, limit):
+    """Count consecutive days in `dates` going back from today, up to `limit`."""
+    streak = 0
+    day = today
+    while streak < limit and day in dates:
+        streak += 1
+        day -= timedelta(days=1)
+    return streak
+
+
+def user_streak(user, days=USER_STREAK_DAYS, today=None):
+    """Return the user's current streak of active days."""
+    today = today or local_today()
+    dates = set(DailyActivity.objects.filter(
+        user=user,
+        session_count__gt=0,
+        day__gt=today - timedelta(days=days),
+        day__lte=today,
+    ).values_list('day', flat=True))
+    return current_streak(dates, today, days)
+
+
+def task_streaks(sessions, days=TASK_STREAK_DAYS, today=None):
+    """Return {task_id: streak} for every task that has sessions in `sessions`."""
+    today = today or local_today()
+    dates = defaultdict(set)
+    for task_id, day in active_dates(sessions, days, today, 'task_id'):
+        dates[task_id].add(day)
+    return {task_id: current_streak(d, today, days) for task_id, d in dates.items()}
+
+
+def task_streak_sessions(days=TASK_STREAK_DAYS, today=None):
+    """Valid sessions in the task streak window, each annotated with its local `day`.
+
+    Task.objects.with_progress() prefetches these for recent_streak().
+    """
+    today = today or local_today()
+    start, end = _window(days, today)
+    return Session.objects.exclude(
+        status__in=INVALID_SESSION_STATUSES
+    ).filter(
+        planned_start__gte=start, planned_start__lt=end,
+    ).annotate(
+        day=TruncDate('planned_start', tzinfo=local_timezone())
+    ).only('task')
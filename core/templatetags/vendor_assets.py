@@ -0,0 +1,15 @@
+from django import template
+from django.conf import settings
+from django.templatetags.static import static
+
+from core.vendor import CDN_URLS
+
+register = template.Library()
+
+
+@register.simple_tag
+def vendor(path):
+    """URL of a pinned third-party asset: static/vendor/<path> once self-hosted, else its CDN."""
+    if settings.VENDOR_ASSETS_SELF_HOSTED:
+        return static(f'vendor/{path}')
+    return CDN_URLS[path]
@@ -0,0 +1,41 @@
+from django.test import TestCase
+
+from .benchmarks import PAGES, check, load_budgets, run_benchmarks
+
+
+# =====================================================================
+# View Benchmarks — query budgets and O(1) queries in rows
+# =====================================================================
+
+class ViewBenchmarkTest(TestCase):
+    """Drive every benchmarked page at two dataset sizes (see core.benchmarks).
+
+    Latency budgets are left to `manage.py benchmark_views --latency`; test
+    machines are too noisy for them.
+    """
+
+    def test_pages_within_query_budgets(self):
+        report = run_benchmarks(users=3, sessions=150, scale=3, iterations=1)
+        self.assertEqual(report['violations'], [])
+        self.assertEqual(set(report['views']), set(PAGES))
+        self.assertGreater(
+            report['dataset']['large']['user_sessions'], report['dataset']['small']['user_sessions']
+        )
+
+    def test_check_flags_query_growth_and_missing_budgets(self):
+        budgets = load_budgets()
+        report = {'views': {
+            'task_list': {
+                'small': {'queries': 5, 'warm_queries': 5, 'wall_ms': 1},
+                'large': {'queries': 9, 'warm_queries': 5, 'wall_ms': 1},
+            },
+            'new_page': {
+                'small': {'queries': 1, 'warm_queries': 1, 'wall_ms': 1},
+                'large': {'queries': 1, 'warm_queries': 1, 'wall_ms': 1},
+            },
+        }}
+        problems = check(report, budgets)
+        self.assertEqual(len(problems), 3)
+        self.assertIn('grows with rows', problems[0])
+        self.assertIn('over budget', problems[1])
+        self.assertIn('no budget', problems[2])
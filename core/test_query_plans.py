@@ -0,0 +1,114 @@
+import re
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models.functions import Upper
+from django.test import TestCase
+from django.utils import timezone
+
+from .models import INVALID_SESSION_STATUSES, Category, DailyActivity, Session, Task
+from .streaks import local_today
+
+
+# =====================================================================
+# Query Plan Tests — hot query shapes must be served by an index
+# =====================================================================
+
+class HotQueryPlanTest(TestCase):
+    """Run EXPLAIN on each hot query against a seeded database.
+
+    On PostgreSQL sequential scans are disabled for the check, so the planner
+    only picks one if no usable index exists.
+    """
+
+    USERS = 20
+    TASKS_PER_USER = 5
+    SESSIONS_PER_TASK = 40
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        category = Category.objects.create(name='Study')
+        users = User.objects.bulk_create([
+            User(username=f'user{i}', email=f'user{i}@example.com')
+            for i in range(cls.USERS)
+        ])
+        tasks = Task.objects.bulk_create([
+            Task(user=user, title=f'Task {j}', category=category if j % 2 else None)
+            for user in users for j in range(cls.TASKS_PER_USER)
+        ])
+        statuses = [status for status, _ in Session.STATUS_CHOICES]
+        Session.objects.bulk_create([
+            Session(
+                task=task, user_id=task.user_id,
+                planned_start=now - timedelta(hours=k * 7),
+                planned_end=now - timedelta(hours=k * 7 - 1),
+                actual_minutes=30, completion_percent=k % 100,
+                status=statuses[k % len(statuses)],
+            )
+            for task in tasks for k in range(cls.SESSIONS_PER_TASK)
+        ])
+        DailyActivity.objects.bulk_create([
+            DailyActivity(user=user, day=local_today() - timedelta(days=d), minutes=30, session_count=1)
+            for user in users for d in range(60)
+        ])
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        cls.user = users[0]
+        cls.task_ids = [task.pk for task in tasks[:cls.TASKS_PER_USER]]
+
+    def hot_queries(self):
+        now = timezone.now()
+        user = self.user
+        valid = Session.objects.exclude(status__in=INVALID_SESSION_STATUSES)
+        return {
+            'session_list': Session.objects.filter(user=user).order_by('-planned_start')[:10],
+            'session_list_status': Session.objects.filter(user=user, status='completed').order_by('-planned_start')[:10],
+            'session_list_rank': Session.objects.filter(user=user).with_effective_rank().order_by(
+                '-effective_rank', '-planned_start', '-id'
+            )[:11],
+            'admin_sessions': Session.objects.order_by('-planned_start', '-id')[:16],
+            'admin_sessions_status': Session.objects.filter(status='completed').order_by(
+                '-planned_start', '-id'
+            )[:16],
+            'admin_tasks': Task.objects.order_by('-created_at', '-id')[:16],
+            'start_due': Session.objects.filter(user=user, status='pending', planned_start__lte=now),
+            'due_sweep': Session.objects.filter(
+                status='pending', planned_start__lte=now
+            ).order_by('planned_start', 'id').values('pk')[:500],
+            'conflict_check': Session.objects.filter(
+                user=user, planned_start__lt=now, planned_end__gt=now - timedelta(hours=1)
+            ).exclude(status='cancelled'),
+            'valid_range': valid.filter(user=user, planned_start__gte=now - timedelta(days=7)),
+            'task_sessions': valid.filter(task_id__in=self.task_ids),
+            'recent_created': Session.objects.order_by('-created_at')[:5],
+            'created_today': Session.objects.filter(created_at__gte=now - timedelta(days=1)),
+            'active_tasks': Task.objects.filter(user=user, is_active=True),
+            'daily_activity': DailyActivity.objects.filter(
+                user=user, day__gte=local_today() - timedelta(days=30)
+            ),
+            'register_email': User.objects.alias(
+                email_upper=Upper('email')
+            ).filter(email_upper='USER3@EXAMPLE.COM'),
+        }
+
+    def sequential_scans(self, plan):
+        if connection.vendor == 'postgresql':
+            return re.findall(r'Seq Scan on (\w+)', plan)
+        if connection.vendor == 'sqlite':
+            # "SCAN t" without "USING ... INDEX" is a full table scan.
+            return [
+                m.group(1) for m in re.finditer(r'\bSCAN (\w+)(?: AS \w+)?(?P<rest>[^\n]*)', plan)
+                if 'INDEX' not in m.group('rest')
+            ]
+        self.skipTest(f'No plan parser for {connection.vendor}')
+
+    def test_hot_queries_use_indexes(self):
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET enable_seqscan = off')
+        for name, queryset in self.hot_queries().items():
+            with self.subTest(query=name):
+                plan = queryset.explain()
+                self.assertEqual(self.sequential_scans(plan), [], f'{name}:\n{plan}')
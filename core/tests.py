@@ -1,10 +1,25 @@
-from django.test import TestCase, Client
+from django.test import TestCase, TransactionTestCase, Client, override_settings
+from django.core.cache import cache
 from django.contrib.auth.models import User
 from django.utils import timezone
-from datetime import timedelta
+from datetime import datetime, time, timedelta
+import json
+import threading
+import time as time_module
 
 from .models import Task, Session, Category
 
+# Every request in this module runs in strict N+1 mode (core.nplusone).
+_strict_n_plus_one = override_settings(N_PLUS_ONE_STRICT=True)
+
+
+def setUpModule():
+    _strict_n_plus_one.enable()
+
+
+def tearDownModule():
+    _strict_n_plus_one.disable()
+
 
 # =====================================================================
 # Model Tests
@@ -98,6 +113,198 @@ class TaskModelTest(TestCase):
         )
         self.assertEqual(self.task.average_quality(), 70)
 
+    def test_with_progress_matches_per_row_metrics(self):
+        now = timezone.now()
+        Session.objects.create(
+            task=self.task, user=self.user,
+            planned_start=now - timedelta(hours=1), planned_end=now,
+            actual_minutes=90, completion_percent=80, status='completed'
+        )
+        self._make_session(10, status='cancelled')
+        task = Task.objects.with_progress().get(pk=self.task.pk)
+        self.assertEqual(task.total_actual_minutes(), self.task.total_actual_minutes())
+        self.assertEqual(task.progress_percent(), self.task.progress_percent())
+        self.assertEqual(task.extra_minutes(), self.task.extra_minutes())
+        self.assertEqual(task.average_quality(), self.task.average_quality())
+        self.assertEqual(task.recent_streak(), self.task.recent_streak())
+
+    def test_progress_rollup_follows_session_updates(self):
+        session = self._make_session(30, status='pending')
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.total_actual_minutes(), 0)
+        session.status = 'completed'
+        session.completion_percent = 90
+        session.save()
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.total_actual_minutes(), 30)
+        self.assertEqual(self.task.average_quality(), 90)
+        session.status = 'cancelled'
+        session.save()
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.total_actual_minutes(), 0)
+        self.assertEqual(self.task.average_quality(), 0)
+
+    def test_progress_rollup_reverted_on_delete(self):
+        session = self._make_session(45)
+        Session.objects.get(pk=session.pk).delete()
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.total_actual_minutes(), 0)
+
+    def test_start_due_adds_started_sessions_to_rollup(self):
+        self._make_session(20, status='pending')
+        Session.objects.filter(user=self.user).start_due()
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.total_actual_minutes(), 20)
+
+    def test_task_save_keeps_rollups_logged_since_it_was_loaded(self):
+        stale = Task.objects.get(pk=self.task.pk)
+        self._make_session(25)
+        stale.title = 'Renamed'
+        stale.save()
+        self.task.refresh_from_db()
+        self.assertEqual((self.task.title, self.task.total_actual_minutes()), ('Renamed', 25))
+
+    def test_rebuild_task_progress_command(self):
+        from io import StringIO
+        from django.core.management import call_command
+        from django.core.management.base import CommandError
+
+        self._make_session(40)
+        Task.objects.filter(pk=self.task.pk).update(logged_minutes=999)
+        with self.assertRaises(CommandError):
+            call_command('rebuild_task_progress', '--check', stdout=StringIO())
+        call_command('rebuild_task_progress', stdout=StringIO())
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.total_actual_minutes(), 40)
+        call_command('rebuild_task_progress', '--check', stdout=StringIO())
+
+    def test_with_progress_reads_without_extra_queries(self):
+        self._make_session(30)
+        task = Task.objects.with_progress().get(pk=self.task.pk)
+        with self.assertNumQueries(0):
+            task.progress_percent()
+            task.extra_minutes()
+            task.average_quality()
+            task.recent_streak()
+
+
+class StreakTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.task = Task.objects.create(user=self.user, title='Task', target_minutes=600)
+        self.other = Task.objects.create(user=self.user, title='Other', target_minutes=600)
+
+    def _session_on(self, days_ago, task=None, status='completed'):
+        from .streaks import local_timezone
+        start = timezone.localtime(timezone=local_timezone()).replace(
+            hour=12, minute=0, second=0, microsecond=0
+        ) - timedelta(days=days_ago)
+        return Session.objects.create(
+            task=task or self.task, user=self.user,
+            planned_start=start, planned_end=start + timedelta(minutes=30),
+            actual_minutes=30, status=status,
+        )
+
+    def test_current_streak_stops_at_gap(self):
+        from .streaks import current_streak
+        today = timezone.localdate()
+        dates = {today, today - timedelta(days=1), today - timedelta(days=3)}
+        self.assertEqual(current_streak(dates, today, 30), 2)
+        self.assertEqual(current_streak(dates, today, 1), 1)
+
+    def test_user_streak_single_query(self):
+        from .streaks import user_streak
+        for days_ago in range(3):
+            self._session_on(days_ago)
+        self._session_on(3, status='cancelled')
+        with self.assertNumQueries(1):
+            self.assertEqual(user_streak(self.user), 3)
+
+    def test_task_streaks_single_query(self):
+        from .streaks import task_streaks
+        for days_ago in range(3):
+            self._session_on(days_ago)
+        self._session_on(0, task=self.other)
+        with self.assertNumQueries(1):
+            per_task = task_streaks(Session.objects.filter(user=self.user))
+        self.assertEqual(per_task, {self.task.pk: 3, self.other.pk: 1})
+
+    def test_recent_streak_capped_at_seven_days(self):
+        for days_ago in range(9):
+            self._session_on(days_ago)
+        self.assertEqual(self.task.recent_streak(), 7)
+        task = Task.objects.with_progress().get(pk=self.task.pk)
+        self.assertEqual(task.recent_streak(), 7)
+
+    def test_with_progress_streaks_use_one_query(self):
+        self._session_on(0)
+        with self.assertNumQueries(2):
+            tasks = list(Task.objects.filter(user=self.user).with_progress())
+            [task.recent_streak() for task in tasks]
+
+
+class DailyActivityTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.task = Task.objects.create(user=self.user, title='Task', target_minutes=600)
+        self.today = timezone.localdate()
+
+    def _session(self, minutes, status='completed', days_ago=0, quality=0):
+        start = timezone.now() - timedelta(days=days_ago, minutes=minutes)
+        return Session.objects.create(
+            task=self.task, user=self.user,
+            planned_start=start, planned_end=start + timedelta(minutes=minutes),
+            actual_minutes=minutes, completion_percent=quality, status=status,
+        )
+
+    def _activity(self, day):
+        from .models import DailyActivity
+        return DailyActivity.objects.filter(user=self.user, day=day).first()
+
+    def test_session_writes_update_daily_activity(self):
+        session = self._session(30, quality=60)
+        day = timezone.localtime(session.planned_start).date()
+        activity = self._activity(day)
+        self.assertEqual((activity.minutes, activity.session_count), (30, 1))
+        self.assertEqual((activity.quality_sum, activity.quality_count), (60, 1))
+        session.status = 'cancelled'
+        session.save()
+        activity.refresh_from_db()
+        self.assertEqual((activity.minutes, activity.session_count), (0, 0))
+
+    def test_reschedule_moves_minutes_between_days(self):
+        session = self._session(30, days_ago=2)
+        old_day = timezone.localtime(session.planned_start).date()
+        session.planned_start += timedelta(days=1)
+        session.planned_end += timedelta(days=1)
+        session.save()
+        new_day = timezone.localtime(session.planned_start).date()
+        self.assertEqual(self._activity(old_day).minutes, 0)
+        self.assertEqual(self._activity(new_day).minutes, 30)
+
+    def test_task_delete_clears_activity(self):
+        session = self._session(30)
+        day = timezone.localtime(session.planned_start).date()
+        self.task.sessions.all().delete()
+        self.assertEqual(self._activity(day).minutes, 0)
+
+    def test_rebuild_daily_activity_command(self):
+        from io import StringIO
+        from django.core.management import call_command
+        from django.core.management.base import CommandError
+        from .models import DailyActivity
+
+        session = self._session(25)
+        DailyActivity.objects.all().delete()
+        with self.assertRaises(CommandError):
+            call_command('rebuild_daily_activity', '--check', stdout=StringIO())
+        call_command('rebuild_daily_activity', stdout=StringIO())
+        day = timezone.localtime(session.planned_start).date()
+        self.assertEqual(self._activity(day).minutes, 25)
+        call_command('rebuild_daily_activity', '--check', stdout=StringIO())
+
 
 class SessionModelTest(TestCase):
 
@@ -134,6 +341,29 @@ class SessionModelTest(TestCase):
         )
         self.assertEqual(session.status, 'pending')
 
+    def test_overlap_constraint_migration_lists_conflicts_first(self):
+        from importlib import import_module
+        from types import SimpleNamespace
+        from django.db import connection
+        if connection.vendor == 'postgresql':
+            self.skipTest('the constraint already rejects overlapping rows')
+        migration = import_module('core.migrations.0005_session_no_overlap')
+        now = timezone.now()
+        first, second, cancelled = Session.objects.bulk_create([
+            Session(task=self.task, user=self.user, status=status,
+                    planned_start=now + timedelta(minutes=offset),
+                    planned_end=now + timedelta(minutes=offset + 60))
+            for status, offset in (('pending', 0), ('pending', 30), ('cancelled', 15))
+        ])
+        editor = SimpleNamespace(connection=connection)
+        with self.assertRaisesMessage(
+            RuntimeError, f'1 pair(s) of overlapping non-cancelled sessions (id/id): {first.pk}/{second.pk}.'
+        ):
+            migration.check_no_overlaps(editor)
+        second.status = 'cancelled'
+        second.save()
+        migration.check_no_overlaps(editor)
+
 
 # =====================================================================
 # View Tests — Access Control
@@ -265,6 +495,117 @@ class SessionViewTest(TestCase):
         session.refresh_from_db()
         self.assertEqual(session.actual_minutes, 45)
 
+    def test_recurring_booking_skips_conflicts(self):
+        from .models import local_timezone
+        tz = local_timezone()
+        monday = timezone.localdate() + timedelta(days=7 - timezone.localdate().weekday())
+        start = datetime.combine(monday, time(18), tzinfo=tz)
+        # Existing session on the second Wednesday at the same time.
+        Session.objects.create(
+            task=self.task, user=self.user,
+            planned_start=start + timedelta(days=9), planned_end=start + timedelta(days=9, hours=1),
+        )
+        response = self.client.post('/sessions/book/', {
+            'task': self.task.pk,
+            'planned_start': start.strftime('%Y-%m-%dT%H:%M'),
+            'planned_end': (start + timedelta(hours=1)).strftime('%Y-%m-%dT%H:%M'),
+            'notes': '',
+            'repeat_days': ['0', '2', '4'],
+            'repeat_weeks': 2,
+        })
+        self.assertRedirects(response, '/sessions/')
+        booked = Session.objects.filter(user=self.user).exclude(planned_start=start + timedelta(days=9))
+        self.assertEqual(booked.count(), 5)
+        self.assertEqual(
+            sorted({timezone.localtime(s.planned_start, tz).weekday() for s in booked}), [0, 2, 4]
+        )
+
+    def test_get_requests_do_not_write_due_sessions(self):
+        now = timezone.now()
+        due = Session.objects.create(
+            task=self.task, user=self.user, status='pending',
+            planned_start=now - timedelta(minutes=5), planned_end=now + timedelta(minutes=55),
+        )
+        upcoming = Session.objects.create(
+            task=self.task, user=self.user, status='pending',
+            planned_start=now + timedelta(hours=2), planned_end=now + timedelta(hours=3),
+        )
+        response = self.client.get(f'/sessions/{due.pk}/')
+        self.assertContains(response, 'In Progress')
+        in_progress = self.client.get('/sessions/?status=in_progress').context['sessions']
+        self.assertEqual([s.pk for s in in_progress], [due.pk])
+        pending = self.client.get('/sessions/?status=pending').context['sessions']
+        self.assertEqual([s.pk for s in pending], [upcoming.pk])
+        # The unfiltered list ranks the due session as in progress too.
+        listed = self.client.get('/sessions/').context['sessions']
+        self.assertEqual([s.pk for s in listed], [due.pk, upcoming.pk])
+        due.refresh_from_db()
+        self.assertEqual(due.status, 'pending')
+        # Progress can be logged before the sweeper has run.
+        response = self.client.post(
+            f'/sessions/{due.pk}/progress/',
+            data=json.dumps({'actual_minutes': 20, 'completion_percent': 50}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.json()['status'], 'in_progress')
+
+    def test_start_due_sessions_command_sweeps_in_batches(self):
+        now = timezone.now()
+        for i in range(5):
+            Session.objects.create(
+                task=self.task, user=self.user, status='pending',
+                planned_start=now - timedelta(hours=i + 1), planned_end=now - timedelta(hours=i),
+            )
+        from io import StringIO
+        from django.core.management import call_command
+        out = StringIO()
+        call_command('start_due_sessions', batch_size=2, stdout=out)
+        self.assertIn('Started 5 due session(s).', out.getvalue())
+        self.assertFalse(Session.objects.filter(status='pending').exists())
+
+    def test_session_list_keyset_pages_by_status_rank(self):
+        now = timezone.now()
+        statuses = ['completed', 'in_progress', 'cancelled', 'pending'] * 6
+        for i, status in enumerate(statuses):
+            Session.objects.create(
+                task=self.task, user=self.user, status=status,
+                planned_start=now + timedelta(days=i), planned_end=now + timedelta(days=i, hours=1),
+            )
+        seen = []
+        response = self.client.get('/sessions/?status=')
+        self.assertIsNone(response.context['sessions'].count)
+        while True:
+            page = response.context['sessions']
+            seen.extend(page)
+            if not page.has_next():
+                break
+            response = self.client.get(f'/sessions/?after={page.next_cursor}')
+        self.assertEqual(len(seen), len(statuses))
+        expected = sorted(
+            seen, key=lambda s: (['in_progress', 'pending', 'completed', 'cancelled'].index(s.status),
+                                 -s.planned_start.timestamp()),
+        )
+        self.assertEqual([s.pk for s in seen], [s.pk for s in expected])
+        # Walking back from the last page returns the previous page.
+        back = self.client.get(f'/sessions/?before={page.previous_cursor}').context['sessions']
+        self.assertEqual([s.pk for s in back], [s.pk for s in seen[10:20]])
+        # A garbled cursor falls back to the first page.
+        first = self.client.get('/sessions/?after=garbage').context['sessions']
+        self.assertEqual([s.pk for s in first], [s.pk for s in seen[:10]])
+
+    def test_conflicting_slots_single_query(self):
+        now = timezone.now()
+        Session.objects.create(
+            task=self.task, user=self.user,
+            planned_start=now + timedelta(hours=2), planned_end=now + timedelta(hours=3),
+        )
+        slots = [
+            (now + timedelta(hours=h), now + timedelta(hours=h, minutes=90)) for h in range(5)
+        ]
+        with self.assertNumQueries(1):
+            conflicts = Session.objects.filter(user=self.user).conflicting_slots(slots)
+        self.assertEqual(conflicts, slots[1:3])
+
     def test_cancel_session(self):
         now = timezone.now()
         session = Session.objects.create(
@@ -278,6 +619,803 @@ class SessionViewTest(TestCase):
         self.assertEqual(session.status, 'cancelled')
 
 
+class DashboardViewTest(TestCase):
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.task = Task.objects.create(user=self.user, title='Task', target_minutes=60)
+        now = timezone.now()
+        Session.objects.create(
+            task=self.task, user=self.user,
+            planned_start=now - timedelta(hours=1), planned_end=now,
+            actual_minutes=30, completion_percent=80, status='completed',
+        )
+        self.client.login(username='testuser', password='testpass123')
+        cache.clear()
+
+    def test_dashboard_shows_streak(self):
+        response = self.client.get('/dashboard/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['streak'], 1)
+
+    def test_statistics_category_breakdown_single_query(self):
+        study = Category.objects.create(name='Study')
+        Category.objects.create(name='Unused')
+        other = Task.objects.create(user=self.user, title='Other', target_minutes=60, category=study)
+        now = timezone.now()
+        Session.objects.create(
+            task=other, user=self.user,
+            planned_start=now - timedelta(days=3), planned_end=now - timedelta(days=3) + timedelta(hours=1),
+            actual_minutes=20, status='completed',
+        )
+        sessions = Session.objects.filter(user=self.user)
+        with self.assertNumQueries(1):
+            breakdown = sessions.minutes_by_category()
+        self.assertEqual(breakdown, [('Study', 20), ('Uncategorised', 30)])
+        self.assertEqual(
+            sessions.minutes_by_category(start=timezone.localdate() - timedelta(days=1)),
+            [('Uncategorised', 30)],
+        )
+        response = self.client.get('/statistics/')
+        self.assertEqual(json.loads(response.context['category_labels']), ['Study', 'Uncategorised'])
+
+    def test_user_pages_render(self):
+        for url in ['/statistics/', '/progress/', '/tasks/']:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+
+    def test_pages_use_pinned_vendor_assets(self):
+        for self_hosted in (False, True):
+            self.client.force_login(self.user)
+            with self.settings(VENDOR_ASSETS_SELF_HOSTED=self_hosted):
+                for url in ['/dashboard/', '/statistics/', '/login/']:
+                    if url == '/login/':
+                        self.client.logout()
+                    content = self.client.get(url).content.decode()
+                    if self_hosted:
+                        self.assertNotIn('cdn.jsdelivr.net', content, url)
+                        self.assertNotIn('fonts.googleapis.com', content, url)
+                        self.assertIn('/static/vendor/bootstrap/5.3.0/', content, url)
+                    else:
+                        self.assertIn('cdn.jsdelivr.net/npm/bootstrap@5.3.0/', content, url)
+                        self.assertNotIn('/static/vendor/', content, url)
+                    self.assertEqual('chart.umd.min.js' in content, url == '/statistics/', url)
+
+    def test_pages_render_with_collected_manifest_storage(self):
+        import tempfile
+        from io import StringIO
+        from django.conf import settings
+        from django.core.management import call_command
+        storages = {**settings.STORAGES, 'staticfiles': {
+            'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+        }}
+        with tempfile.TemporaryDirectory() as tmp, self.settings(STATIC_ROOT=tmp, STORAGES=storages):
+            call_command('collectstatic', '--noinput', stdout=StringIO())
+            for url in ['/dashboard/', '/statistics/', '/login/']:
+                if url == '/login/':
+                    self.client.logout()
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200, url)
+                self.assertRegex(response.content.decode(), r'/static/css/style\.[0-9a-f]{12}\.css')
+
+    def test_user_pages_cached_until_data_changes(self):
+        for url in ['/dashboard/', '/statistics/', '/progress/']:
+            self.client.get(url)
+            # Only the session, user and data-change lookups remain once cached.
+            with self.assertNumQueries(3):
+                self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Task.objects.create(user=self.user, title='Fresh', target_minutes=30)
+        response = self.client.get('/progress/')
+        self.assertIn('Fresh', [t.title for t in response.context['pending']])
+        # Another user's writes leave this user's cache alone.
+        other = User.objects.create_user(username='other', password='x')
+        Task.objects.create(user=other, title='Theirs', target_minutes=30)
+        with self.assertNumQueries(3):
+            self.client.get('/progress/')
+
+    def test_cached_pages_follow_changes_recorded_by_other_workers(self):
+        from .models import UserDataChange
+        self.client.get('/progress/')
+        # Another worker's write: its page-cache bookkeeping never reaches ours.
+        Task.objects.filter(pk=self.task.pk).update(title='Renamed')
+        UserDataChange.objects.touch(self.user.pk)
+        response = self.client.get('/progress/')
+        self.assertIn('Renamed', [t.title for t in response.context['pending']])
+
+    def test_category_changes_refresh_owners_pages(self):
+        category = Category.objects.create(name='Study')
+        Task.objects.filter(pk=self.task.pk).update(category=category)
+        self.client.get('/statistics/')
+        category.name = 'Reading'
+        category.save()
+        response = self.client.get('/statistics/')
+        self.assertEqual(str(response.context['task_stats'][0]['category']), 'Reading')
+        category.delete()
+        response = self.client.get('/statistics/')
+        self.assertIsNone(response.context['task_stats'][0]['category'])
+
+    def test_conditional_get_skips_view_until_data_changes(self):
+        response = self.client.get('/statistics/')
+        etag = response['ETag']
+        self.assertIn('private', response['Cache-Control'])
+        # 304 straight from the validators: session, user and data-change lookups only.
+        with self.assertNumQueries(3):
+            response = self.client.get('/statistics/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        # No Last-Modified: If-Modified-Since can't see the day or the session change.
+        self.assertNotIn('Last-Modified', response)
+        response = self.client.get('/statistics/', HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT')
+        self.assertEqual(response.status_code, 200)
+        # Another page, or a write, gives a fresh validator.
+        self.assertNotEqual(self.client.get('/dashboard/')['ETag'], etag)
+        Task.objects.create(user=self.user, title='New', target_minutes=30)
+        response = self.client.get('/statistics/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_etag_changes_with_the_day_and_category_names(self):
+        from unittest import mock
+        category = Category.objects.create(name='Study')
+        self.task.category = category
+        self.task.save()
+        etag = self.client.get('/tasks/')['ETag']
+        tomorrow = timezone.localdate() + timedelta(days=1)
+        with mock.patch('core.conditional.local_today', return_value=tomorrow):
+            self.assertEqual(self.client.get('/tasks/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        self.assertEqual(self.client.get('/tasks/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        category.name = 'Reading'
+        category.save()
+        response = self.client.get('/tasks/', HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'Reading')
+
+    def test_session_becoming_due_changes_validators(self):
+        from unittest import mock
+        now = timezone.now()
+        session = Session.objects.create(
+            task=self.task, user=self.user, status='pending',
+            planned_start=now + timedelta(hours=1), planned_end=now + timedelta(hours=2),
+        )
+        etag = self.client.get('/dashboard/')['ETag']
+        self.assertEqual(self.client.get('/dashboard/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        with mock.patch('django.utils.timezone.now', return_value=now + timedelta(hours=1, minutes=5)):
+            response = self.client.get('/dashboard/', HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.context['recent_sessions'][0].effective_status, 'in_progress')
+        session.refresh_from_db()
+        self.assertEqual(session.status, 'pending')
+
+    def test_pending_flash_message_is_rendered_not_304(self):
+        from django.contrib import messages
+        from django.contrib.messages.storage.cookie import CookieStorage
+        from django.http import HttpRequest, HttpResponse
+        etag = self.client.get('/dashboard/')['ETag']
+        storage = CookieStorage(HttpRequest())
+        storage.add(messages.SUCCESS, 'Session booked successfully!')
+        carrier = HttpResponse()
+        storage.update(carrier)
+        self.client.cookies['messages'] = carrier.cookies['messages'].value
+        response = self.client.get('/dashboard/', HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'Session booked successfully!')
+        self.assertEqual(self.client.get('/dashboard/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+
+class ApiTest(TestCase):
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.task = Task.objects.create(user=self.user, title='Task', target_minutes=60)
+        self.client.login(username='testuser', password='testpass123')
+
+    def _sessions(self, count):
+        now = timezone.now()
+        return [
+            Session.objects.create(
+                task=self.task, user=self.user, status='in_progress',
+                planned_start=now - timedelta(hours=count - i),
+                planned_end=now - timedelta(hours=count - i, minutes=-30),
+            )
+            for i in range(count)
+        ]
+
+    def test_api_requires_login(self):
+        self.client.logout()
+        self.assertEqual(self.client.get('/api/sessions/').status_code, 401)
+
+    def test_session_list_keyset_pagination(self):
+        sessions = self._sessions(5)
+        first = self.client.get('/api/sessions/?limit=2').json()
+        self.assertEqual([s['id'] for s in first['results']], [s.pk for s in sessions[:2]])
+        second = self.client.get(f"/api/sessions/?limit=2&cursor={first['next_cursor']}").json()
+        self.assertEqual([s['id'] for s in second['results']], [s.pk for s in sessions[2:4]])
+        last = self.client.get(f"/api/sessions/?limit=2&cursor={second['next_cursor']}").json()
+        self.assertEqual([s['id'] for s in last['results']], [sessions[4].pk])
+        self.assertIsNone(last['next_cursor'])
+        self.assertEqual(self.client.get('/api/sessions/?cursor=garbage').status_code, 400)
+
+    def test_session_list_rejects_bad_task_filter(self):
+        sessions = self._sessions(2)
+        for task in ('abc', '99999999999999999999999', '-99999999999999999999999'):
+            response = self.client.get(f'/api/sessions/?task={task}')
+            self.assertEqual(response.status_code, 400, task)
+            self.assertEqual(response.json(), {'error': 'Invalid task.'})
+        results = self.client.get(f'/api/sessions/?task={sessions[0].task_id}').json()['results']
+        self.assertEqual(len(results), 2)
+
+    def test_etag_answers_not_modified(self):
+        response = self.client.get('/api/progress/')
+        self.assertEqual(response.json()['results'][0]['progress_percent'], 0)
+        etag = response['ETag']
+        self.assertEqual(self.client.get('/api/progress/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_create_task_and_update_progress(self):
+        response = self.client.post(
+            '/api/tasks/', data=json.dumps({'title': 'API Task', 'target_minutes': 90}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['target_minutes'], 90)
+        session = self._sessions(1)[0]
+        response = self.client.patch(
+            f'/api/sessions/{session.pk}/',
+            data=json.dumps({'actual_minutes': 30, 'completion_percent': 70}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.json()['actual_minutes'], 30)
+        task = self.client.get(f'/api/tasks/{self.task.pk}/').json()
+        self.assertEqual(task['progress_percent'], 50)
+
+    def test_book_session(self):
+        start = timezone.now() + timedelta(days=1)
+        response = self.client.post('/api/sessions/', data=json.dumps({
+            'task': self.task.pk,
+            'planned_start': start.isoformat(),
+            'planned_end': (start + timedelta(hours=2)).isoformat(),
+        }), content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertIn('exceeds', response.json()['warning'])
+        self.assertEqual(Session.objects.filter(user=self.user).count(), 1)
+
+
+class ConcurrentBookingTest(TransactionTestCase):
+
+    WORKERS = 6
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.task = Task.objects.create(user=self.user, title='Task', target_minutes=600)
+
+    def test_parallel_bookings_for_same_slot_create_one_session(self):
+        from django.db import connection
+        start = timezone.localtime() + timedelta(days=1)
+        data = {
+            'task': self.task.pk,
+            'planned_start': start.strftime('%Y-%m-%dT%H:%M'),
+            'planned_end': (start + timedelta(hours=1)).strftime('%Y-%m-%dT%H:%M'),
+            'notes': '',
+        }
+        clients = []
+        for _ in range(self.WORKERS):
+            client = Client()
+            client.force_login(self.user)
+            clients.append(client)
+        barrier = threading.Barrier(self.WORKERS)
+        statuses = []
+
+        def book(client):
+            try:
+                barrier.wait()
+                statuses.append(client.post('/sessions/book/', data).status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=book, args=(c,)) for c in clients]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(statuses), [200] * (self.WORKERS - 1) + [302])
+        self.assertEqual(Session.objects.filter(user=self.user).count(), 1)
+
+
+class SessionEngineTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        cache.clear()
+
+    def test_signed_cookie_sessions_skip_session_table(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        with self.settings(SESSION_ENGINE='django.contrib.sessions.backends.signed_cookies'):
+            client = Client()
+            client.force_login(self.user)
+            response = client.post('/tasks/create/', {'title': 'T', 'target_minutes': 30}, follow=True)
+            self.assertContains(response, 'T')
+            with CaptureQueriesContext(connection) as ctx:
+                client.get('/dashboard/')
+        self.assertFalse([q for q in ctx.captured_queries if 'django_session' in q['sql']])
+
+    def test_clear_expired_sessions_in_chunks(self):
+        from io import StringIO
+        from django.contrib.sessions.models import Session as StoredSession
+        from django.core.management import call_command
+        now = timezone.now()
+        StoredSession.objects.bulk_create([
+            StoredSession(session_key=f'expired{i}', session_data='', expire_date=now - timedelta(days=1))
+            for i in range(5)
+        ] + [StoredSession(session_key='live', session_data='', expire_date=now + timedelta(days=1))])
+        out = StringIO()
+        call_command('clear_expired_sessions', chunk_size=2, stdout=out)
+        self.assertIn('Deleted 5 expired session(s).', out.getvalue())
+        self.assertEqual(list(StoredSession.objects.values_list('session_key', flat=True)), ['live'])
+
+    def test_benchmark_sessions_reports_each_engine(self):
+        from io import StringIO
+        from django.core.management import call_command
+        out = StringIO()
+        call_command('benchmark_sessions', iterations=1, stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 7)
+        self.assertFalse(User.objects.filter(username__startswith='bench-').exists())
+
+    def test_benchmark_sessions_keeps_shared_cache_and_rollups(self):
+        from io import StringIO
+        from django.core.management import call_command
+        from .management.commands.benchmark_sessions import Command
+        cache.set('shared-key', 'kept')
+        call_command('benchmark_sessions', iterations=1, engine=['db'], stdout=StringIO())
+        self.assertEqual(cache.get('shared-key'), 'kept')
+        Command().seed()
+        call_command('rebuild_task_progress', '--check', stdout=StringIO())
+        call_command('rebuild_daily_activity', '--check', stdout=StringIO())
+
+
+class SeedDataTest(TestCase):
+
+    def seed(self, **options):
+        from io import StringIO
+        from django.core.management import call_command
+        call_command('seed_trackit', users=3, tasks_per_user=2, sessions=40, days=30,
+                     chunk_size=25, stdout=StringIO(), **options)
+        return list(Session.objects.order_by('user__username', 'planned_start').values_list(
+            'user__username', 'task__title', 'planned_start', 'planned_end', 'status', 'actual_minutes',
+        ))
+
+    def test_seed_is_deterministic_and_keeps_rollups_consistent(self):
+        from io import StringIO
+        from django.core.management import CommandError, call_command
+        first = self.seed()
+        self.assertEqual(len(first), 40)
+        self.assertEqual(User.objects.filter(username__startswith='seed').count(), 3)
+        self.assertEqual(Task.objects.count(), 6)
+        call_command('rebuild_task_progress', '--check', stdout=StringIO())
+        call_command('rebuild_daily_activity', '--check', stdout=StringIO())
+
+        with self.assertRaises(CommandError):
+            self.seed()
+        User.objects.create_user(username='seedling', password='testpass123')
+        self.assertEqual(self.seed(flush=True), first)
+        self.assertTrue(User.objects.filter(username='seedling').exists())
+        self.assertNotEqual(self.seed(flush=True, seed=7), first)
+
+
+class ServerTimingTest(TestCase):
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.staff = User.objects.create_user(username='staff', password='testpass123', is_staff=True)
+
+    def test_sampled_request_gets_header_and_log_line(self):
+        self.client.force_login(self.staff)
+        with self.settings(SERVER_TIMING_SAMPLE_RATE=1.0, SERVER_TIMING_PUBLIC=False):
+            with self.assertLogs('core.timing', 'INFO') as logs:
+                response = self.client.get('/dashboard/')
+        self.assertRegex(
+            response['Server-Timing'],
+            r'^db;dur=[\d.]+;desc="\d+ queries", tpl;dur=[\d.]+, app;dur=[\d.]+, total;dur=[\d.]+$',
+        )
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['view'], 'dashboard')
+        self.assertEqual(record['status'], 200)
+        self.assertGreater(record['queries'], 0)
+        self.assertGreater(record['template_ms'], 0)
+
+    def test_header_only_for_staff_unless_public(self):
+        self.client.force_login(self.user)
+        with self.settings(SERVER_TIMING_SAMPLE_RATE=1.0, SERVER_TIMING_PUBLIC=False):
+            with self.assertLogs('core.timing', 'INFO'):
+                response = self.client.get('/dashboard/')
+        self.assertNotIn('Server-Timing', response)
+        with self.settings(SERVER_TIMING_SAMPLE_RATE=1.0, SERVER_TIMING_PUBLIC=True):
+            with self.assertLogs('core.timing', 'INFO'):
+                self.assertIn('Server-Timing', self.client.get('/dashboard/'))
+
+    def test_unsampled_request_is_not_timed(self):
+        self.client.force_login(self.staff)
+        with self.settings(SERVER_TIMING_SAMPLE_RATE=0):
+            with self.assertNoLogs('core.timing'):
+                response = self.client.get('/dashboard/')
+        self.assertNotIn('Server-Timing', response)
+
+
+class SlowQueryLogTest(TestCase):
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.force_login(self.user)
+
+    def test_normalize_strips_literals(self):
+        from .slow_queries import fingerprint, normalize
+        first = normalize("SELECT * FROM t WHERE id IN (%s, %s) AND name = 'a''b' LIMIT 21")
+        self.assertEqual(first, 'SELECT * FROM t WHERE id IN (...) AND name = ? LIMIT ?')
+        second = normalize("SELECT  *\nFROM t WHERE id IN (%s) AND name = 'c' LIMIT 5")
+        self.assertEqual(fingerprint(first), fingerprint(second))
+
+    def test_slow_queries_logged_with_view_and_call_site(self):
+        with self.settings(SLOW_QUERY_MS=0.000001):
+            with self.assertLogs('core.slow_queries', 'INFO') as logs:
+                self.client.get('/tasks/')
+        records = [json.loads(record.getMessage()) for record in logs.records]
+        from_view = [r for r in records if r['view'] == 'task_list']
+        self.assertTrue(from_view)
+        self.assertTrue(any(
+            site.startswith('core/views.py:') and site.endswith(' in task_list')
+            for r in from_view for site in r['stack']
+        ))
+        self.assertTrue(all(len(r['fingerprint']) == 12 and r['ms'] >= 0 for r in records))
+
+    def test_threshold_zero_disables_log(self):
+        with self.settings(SLOW_QUERY_MS=0):
+            with self.assertNoLogs('core.slow_queries'):
+                self.client.get('/tasks/')
+
+    def test_slow_queries_command_reports_percentiles(self):
+        import tempfile
+        from io import StringIO
+        from pathlib import Path
+        from django.core.management import call_command
+        with tempfile.TemporaryDirectory() as tmp:
+            log = Path(tmp) / 'slow.ndjson'
+            lines = [
+                {'ts': timezone.now().isoformat(), 'ms': ms, 'fingerprint': 'aaaaaaaaaaaa',
+                 'query': 'SELECT 1', 'view': 'statistics', 'frame': 'core/views.py:1 in statistics'}
+                for ms in range(1, 101)
+            ] + [{'ts': timezone.now().isoformat(), 'ms': 500, 'fingerprint': 'bbbbbbbbbbbb',
+                  'query': 'SELECT 2', 'view': 'dashboard', 'frame': None}]
+            log.write_text(''.join(json.dumps(line) + '\n' for line in lines) + '{"truncated')
+            out = StringIO()
+            call_command('slow_queries', file=str(log), stdout=out)
+        output = out.getvalue()
+        self.assertRegex(output, r'aaaaaaaaaaaa\s+100\s+50\.0\s+95\.0\s+99\.0\s+100\.0')
+        self.assertIn('statistics — core/views.py:1 in statistics', output)
+        self.assertIn('101 slow queries in 2 fingerprint(s)', output)
+
+    def test_each_process_writes_and_rotates_its_own_file(self):
+        import logging
+        import tempfile
+        from io import StringIO
+        from pathlib import Path
+        from unittest import mock
+        from django.core.management import call_command
+        from .slow_queries import ProcessFileHandler
+        record = {'ts': timezone.now().isoformat(), 'ms': 300, 'fingerprint': 'cccccccccccc',
+                  'query': 'SELECT 3', 'view': 'dashboard', 'frame': None}
+
+        def write(handler, pid, times=1):
+            with mock.patch('os.getpid', return_value=pid):
+                for _ in range(times):
+                    handler.emit(logging.makeLogRecord({'msg': json.dumps(record)}))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            log = Path(tmp) / 'slow.ndjson'
+            # One handler per process, as after a fork.
+            first = ProcessFileHandler(log, maxBytes=400, backupCount=2)
+            second = ProcessFileHandler(log, maxBytes=400, backupCount=2)
+            write(first, 101, times=3)
+            write(second, 202)
+            logs = sorted(path.name for path in Path(tmp).glob('*.ndjson*'))
+            self.assertEqual(logs, ['slow.0.ndjson', 'slow.0.ndjson.1', 'slow.1.ndjson'])
+            # A worker replacing an exited one takes over its file.
+            first.close()
+            replacement = ProcessFileHandler(log, maxBytes=400, backupCount=2)
+            write(replacement, 303)
+            second.close()
+            replacement.close()
+            self.assertEqual(sorted(path.name for path in Path(tmp).glob('*.ndjson*')), logs)
+            out = StringIO()
+            call_command('slow_queries', file=str(log), stdout=out)
+        self.assertIn('5 slow queries in 1 fingerprint(s) from 3 file(s)', out.getvalue())
+
+
+class ProfilerTest(TestCase):
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.staff = User.objects.create_user(username='staff', password='testpass123', is_staff=True)
+        task = Task.objects.create(user=self.staff, title='Profiled', target_minutes=60)
+        now = timezone.now()
+        Session.objects.create(
+            task=task, user=self.staff, status='completed', actual_minutes=30,
+            planned_start=now - timedelta(hours=2), planned_end=now - timedelta(hours=1),
+        )
+
+    def test_staff_request_is_profiled_and_viewable(self):
+        from .models import RequestProfile
+        self.client.force_login(self.staff)
+        response = self.client.get('/statistics/?_profile=1')
+        self.assertEqual(response.status_code, 200)
+        profile = RequestProfile.objects.get()
+        self.assertEqual(response['X-Profile-URL'], f'/manage/profiles/{profile.pk}/')
+        self.assertEqual(profile.view_name, 'statistics')
+        self.assertEqual(profile.query_count, len(profile.queries))
+        self.assertTrue(any(row['location'].startswith('core/views.py:') for row in profile.functions))
+        self.assertTrue(any((q['frame'] or '').startswith('core/') for q in profile.queries))
+
+        detail = self.client.get(response['X-Profile-URL'] + '?sort=total')
+        self.assertContains(detail, 'statistics')
+        self.assertContains(detail, 'core_session')
+        self.assertContains(self.client.get('/manage/profiles/'), '/statistics/?_profile=1')
+
+    def test_header_triggers_profile_and_old_profiles_are_pruned(self):
+        from .models import RequestProfile
+        self.client.force_login(self.staff)
+        with self.settings(PROFILE_KEEP=2):
+            for _ in range(3):
+                self.client.get('/dashboard/', HTTP_X_PROFILE='1')
+        self.assertEqual(RequestProfile.objects.count(), 2)
+
+    def test_only_an_explicit_profile_parameter_triggers(self):
+        from .models import RequestProfile
+        self.client.force_login(self.staff)
+        for url in ['/statistics/?x_profile=1', '/statistics/?_profile=0', '/statistics/?_profile=']:
+            self.assertNotIn('X-Profile-URL', self.client.get(url), url)
+        self.assertNotIn('X-Profile-URL', self.client.get('/statistics/', HTTP_X_PROFILE='0'))
+        self.assertFalse(RequestProfile.objects.exists())
+
+    def test_non_staff_requests_are_never_profiled(self):
+        from .models import RequestProfile
+        self.client.force_login(self.user)
+        response = self.client.get('/statistics/?_profile=1')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Profile-URL', response)
+        self.assertFalse(RequestProfile.objects.exists())
+        self.assertEqual(self.client.get('/manage/profiles/').status_code, 302)
+
+
+class MetricsTest(TestCase):
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.staff = User.objects.create_user(username='staff', password='testpass123', is_staff=True)
+        self.task = Task.objects.create(user=self.user, title='Metrics', target_minutes=60)
+        cache.clear()
+
+    def sample(self, name, **labels):
+        """Return the value of one series from /metrics, or 0 if absent (labels in output order)."""
+        import re
+        from .metrics import render
+        label_text = ','.join(f'{key}="{value}"' for key, value in labels.items())
+        series = f'{name}{{{label_text}}}' if labels else name
+        match = re.search(rf'^{re.escape(series)} (\S+)$', render(), re.MULTILINE)
+        return float(match.group(1)) if match else 0
+
+    def test_access_limited_to_staff_and_allowed_ips(self):
+        with self.settings(METRICS_ALLOWED_IPS=['10.0.0.0/8']):
+            self.assertEqual(self.client.get('/metrics').status_code, 403)
+            self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='10.1.2.3').status_code, 200)
+            self.client.force_login(self.user)
+            self.assertEqual(self.client.get('/metrics').status_code, 403)
+            self.client.force_login(self.staff)
+            response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        self.assertIn('# TYPE trackit_http_request_duration_seconds histogram', response.content.decode())
+
+    def test_requests_queries_and_cache_results_are_counted(self):
+        self.client.force_login(self.user)
+        requests = self.sample('trackit_http_requests_total', method='GET', status=200, view='dashboard')
+        latency = self.sample('trackit_http_request_duration_seconds_count', view='dashboard')
+        queries = self.sample('trackit_db_queries_total', view='dashboard')
+        misses = self.sample('trackit_cache_requests_total', cache='dashboard', result='miss')
+        hits = self.sample('trackit_cache_requests_total', cache='dashboard', result='hit')
+        self.client.get('/dashboard/')
+        self.client.get('/dashboard/')
+        self.assertEqual(
+            self.sample('trackit_http_requests_total', method='GET', status=200, view='dashboard'), requests + 2
+        )
+        self.assertEqual(self.sample('trackit_http_request_duration_seconds_count', view='dashboard'), latency + 2)
+        self.assertEqual(
+            self.sample('trackit_http_request_duration_seconds_bucket', view='dashboard', le='+Inf'), latency + 2
+        )
+        self.assertGreater(self.sample('trackit_db_queries_total', view='dashboard'), queries)
+        self.assertEqual(self.sample('trackit_cache_requests_total', cache='dashboard', result='miss'), misses + 1)
+        self.assertEqual(self.sample('trackit_cache_requests_total', cache='dashboard', result='hit'), hits + 1)
+
+    def test_bookings_and_status_changes_are_counted(self):
+        self.client.force_login(self.user)
+        booked = self.sample('trackit_sessions_booked_total')
+        pending = self.sample('trackit_session_status_changes_total', status='pending')
+        completed = self.sample('trackit_session_status_changes_total', status='completed')
+        start = timezone.localtime() + timedelta(days=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/sessions/book/', {
+                'task': self.task.pk,
+                'planned_start': start.strftime('%Y-%m-%dT%H:%M'),
+                'planned_end': (start + timedelta(hours=1)).strftime('%Y-%m-%dT%H:%M'),
+            })
+        session = Session.objects.get(user=self.user)
+        self.assertEqual(self.sample('trackit_sessions_booked_total'), booked + 1)
+        self.assertEqual(self.sample('trackit_session_status_changes_total', status='pending'), pending + 1)
+        session.status = 'completed'
+        with self.captureOnCommitCallbacks(execute=True):
+            session.save()
+            session.save()
+        self.assertEqual(self.sample('trackit_session_status_changes_total', status='completed'), completed + 1)
+
+    def test_totals_are_summed_across_worker_files(self):
+        import os
+        import tempfile
+        from pathlib import Path
+        from unittest import mock
+        from . import metrics
+        # A live process standing in for another worker.
+        other = os.getppid()
+        with tempfile.TemporaryDirectory() as tmp:
+            Path(tmp, f'{other}-1.json').write_text(json.dumps({
+                'pid': other, 'ppid': 1, 'started': 1.0,
+                'counters': [['trackit_sessions_booked_total', [], 5]],
+                'histograms': [],
+            }))
+            with self.settings(METRICS_DIR=tmp):
+                before = self.sample('trackit_sessions_booked_total')
+                metrics.inc('trackit_sessions_booked_total', 2)
+                with mock.patch.object(metrics._store, 'flush_at_exit', False), \
+                        mock.patch('atexit.register') as register:
+                    metrics.flush(force=True)
+                    metrics.flush(force=True)
+                register.assert_called_once()
+                self.assertEqual(len(list(Path(tmp).glob('*.json'))), 2)
+                self.assertEqual(self.sample('trackit_sessions_booked_total'), before + 2)
+                output = metrics.render()
+        self.assertIn(f'trackit_worker_info{{parent="1",started="1",worker="{other}"}} 1', output)
+        self.assertIn(f'worker="{os.getpid()}"', output)
+
+    def test_exited_workers_are_folded_into_one_file(self):
+        import subprocess
+        import sys
+        import tempfile
+        from pathlib import Path
+        from . import metrics
+        process = subprocess.Popen([sys.executable, '-c', ''])
+        process.wait()
+        exited = process.pid
+        with tempfile.TemporaryDirectory() as tmp:
+            for started in (1, 2):
+                Path(tmp, f'{exited}-{started}.json').write_text(json.dumps({
+                    'pid': exited, 'ppid': 1, 'started': float(started),
+                    'counters': [['trackit_sessions_booked_total', [], 5]],
+                    'histograms': [],
+                }))
+            with self.settings(METRICS_DIR=tmp):
+                before = self.sample('trackit_sessions_booked_total')
+                self.assertEqual(sorted(path.name for path in Path(tmp).iterdir()), ['exited.json', 'exited.lock'])
+                self.assertEqual(self.sample('trackit_sessions_booked_total'), before)
+                output = metrics.render()
+        self.assertNotIn(f'worker="{exited}"', output)
+
+
+class SingleFlightTest(TransactionTestCase):
+
+    WORKERS = 8
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username='admin', password='adminpass123', email='a@test.com')
+        cache.clear()
+
+    def test_concurrent_requests_on_cold_key_build_once(self):
+        from unittest import mock
+        from django.db import connection
+        from . import views
+        calls = []
+        real_snapshot = views._platform_snapshot
+
+        def slow_snapshot():
+            calls.append(1)
+            time_module.sleep(0.3)
+            return real_snapshot()
+
+        clients = []
+        for _ in range(self.WORKERS):
+            client = Client()
+            client.force_login(self.admin)
+            clients.append(client)
+        barrier = threading.Barrier(self.WORKERS)
+        statuses = []
+
+        def load(client):
+            try:
+                barrier.wait()
+                statuses.append(client.get('/admin-dashboard/').status_code)
+            finally:
+                connection.close()
+
+        with mock.patch.object(views, '_platform_snapshot', slow_snapshot):
+            threads = [threading.Thread(target=load, args=(c,)) for c in clients]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(statuses, [200] * self.WORKERS)
+        self.assertEqual(len(calls), 1)
+
+    def test_stale_value_served_while_another_process_refreshes(self):
+        from .cache import single_flight
+        single_flight('k', lambda: 'old', timeout=0, stale_timeout=60)
+        # Expired, but someone else holds the refresh lock.
+        cache.add('k:lock', 'other', 30)
+        self.assertEqual(single_flight('k', lambda: 'new', timeout=60), 'old')
+        cache.delete('k:lock')
+        self.assertEqual(single_flight('k', lambda: 'new', timeout=60), 'new')
+
+    def test_cold_key_waits_briefly_then_builds(self):
+        from .cache import single_flight
+        cache.add('cold:lock', 'other', 30)
+        started = time_module.monotonic()
+        self.assertEqual(single_flight('cold', lambda: 'built', timeout=60, wait=0.1), 'built')
+        self.assertLess(time_module.monotonic() - started, 1)
+
+    def test_cold_key_waits_as_long_as_the_last_build_took(self):
+        from .cache import single_flight
+        single_flight('slow-report', lambda: 'v1', timeout=60, label='report')
+        cache.set('trackit:build-seconds:report', 0.2, None)
+        cache.delete('slow-report')
+        cache.add('slow-report:lock', 'other', 30)
+
+        def finish_elsewhere():
+            time_module.sleep(0.15)
+            cache.set('slow-report', {'value': 'v2', 'started': time_module.time(), 'delta': 0.2,
+                                      'expires': time_module.time() + 60}, 120)
+
+        builder = threading.Thread(target=finish_elsewhere)
+        builder.start()
+        # The explicit wait is shorter than the build, but the recorded build time wins.
+        self.assertEqual(
+            single_flight('slow-report', lambda: 'duplicate', timeout=60, wait=0.05, label='report'), 'v2',
+        )
+        builder.join()
+
+    def test_marked_stale_value_is_served_while_another_process_rebuilds(self):
+        from .cache import mark_stale, single_flight
+        single_flight('k', lambda: 'old', timeout=60)
+        mark_stale('k')
+        cache.add('k:lock', 'other', 30)
+        self.assertEqual(single_flight('k', lambda: 'new', timeout=60), 'old')
+        cache.delete('k:lock')
+        self.assertEqual(single_flight('k', lambda: 'new', timeout=60), 'new')
+        self.assertEqual(single_flight('k', lambda: 'newer', timeout=60), 'new')
+
+    def test_overrunning_build_leaves_the_lock_alone(self):
+        from .cache import single_flight
+
+        def slow_build():
+            # Our lock expired mid-build and another process took it.
+            cache.set('slow:lock', 'other', 30)
+            return 'value'
+
+        self.assertEqual(single_flight('slow', slow_build, timeout=60, lock_timeout=1), 'value')
+        self.assertEqual(cache.get('slow:lock'), 'other')
+        single_flight('fast', lambda: 'value', timeout=60)
+        self.assertIsNone(cache.get('fast:lock'))
+
+
 class AdminViewTest(TestCase):
 
     def setUp(self):
@@ -285,11 +1423,37 @@ class AdminViewTest(TestCase):
         self.admin = User.objects.create_superuser(username='admin', password='adminpass123', email='a@test.com')
         self.user = User.objects.create_user(username='testuser', password='testpass123')
         self.client.login(username='admin', password='adminpass123')
+        cache.clear()
 
     def test_admin_dashboard_accessible_to_staff(self):
         response = self.client.get('/admin-dashboard/')
         self.assertEqual(response.status_code, 200)
 
+    def test_admin_dashboard_counts_use_few_queries(self):
+        task = Task.objects.create(user=self.user, title='T', target_minutes=60)
+        now = timezone.now()
+        for status in ['pending', 'completed', 'completed', 'cancelled']:
+            Session.objects.create(
+                task=task, user=self.user, status=status,
+                planned_start=now, planned_end=now + timedelta(hours=1),
+            )
+        cache.clear()
+        response = self.client.get('/admin-dashboard/')
+        self.assertEqual(response.context['total_sessions'], 4)
+        self.assertEqual(response.context['completed_sessions'], 2)
+        self.assertEqual(response.context['sessions_today'], 4)
+        self.assertEqual(json.loads(response.context['weekly_data'])[-1], 4)
+        # Cached: only the session/auth lookups and the two recent-activity lists remain.
+        with self.assertNumQueries(4):
+            self.client.get('/admin-dashboard/')
+
+    def test_admin_dashboard_snapshot_invalidated_on_write(self):
+        self.client.get('/admin-dashboard/')
+        with self.captureOnCommitCallbacks(execute=True):
+            Task.objects.create(user=self.user, title='New', target_minutes=60)
+        response = self.client.get('/admin-dashboard/')
+        self.assertEqual(response.context['total_tasks'], 1)
+
     def test_admin_dashboard_blocked_for_regular_user(self):
         self.client.login(username='testuser', password='testpass123')
         response = self.client.get('/admin-dashboard/')
@@ -300,6 +1464,54 @@ class AdminViewTest(TestCase):
         response = self.client.get('/manage/users/')
         self.assertEqual(response.status_code, 200)
 
+    def test_admin_session_list_keyset_keeps_filters(self):
+        task = Task.objects.create(user=self.user, title='T', target_minutes=60)
+        now = timezone.now()
+        for i in range(20):
+            Session.objects.create(
+                task=task, user=self.user, status='completed' if i % 2 else 'pending',
+                planned_start=now - timedelta(hours=i), planned_end=now - timedelta(hours=i - 1),
+            )
+        response = self.client.get('/manage/sessions/?status=completed&user=test')
+        page = response.context['sessions']
+        self.assertEqual(page.count, 10)
+        self.assertFalse(page.has_other_pages())
+        response = self.client.get('/manage/sessions/')
+        page = response.context['sessions']
+        self.assertEqual((page.count, len(page)), (20, 15))
+        self.assertContains(response, f'?after={page.next_cursor}')
+        response = self.client.get(f'/manage/sessions/?user=test&after={page.next_cursor}')
+        self.assertEqual(len(response.context['sessions']), 5)
+        self.assertContains(response, 'user=test&amp;before=')
+
+    def test_admin_filters_use_search_index(self):
+        other = User.objects.create_user(username='someone', password='x')
+        task = Task.objects.create(user=self.user, title='Learn Django', target_minutes=60)
+        Task.objects.create(user=other, title='Gardening', target_minutes=60)
+        response = self.client.get('/manage/tasks/?user=estus')
+        self.assertEqual([t.pk for t in response.context['tasks']], [task.pk])
+        response = self.client.get('/manage/tasks/?q=jango')
+        self.assertEqual([t.pk for t in response.context['tasks']], [task.pk])
+        # Renames are picked up by the index.
+        task.title = 'Learn Flask'
+        task.save()
+        self.assertEqual(len(self.client.get('/manage/tasks/?q=jango').context['tasks']), 0)
+
+    def test_admin_search_endpoint(self):
+        task = Task.objects.create(user=self.user, title='Testing basics', target_minutes=60)
+        now = timezone.now()
+        session = Session.objects.create(
+            task=task, user=self.user, notes='Wrote tests for views',
+            planned_start=now, planned_end=now + timedelta(hours=1),
+        )
+        data = self.client.get('/manage/search/?q=test').json()
+        self.assertEqual([u['id'] for u in data['results']['user']], [self.user.pk])
+        self.assertEqual([t['id'] for t in data['results']['task']], [task.pk])
+        self.assertEqual([s['id'] for s in data['results']['session']], [session.pk])
+        session.delete()
+        data = self.client.get('/manage/search/?q=test&kind=session').json()
+        self.assertEqual(data['results'], {'session': []})
+
     def test_admin_category_list_accessible(self):
         response = self.client.get('/manage/categories/')
         self.assertEqual(response.status_code, 200)
@@ -333,3 +1545,100 @@ class AdminViewTest(TestCase):
         cat = Category.objects.create(name='Empty')
         self.client.post(f'/manage/categories/{cat.pk}/delete/')
         self.assertFalse(Category.objects.filter(pk=cat.pk).exists())
+
+
+class NPlusOneTest(TestCase):
+    """Strict mode (N_PLUS_ONE_STRICT) is on for every request in this module."""
+
+    def setUp(self):
+        self.client = Client()
+        self.admin = User.objects.create_superuser(username='admin', password='adminpass123', email='a@test.com')
+        self.client.force_login(self.admin)
+        now = timezone.now()
+        for i in range(3):
+            user = User.objects.create_user(username=f'user{i}', password='testpass123')
+            category = Category.objects.create(name=f'Category {i}')
+            task = Task.objects.create(user=user, title=f'Task {i}', category=category, target_minutes=60)
+            Session.objects.create(
+                task=task, user=user, status='completed',
+                planned_start=now - timedelta(hours=i + 2), planned_end=now - timedelta(hours=i + 1),
+            )
+        cache.clear()
+
+    def test_lazy_relation_per_row_raises_with_call_site(self):
+        from .nplusone import NPlusOneError, detect_n_plus_one
+        with self.assertRaises(NPlusOneError) as raised, detect_n_plus_one():
+            [str(session) for session in Session.objects.all()]
+        message = str(raised.exception)
+        self.assertIn('same query ran 3 times', message)
+        self.assertIn('core/tests.py', message)
+        with detect_n_plus_one():
+            [str(session) for session in Session.objects.select_related('task')]
+
+    def test_error_names_template_line(self):
+        from django.template import Context, Template
+        from .nplusone import NPlusOneError, detect_n_plus_one
+        template = Template('{% for u in users %}\n{{ u.sessions.count }}\n{% endfor %}')
+        with self.assertRaises(NPlusOneError) as raised, detect_n_plus_one():
+            template.render(Context({'users': User.objects.all()}))
+        self.assertIn('template: <unknown source>:2', str(raised.exception))
+
+    def test_strict_mode_fails_requests_that_query_per_row(self):
+        from unittest import mock
+        from .admin import CategoryAdmin
+        from .nplusone import NPlusOneError
+        with mock.patch.object(CategoryAdmin, 'task_count', lambda admin, obj: obj.task_set.count()):
+            with self.assertRaisesMessage(NPlusOneError, 'in admin:core_category_changelist'):
+                self.client.get('/admin/core/category/')
+
+    def test_allow_repeated_queries(self):
+        from .nplusone import allow_repeated_queries, detect_n_plus_one
+        with detect_n_plus_one(), allow_repeated_queries():
+            [str(session) for session in Session.objects.all()]
+
+    def test_list_pages_do_not_query_per_row(self):
+        for url in [
+            '/admin/auth/user/', '/admin/core/category/', '/admin/core/task/', '/admin/core/session/',
+            '/manage/users/', '/manage/tasks/', '/manage/sessions/', '/manage/categories/',
+            '/admin-dashboard/',
+        ]:
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 200)
+
+
+class VendorAssetsTest(TestCase):
+
+    def setUp(self):
+        import tempfile
+        from pathlib import Path
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.base = Path(tmp.name)
+        self.vendor = self.base / 'static' / 'vendor'
+        self.vendor.mkdir(parents=True)
+
+    def fetch(self, *args, body=b'body'):
+        from io import StringIO
+        from unittest import mock
+        from django.core.management import call_command
+        from .management.commands import fetch_vendor_assets
+        response = mock.MagicMock()
+        response.__enter__.return_value.read.return_value = body
+        with self.settings(BASE_DIR=self.base), \
+                mock.patch.object(fetch_vendor_assets, 'ASSETS', [('https://cdn.test/a.js', 'a/a.js')]), \
+                mock.patch.object(fetch_vendor_assets.urllib.request, 'urlopen', return_value=response):
+            call_command('fetch_vendor_assets', *args, stdout=StringIO())
+
+    def test_downloads_are_verified_against_pinned_checksums(self):
+        from django.core.management.base import CommandError
+        with self.assertRaisesMessage(CommandError, 'No checksum pinned for a/a.js'):
+            self.fetch()
+        self.fetch('--pin')
+        self.assertIn('  a/a.js', (self.vendor / 'SHA256SUMS').read_text())
+        self.fetch('--check')
+        with self.assertRaisesMessage(CommandError, 'Checksum mismatch'):
+            self.fetch('--force', body=b'tampered')
+        self.assertEqual((self.vendor / 'a' / 'a.js').read_bytes(), b'body')
+        (self.vendor / 'a' / 'a.js').write_bytes(b'edited')
+        with self.assertRaisesMessage(CommandError, '1 vendored asset(s) missing or unverified'):
+            self.fetch('--check')
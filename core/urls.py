@@ -1,6 +1,6 @@
 from django.urls import path
 from django.views.generic import RedirectView
-from . import views
+from . import api, views
 
 urlpatterns = [
     # Root → dashboard
@@ -22,6 +22,12 @@ urlpatterns = [
     path('manage/categories/<int:pk>/delete/', views.admin_category_delete, name='admin_category_delete'),
     path('manage/tasks/', views.admin_task_list, name='admin_task_list'),
     path('manage/sessions/', views.admin_session_list, name='admin_session_list'),
+    path('manage/search/', views.admin_search, name='admin_search'),
+    path('manage/profiles/', views.admin_profile_list, name='admin_profile_list'),
+    path('manage/profiles/<int:pk>/', views.admin_profile_detail, name='admin_profile_detail'),
+
+    # Monitoring
+    path('metrics', views.metrics_view, name='metrics'),
 
     # Dashboard
     path('dashboard/', views.dashboard, name='dashboard'),
@@ -44,4 +50,11 @@ urlpatterns = [
     path('sessions/<int:pk>/cancel/', views.session_cancel, name='session_cancel'),
     path('sessions/<int:pk>/delete/', views.session_delete, name='session_delete'),
     path('sessions/<int:pk>/reschedule/', views.session_reschedule, name='session_reschedule'),
+
+    # JSON API
+    path('api/tasks/', api.task_collection, name='api_tasks'),
+    path('api/tasks/<int:pk>/', api.task_item, name='api_task'),
+    path('api/sessions/', api.session_collection, name='api_sessions'),
+    path('api/sessions/<int:pk>/', api.session_item, name='api_session'),
+    path('api/progress/', api.progress_summary, name='api_progress'),
 ]
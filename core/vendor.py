@@ -0,0 +1,72 @@
+"""Pinned third-party front-end assets.
+
+Templates load each one with {% vendor '<path>' %} (core.templatetags.vendor_assets).
+With VENDOR_ASSETS_SELF_HOSTED the tag serves static/vendor/<path> through
+the staticfiles storage; until the files and their SHA256SUMS are committed
+it serves the same pinned version from its CDN. fetch_vendor_assets
+downloads ASSETS into static/vendor/.
+"""
+JSDELIVR = 'https://cdn.jsdelivr.net/npm'
+FONTAWESOME = f'{JSDELIVR}/@fortawesome/fontawesome-free@6.4.0'
+JAKARTA = f'{JSDELIVR}/@fontsource/plus-jakarta-sans@5/files'
+
+FONT_CSS = 'fonts/plus-jakarta-sans.css'
+FONT_WEIGHTS = (400, 500, 600, 700, 800)
+FONT_SUBSETS = {
+    'latin-ext': (
+        'U+0100-02AF, U+0304, U+0308, U+0329, U+1E00-1E9F, U+1EF2-1EFF, U+2020, '
+        'U+20A0-20AB, U+20AD-20C0, U+2113, U+2C60-2C7F, U+A720-A7FF'
+    ),
+    'latin': (
+        'U+0000-00FF, U+0131, U+0152-0153, U+02BB-02BC, U+02C6, U+02DA, U+02DC, U+0304, '
+        'U+0308, U+0329, U+2000-206F, U+2074, U+20AC, U+2122, U+2191, U+2193, U+2212, '
+        'U+2215, U+FEFF, U+FFFD'
+    ),
+}
+
+# (source URL, path under static/vendor/). A None source is generated locally.
+ASSETS = [
+    (f'{JSDELIVR}/bootstrap@5.3.0/dist/css/bootstrap.min.css', 'bootstrap/5.3.0/bootstrap.min.css'),
+    (f'{JSDELIVR}/bootstrap@5.3.0/dist/js/bootstrap.bundle.min.js', 'bootstrap/5.3.0/bootstrap.bundle.min.js'),
+    (f'{FONTAWESOME}/css/all.min.css', 'fontawesome/6.4.0/css/all.min.css'),
+    *[
+        (f'{FONTAWESOME}/webfonts/{name}.{ext}', f'fontawesome/6.4.0/webfonts/{name}.{ext}')
+        for name in ('fa-brands-400', 'fa-regular-400', 'fa-solid-900', 'fa-v4compatibility')
+        for ext in ('woff2', 'ttf')
+    ],
+    (f'{JSDELIVR}/flatpickr@4.6.13/dist/flatpickr.min.css', 'flatpickr/4.6.13/flatpickr.min.css'),
+    (f'{JSDELIVR}/flatpickr@4.6.13/dist/flatpickr.min.js', 'flatpickr/4.6.13/flatpickr.min.js'),
+    (f'{JSDELIVR}/chart.js@4.4.0/dist/chart.umd.min.js', 'chartjs/4.4.0/chart.umd.min.js'),
+    *[
+        (f'{JAKARTA}/plus-jakarta-sans-{subset}-{weight}-normal.woff2',
+         f'fonts/plus-jakarta-sans/{subset}-{weight}.woff2')
+        for subset in FONT_SUBSETS
+        for weight in FONT_WEIGHTS
+    ],
+    (None, FONT_CSS),
+]
+
+# Where {% vendor %} points while the assets aren't self-hosted.
+CDN_URLS = {path: url for url, path in ASSETS if url}
+CDN_URLS[FONT_CSS] = (
+    'https://fonts.googleapis.com/css2?family=Plus+Jakarta+Sans:wght@'
+    + ';'.join(map(str, FONT_WEIGHTS)) + '&display=swap'
+)
+
+
+def font_css():
+    """The @font-face rules for the self-hosted Plus Jakarta Sans files."""
+    rules = ['/* Plus Jakarta Sans, self-hosted (files fetched by manage.py fetch_vendor_assets). */']
+    for subset, unicode_range in FONT_SUBSETS.items():
+        for weight in FONT_WEIGHTS:
+            rules.append(
+                "@font-face {\n"
+                "  font-family: 'Plus Jakarta Sans';\n"
+                "  font-style: normal;\n"
+                f"  font-weight: {weight};\n"
+                "  font-display: swap;\n"
+                f"  src: url('plus-jakarta-sans/{subset}-{weight}.woff2') format('woff2');\n"
+                f"  unicode-range: {unicode_range};\n"
+                "}"
+            )
+    return '\n'.join(rules) + '\n'
@@ -1,20 +1,34 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.models import User
 from django.views.decorators.http import require_POST
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 from django.contrib import messages
 from django.core.paginator import Paginator
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
 from django.db import models
-from django.db.models import Sum
+from django.db.models import Count, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce, TruncDate, Upper
+from django.conf import settings
+from datetime import datetime, time
 import json
 
-from .models import Session, Task, Category
-from .forms import SessionBookForm, ProgressUpdateForm, TaskForm
+from .cache import ADMIN_SNAPSHOT_KEY, cached_user_context, single_flight
+from .conditional import user_data_version, user_data_conditional
+from .models import (
+    Session, Task, Category, DailyActivity, RequestProfile,
+    effective_status_q, is_overlap_violation, local_timezone, schedule_lock,
+)
+from . import metrics, search
+from .pagination import KeysetPaginator
+from .forms import SLOT_CONFLICT_ERROR, SessionBookForm, ProgressUpdateForm, TaskForm
+from .services import book_sessions, update_progress
+from .streaks import local_today, user_streak
 
 
 # ========== Auth Views ==========
@@ -74,7 +88,10 @@ def register_view(request):
                 _validate_email(email)
             except _ValidationError:
                 error = 'Please enter a valid email address.'
-            if error is None and User.objects.filter(email=email).exists():
+            # Case-insensitive match served by the UPPER(email) index on auth_user.
+            if error is None and User.objects.alias(
+                email_upper=Upper('email')
+            ).filter(email_upper=email.upper()).exists():
                 error = 'Email already registered.'
             if error is None:
                 try:
@@ -88,111 +105,91 @@ def register_view(request):
     return render(request, 'auth/register.html', {'error': error})
 
 
-# ========== Admin Dashboard ==========
-
-@staff_member_required(login_url='login')
-def admin_dashboard(request):
-    today = timezone.now()
-    today_start = today.replace(hour=0, minute=0, second=0, microsecond=0)
-    today_end = today.replace(hour=23, minute=59, second=59, microsecond=999999)
-
-    return render(request, 'auth/admin_dashboard.html', {
-        'total_users': User.objects.count(),
-        'total_tasks': Task.objects.count(),
-        'active_tasks': Task.objects.filter(is_active=True).count(),
-        'completed_tasks': Task.objects.filter(is_active=False).count(),
-        'total_sessions': Session.objects.count(),
-        'completed_sessions': Session.objects.filter(status='completed').count(),
-        'pending_sessions': Session.objects.filter(status='pending').count(),
-        'in_progress_sessions': Session.objects.filter(status='in_progress').count(),
-        'cancelled_sessions': Session.objects.filter(status='cancelled').count(),
-        'tasks_today': Task.objects.filter(created_at__gte=today_start, created_at__lte=today_end).count(),
-        'sessions_today': Session.objects.filter(created_at__gte=today_start, created_at__lte=today_end).count(),
-        'active_users': User.objects.filter(last_login__gte=today_start, last_login__lte=today_end).count(),
-        'recent_users': User.objects.order_by('-date_joined')[:5],
-        'recent_sessions': Session.objects.select_related('user', 'task').order_by('-created_at')[:5],
-    })
+# ========== Admin Views ===========
 
+def _platform_snapshot():
+    """Platform-wide counts for the admin dashboard, in four aggregate queries."""
+    today = local_today()
+    today_start = datetime.combine(today, time.min, tzinfo=local_timezone())
+    today_end = today_start + timezone.timedelta(days=1)
+
+    def today_q(field):
+        return Q(**{f'{field}__gte': today_start, f'{field}__lt': today_end})
+
+    users = User.objects.filter(is_staff=False).aggregate(
+        total_users=Count('pk'),
+        active_users_today=Count('pk', filter=today_q('last_login')),
+        new_users_today=Count('pk', filter=today_q('date_joined')),
+        disabled_users=Count('pk', filter=Q(is_active=False)),
+    )
+    tasks = Task.objects.aggregate(
+        total_tasks=Count('pk'),
+        tasks_today=Count('pk', filter=today_q('created_at')),
+        completed_tasks=Count('pk', filter=Q(is_active=True)),
+    )
+    sessions = Session.objects.aggregate(
+        total_sessions=Count('pk'),
+        sessions_today=Count('pk', filter=today_q('created_at')),
+        completed_sessions=Count('pk', filter=Q(status='completed')),
+        pending_sessions=Count('pk', filter=effective_status_q('pending')),
+        in_progress_sessions=Count('pk', filter=effective_status_q('in_progress')),
+        cancelled_sessions=Count('pk', filter=Q(status='cancelled')),
+    )
+
+    # Weekly activity - sessions created per local day
+    week_days = [today - timezone.timedelta(days=i) for i in range(6, -1, -1)]
+    per_day = dict(Session.objects.filter(
+        created_at__gte=today_start - timezone.timedelta(days=6),
+        created_at__lt=today_end,
+    ).annotate(
+        day=TruncDate('created_at', tzinfo=local_timezone())
+    ).values('day').annotate(count=Count('pk')).values_list('day', 'count').order_by())
+
+    return {
+        **users,
+        **tasks,
+        **sessions,
+        'weekly_labels': json.dumps([day.strftime('%a') for day in week_days]),
+        'weekly_data': json.dumps([per_day.get(day, 0) for day in week_days]),
+    }
 
-# ========== Admin Views ===========
 
 @staff_member_required(login_url='login')
 def admin_dashboard(request):
-    from django.db.models import Sum, Avg
-    now = timezone.now()
-    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-    today_end = now.replace(hour=23, minute=59, second=59, microsecond=999999)
-    week_start = today_start - timezone.timedelta(days=today_start.weekday())
-
-    # Platform stats
-    total_users = User.objects.filter(is_staff=False).count()
-    active_users_today = User.objects.filter(
-        is_staff=False, last_login__gte=today_start, last_login__lte=today_end
-    ).count()
-    new_users_today = User.objects.filter(
-        is_staff=False, date_joined__gte=today_start
-    ).count()
-    disabled_users = User.objects.filter(is_staff=False, is_active=False).count()
-
-    total_tasks = Task.objects.count()
-    tasks_today = Task.objects.filter(created_at__gte=today_start).count()
-    completed_tasks = Task.objects.filter(is_active=True).count()
-
-    total_sessions = Session.objects.count()
-    sessions_today = Session.objects.filter(created_at__gte=today_start).count()
-    completed_sessions = Session.objects.filter(status='completed').count()
-    pending_sessions = Session.objects.filter(status='pending').count()
-    in_progress_sessions = Session.objects.filter(status='in_progress').count()
-    cancelled_sessions = Session.objects.filter(status='cancelled').count()
-
-    # Weekly activity - sessions per day
-    weekly_labels = []
-    weekly_data = []
-    for i in range(6, -1, -1):
-        day_start = today_start - timezone.timedelta(days=i)
-        day_end = today_start - timezone.timedelta(days=i-1)
-        count = Session.objects.filter(
-            created_at__gte=day_start, created_at__lt=day_end
-        ).count()
-        weekly_labels.append(day_start.strftime('%a'))
-        weekly_data.append(count)
+    snapshot = single_flight(
+        ADMIN_SNAPSHOT_KEY, _platform_snapshot, settings.ADMIN_DASHBOARD_CACHE_SECONDS,
+        label='admin_dashboard',
+    )
 
     # Recent activity
     recent_users = User.objects.filter(is_staff=False).order_by('-date_joined')[:5]
     recent_sessions = Session.objects.select_related('user', 'task').order_by('-created_at')[:5]
 
-    import json as _json
     return render(request, 'auth/admin_dashboard.html', {
-        'total_users': total_users,
-        'active_users_today': active_users_today,
-        'new_users_today': new_users_today,
-        'disabled_users': disabled_users,
-        'total_tasks': total_tasks,
-        'tasks_today': tasks_today,
-        'completed_tasks': completed_tasks,
-        'total_sessions': total_sessions,
-        'sessions_today': sessions_today,
-        'completed_sessions': completed_sessions,
-        'pending_sessions': pending_sessions,
-        'in_progress_sessions': in_progress_sessions,
-        'cancelled_sessions': cancelled_sessions,
-        'weekly_labels': _json.dumps(weekly_labels),
-        'weekly_data': _json.dumps(weekly_data),
+        **snapshot,
         'recent_users': recent_users,
         'recent_sessions': recent_sessions,
     })
 
 
+def _count_per_user(model):
+    # A correlated subquery per column; joining both relations would multiply rows.
+    counts = model.objects.filter(user=OuterRef('pk')).order_by().values('user').annotate(n=Count('pk'))
+    return Coalesce(Subquery(counts.values('n')), 0)
+
+
 @staff_member_required(login_url='login')
 def admin_user_list(request):
-    users = User.objects.filter(is_staff=False).order_by('-date_joined')
+    users = User.objects.filter(is_staff=False).annotate(
+        task_count=_count_per_user(Task), session_count=_count_per_user(Session),
+    ).order_by('-date_joined')
     return render(request, 'auth/admin_user_list.html', {'users': users})
 
 
 @staff_member_required(login_url='login')
 def admin_user_detail(request, pk):
     profile_user = get_object_or_404(User, pk=pk, is_staff=False)
-    tasks = Task.objects.filter(user=profile_user).order_by('-created_at')
+    tasks = Task.objects.filter(user=profile_user).with_progress().order_by('-created_at')
     sessions = Session.objects.filter(user=profile_user).order_by('-planned_start')[:10]
     return render(request, 'auth/admin_user_detail.html', {
         'profile_user': profile_user,
@@ -272,91 +269,135 @@ def admin_category_delete(request, pk):
 
 @staff_member_required(login_url='login')
 def admin_task_list(request):
-    user_filter = request.GET.get('user', '')
+    user_filter = request.GET.get('user', '').strip()
     category_filter = request.GET.get('category', '')
-    tasks = Task.objects.select_related('user', 'category').order_by('-created_at')
+    query = request.GET.get('q', '').strip()
+    tasks = Task.objects.select_related('user', 'category').with_progress()
     if user_filter:
-        tasks = tasks.filter(user__username__icontains=user_filter)
+        tasks = tasks.filter(user__in=search.matching('user', user_filter))
+    if query:
+        tasks = tasks.filter(pk__in=search.matching('task', query))
     if category_filter:
         tasks = tasks.filter(category__id=category_filter)
     categories = Category.objects.all()
-    paginator = Paginator(tasks, 15)
-    page = request.GET.get('page', 1)
-    tasks_page = paginator.get_page(page)
+    paginator = KeysetPaginator(tasks, ['-created_at', '-id'], 15, count='estimate')
+    tasks_page = paginator.get_page(request.GET.get('after'), request.GET.get('before'))
     return render(request, 'auth/admin_task_list.html', {
         'tasks': tasks_page,
         'categories': categories,
         'user_filter': user_filter,
         'category_filter': category_filter,
+        'query': query,
     })
 
 
 @staff_member_required(login_url='login')
 def admin_session_list(request):
     status_filter = request.GET.get('status', '')
-    user_filter = request.GET.get('user', '')
-    sessions = Session.objects.select_related('user', 'task').order_by('-planned_start')
+    user_filter = request.GET.get('user', '').strip()
+    query = request.GET.get('q', '').strip()
+    sessions = Session.objects.select_related('user', 'task')
     if status_filter:
-        sessions = sessions.filter(status=status_filter)
+        sessions = sessions.with_status(status_filter)
     if user_filter:
-        sessions = sessions.filter(user__username__icontains=user_filter)
-    paginator = Paginator(sessions, 15)
-    page = request.GET.get('page', 1)
-    sessions_page = paginator.get_page(page)
+        sessions = sessions.filter(user__in=search.matching('user', user_filter))
+    if query:
+        sessions = sessions.filter(pk__in=search.matching('session', query))
+    paginator = KeysetPaginator(sessions, ['-planned_start', '-id'], 15, count='estimate')
+    sessions_page = paginator.get_page(request.GET.get('after'), request.GET.get('before'))
     return render(request, 'auth/admin_session_list.html', {
         'sessions': sessions_page,
         'status_filter': status_filter,
         'user_filter': user_filter,
+        'query': query,
+    })
+
+
+@staff_member_required(login_url='login')
+def admin_search(request):
+    """Ranked matches for ?q= across users, tasks and session notes."""
+    query = request.GET.get('q', '').strip()
+    kinds = [request.GET['kind']] if request.GET.get('kind') in search.SEARCH_KINDS else list(search.SEARCH_KINDS)
+    results = {kind: [] for kind in kinds}
+    if query:
+        if 'user' in results:
+            results['user'] = [
+                {'id': u.pk, 'username': u.username, 'url': reverse('admin_user_detail', args=[u.pk])}
+                for u in search.search('user', query)
+            ]
+        if 'task' in results:
+            results['task'] = [
+                {'id': t.pk, 'title': t.title, 'user_id': t.user_id}
+                for t in search.search('task', query)
+            ]
+        if 'session' in results:
+            results['session'] = [
+                {'id': s.pk, 'notes': s.notes, 'task_id': s.task_id, 'planned_start': s.planned_start}
+                for s in search.search('session', query)
+            ]
+    return JsonResponse({'query': query, 'limit': search.SEARCH_LIMIT, 'results': results})
+
+
+@staff_member_required(login_url='login')
+def admin_profile_list(request):
+    profiles = RequestProfile.objects.select_related('user').defer('functions', 'queries')[:100]
+    return render(request, 'auth/admin_profile_list.html', {'profiles': profiles})
+
+
+@staff_member_required(login_url='login')
+def admin_profile_detail(request, pk):
+    profile = get_object_or_404(RequestProfile, pk=pk)
+    sort = 'total_ms' if request.GET.get('sort') == 'total' else 'cumulative_ms'
+    functions = sorted(profile.functions, key=lambda row: row[sort], reverse=True)
+    return render(request, 'auth/admin_profile_detail.html', {
+        'profile': profile,
+        'functions': functions,
+        'sort': sort,
     })
 
 
+def metrics_view(request):
+    """Prometheus scrape endpoint, for staff and METRICS_ALLOWED_IPS."""
+    if not (request.user.is_staff or metrics.client_allowed(request)):
+        return HttpResponse('Forbidden', status=403, content_type='text/plain')
+    return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
 # ========== Dashboard View ==========
 
 @login_required
+@user_data_conditional
 def dashboard(request):
-    now = timezone.now()
-    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-    today_end = now.replace(hour=23, minute=59, second=59, microsecond=999999)
+    today = local_today()
+    context = cached_user_context(
+        request.user.pk, user_data_version(request), 'dashboard', lambda: _dashboard_context(request.user, today), today,
+    )
+    return render(request, 'dashboard.html', context)
 
+
+def _dashboard_context(user, today):
     # Learning streak (up to 30 days)
-    streak = 0
-    for i in range(30):
-        day_start = today_start - timezone.timedelta(days=i)
-        day_end = today_end - timezone.timedelta(days=i)
-        has_session = Session.objects.filter(
-            user=request.user,
-            planned_start__gte=day_start,
-            planned_start__lte=day_end,
-        ).exclude(status__in=['cancelled', 'pending']).exists()
-        if has_session:
-            streak += 1
-        else:
-            break
-
-    week_start = today_start - timezone.timedelta(days=today_start.weekday())
-    week_minutes = Session.objects.filter(
-        user=request.user,
-        planned_start__gte=week_start,
-        planned_start__lte=today_end,
-    ).exclude(status__in=['cancelled', 'pending']).aggregate(
-        total=Sum('actual_minutes')
-    )['total'] or 0
-
-    today_minutes = Session.objects.filter(
-        user=request.user,
-        planned_start__gte=today_start,
-        planned_start__lte=today_end,
-    ).exclude(status__in=['cancelled', 'pending']).aggregate(
-        total=Sum('actual_minutes')
-    )['total'] or 0
-
-    all_active = Task.objects.filter(user=request.user, is_active=True)
+    streak = user_streak(user, today=today)
+
+    week_start = today - timezone.timedelta(days=today.weekday())
+    minutes = DailyActivity.objects.filter(
+        user=user, day__gte=week_start, day__lte=today,
+    ).aggregate(
+        week=Sum('minutes', default=0),
+        today=Sum('minutes', filter=Q(day=today), default=0),
+    )
+    week_minutes = minutes['week']
+    today_minutes = minutes['today']
+
+    all_active = Task.objects.filter(
+        user=user, is_active=True
+    ).select_related('category').with_progress()
     active_tasks = [t for t in all_active if not t.is_completed()][:5]
     completed_count = len([t for t in all_active if t.is_completed()])
 
-    recent_sessions = Session.objects.filter(
-        user=request.user
-    ).select_related('task').order_by('-planned_start')[:5]
+    recent_sessions = list(Session.objects.filter(
+        user=user
+    ).select_related('task').order_by('-planned_start')[:5])
 
     # Motivational message based on streak
     if streak == 0:
@@ -370,7 +411,7 @@ def dashboard(request):
     else:
         motivation = f"Incredible {streak}-day streak! You're unstoppable ⚡"
 
-    return render(request, 'dashboard.html', {
+    return {
         'streak': streak,
         'week_minutes': week_minutes,
         'today_minutes': today_minutes,
@@ -378,65 +419,59 @@ def dashboard(request):
         'completed_count': completed_count,
         'recent_sessions': recent_sessions,
         'motivation': motivation,
-    })
+    }
 
 
 # ========== Statistics View ==========
 
 @login_required
+@user_data_conditional
 def statistics(request):
-    now = timezone.now()
-    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-    today_end = now.replace(hour=23, minute=59, second=59, microsecond=999999)
-
-    # All completed/in-progress sessions for this user
-    valid_sessions = Session.objects.filter(
-        user=request.user
-    ).exclude(status__in=['cancelled', 'pending'])
-
+    today = local_today()
+    # Minutes by category, optionally limited to ?start=YYYY-MM-DD&end=YYYY-MM-DD
+    try:
+        category_start = parse_date(request.GET.get('start', ''))
+        category_end = parse_date(request.GET.get('end', ''))
+    except ValueError:
+        category_start = category_end = None
+    context = cached_user_context(
+        request.user.pk, user_data_version(request), 'statistics',
+        lambda: _statistics_context(request.user, today, category_start, category_end),
+        today, category_start, category_end,
+    )
+    return render(request, 'statistics.html', context)
+
+
+def _statistics_context(user, today, category_start, category_end):
     # Summary numbers
-    total_minutes = valid_sessions.aggregate(t=Sum('actual_minutes'))['t'] or 0
-    total_sessions = Session.objects.filter(user=request.user).count()
-    completed_sessions = Session.objects.filter(user=request.user, status='completed').count()
-    avg_quality = valid_sessions.exclude(completion_percent=0).aggregate(
-        a=Sum('completion_percent')
-    )['a'] or 0
-    quality_count = valid_sessions.exclude(completion_percent=0).count()
-    avg_quality = round(avg_quality / quality_count) if quality_count else 0
+    activity = DailyActivity.objects.filter(user=user)
+    totals = activity.aggregate(
+        minutes=Sum('minutes', default=0),
+        quality_sum=Sum('quality_sum', default=0),
+        quality_count=Sum('quality_count', default=0),
+    )
+    total_minutes = totals['minutes']
+    total_sessions = Session.objects.filter(user=user).count()
+    completed_sessions = Session.objects.filter(user=user, status='completed').count()
+    quality_count = totals['quality_count']
+    avg_quality = round(totals['quality_sum'] / quality_count) if quality_count else 0
 
     # Last 7 days — minutes per day
-    weekly_labels = []
-    weekly_data = []
-    for i in range(6, -1, -1):
-        day_start = today_start - timezone.timedelta(days=i)
-        day_end = today_end - timezone.timedelta(days=i)
-        mins = valid_sessions.filter(
-            planned_start__gte=day_start,
-            planned_start__lte=day_end,
-        ).aggregate(t=Sum('actual_minutes'))['t'] or 0
-        weekly_labels.append(day_start.strftime('%a'))
-        weekly_data.append(mins)
-
-    # Minutes by category
-    category_labels = []
-    category_data = []
-    for cat in Category.objects.all():
-        mins = valid_sessions.filter(task__category=cat).aggregate(
-            t=Sum('actual_minutes')
-        )['t'] or 0
-        if mins > 0:
-            category_labels.append(cat.name)
-            category_data.append(mins)
-    # Uncategorised
-    uncategorised = valid_sessions.filter(task__category__isnull=True).aggregate(
-        t=Sum('actual_minutes')
-    )['t'] or 0
-    if uncategorised > 0:
-        category_labels.append('Uncategorised')
-        category_data.append(uncategorised)
+    week_days = [today - timezone.timedelta(days=i) for i in range(6, -1, -1)]
+    minutes_by_day = dict(activity.filter(
+        day__gte=week_days[0], day__lte=today,
+    ).values_list('day', 'minutes'))
+    weekly_labels = [day.strftime('%a') for day in week_days]
+    weekly_data = [minutes_by_day.get(day, 0) for day in week_days]
+
+    by_category = Session.objects.filter(user=user).minutes_by_category(
+        category_start, category_end
+    )
+    category_labels = [name for name, _ in by_category]
+    category_data = [mins for _, mins in by_category]
 
     # Per-task stats
-    tasks = Task.objects.filter(user=request.user, is_active=True)
+    tasks = Task.objects.filter(user=user, is_active=True).select_related('category').with_progress()
     task_stats = []
     for t in tasks:
         task_stats.append({
@@ -452,12 +487,12 @@ def statistics(request):
     task_stats.sort(key=lambda x: x['pct'], reverse=True)
 
     # Recent 10 sessions for the table
-    recent_sessions = Session.objects.filter(
-        user=request.user
-    ).select_related('task').order_by('-planned_start')[:10]
+    recent_sessions = list(Session.objects.filter(
+        user=user
+    ).select_related('task').order_by('-planned_start')[:10])
 
     import json as _json
-    return render(request, 'statistics.html', {
+    return {
         'total_minutes': total_minutes,
         'total_sessions': total_sessions,
         'completed_sessions': completed_sessions,
@@ -468,27 +503,40 @@ def statistics(request):
         'category_data': _json.dumps(category_data),
         'task_stats': task_stats,
         'recent_sessions': recent_sessions,
-    })
+    }
 
 
 # ========== Progress View ==========
 
 @login_required
+@user_data_conditional
 def progress_list(request):
-    tasks = Task.objects.filter(user=request.user, is_active=True).order_by('-created_at')
+    context = cached_user_context(
+        request.user.pk, user_data_version(request), 'progress', lambda: _progress_context(request.user),
+    )
+    return render(request, 'progress/progress_list.html', context)
+
+
+def _progress_context(user):
+    tasks = Task.objects.filter(
+        user=user, is_active=True
+    ).select_related('category').with_progress().order_by('-created_at')
     pending = [t for t in tasks if not t.is_completed()]
     done = [t for t in tasks if t.is_completed()]
-    return render(request, 'progress/progress_list.html', {
+    return {
         'pending': pending,
         'done': done,
-    })
+    }
 
 
 # ========== Task Views ==========
 
 @login_required
+@user_data_conditional
 def task_list(request):
-    active_tasks = Task.objects.filter(user=request.user, is_active=True)
+    active_tasks = Task.objects.filter(
+        user=request.user, is_active=True
+    ).select_related('category').with_progress()
     in_progress = [t for t in active_tasks if t.progress_percent() < 100]
     completed = [t for t in active_tasks if t.progress_percent() >= 100]
 
@@ -534,9 +582,12 @@ def task_edit(request, pk):
 @login_required
 def task_delete(request, pk):
     task = get_object_or_404(Task, pk=pk, user=request.user)
-    task.sessions.all().delete()
-    task.is_active = False
-    task.save()
+    with transaction.atomic():
+        # Queryset delete shifts the task and daily rollups for the removed rows;
+        # Task.save() leaves those columns as the delete left them.
+        task.sessions.all().delete()
+        task.is_active = False
+        task.save()
     messages.success(request, 'Task deleted.')
     return redirect('task_list')
 
@@ -546,35 +597,19 @@ def task_delete(request, pk):
 @login_required
 def session_list(request):
     status_filter = request.GET.get('status', '')
-    now = timezone.now()
-
-    # Auto-update pending sessions to in_progress if start time has passed
-    Session.objects.filter(
-        user=request.user,
-        status='pending',
-        planned_start__lte=now
-    ).update(status='in_progress')
-
-    from django.db.models import Case, When, IntegerField
-    sessions = Session.objects.filter(user=request.user)
+    sessions = Session.objects.filter(user=request.user).select_related('task')
     if status_filter:
-        sessions = sessions.filter(status=status_filter)
-
-    # Order: in_progress first, then pending, then completed/cancelled, newest first
-    sessions = sessions.annotate(
-        status_order=Case(
-            When(status='in_progress', then=0),
-            When(status='pending', then=1),
-            When(status='completed', then=2),
-            When(status='cancelled', then=3),
-            default=4,
-            output_field=IntegerField(),
-        )
-    ).order_by('status_order', '-planned_start')
+        sessions = sessions.with_status(status_filter)
+        ordering = ['-planned_start', '-id']
+    else:
+        # Order: in_progress first, then pending, then completed/cancelled, newest
+        # first, by effective status, since due sessions may not be swept yet.
+        sessions = sessions.with_effective_rank()
+        ordering = ['-effective_rank', '-planned_start', '-id']
 
-    paginator = Paginator(sessions, 10)
-    page = request.GET.get('page', 1)
-    sessions_page = paginator.get_page(page)
+    # The page only links to its neighbours, so skip the COUNT(*).
+    paginator = KeysetPaginator(sessions, ordering, 10, count=None)
+    sessions_page = paginator.get_page(request.GET.get('after'), request.GET.get('before'))
 
     return render(request, 'sessions/session_list.html', {
         'sessions': sessions_page,
@@ -591,13 +626,23 @@ def session_book(request):
 
     if request.method == 'POST':
         form = SessionBookForm(request.POST, user=request.user)
-        if form.is_valid():
+        booked = book_sessions(form, request.user)
+        if booked is not None:
             if hasattr(form, 'overtime_warning'):
                 messages.warning(request, form.overtime_warning)
-            session = form.save(commit=False)
-            session.user = request.user
-            session.save()
-            messages.success(request, 'Session booked successfully!')
+            if form.is_recurring():
+                if form.skipped:
+                    skipped = ', '.join(
+                        timezone.localtime(start).strftime('%a %d %b %H:%M')
+                        for start, _ in form.skipped
+                    )
+                    messages.info(
+                        request,
+                        f'Skipped {len(form.skipped)} conflicting slot(s): {skipped}.'
+                    )
+                messages.success(request, f'{len(booked)} sessions booked successfully!')
+            else:
+                messages.success(request, 'Session booked successfully!')
             return redirect('session_list')
     else:
         task_id = request.GET.get('task_id')
@@ -613,10 +658,6 @@ def session_book(request):
 @login_required
 def session_detail(request, pk):
     session = get_object_or_404(Session, pk=pk, user=request.user)
-    now = timezone.now()
-    if session.status == 'pending' and session.planned_start <= now:
-        session.status = 'in_progress'
-        session.save()
     progress_form = ProgressUpdateForm(instance=session)
     return render(request, 'sessions/session_detail.html', {
         'session': session,
@@ -629,45 +670,20 @@ def session_detail(request, pk):
 def session_update_progress(request, pk):
     session = get_object_or_404(Session, pk=pk, user=request.user)
 
-    if session.status == 'cancelled':
-        return JsonResponse({'error': 'Cannot update a cancelled session.'}, status=400)
-    if session.status == 'pending':
-        return JsonResponse({'error': 'This session has not started yet.'}, status=400)
-
     try:
-        data = json.loads(request.body)
-        actual_minutes = int(data.get('actual_minutes', session.actual_minutes))
-        completion_percent = int(data.get('completion_percent', session.completion_percent))
-        notes = data.get('notes', session.notes)
-        mark_complete = data.get('mark_complete', False)
-
-        if actual_minutes == 0:
-            return JsonResponse({'error': 'Please enter actual time spent before saving.'}, status=400)
-        if actual_minutes < 0:
-            return JsonResponse({'error': 'Time cannot be negative.'}, status=400)
-
-        max_minutes = session.planned_minutes() * 3
-        if actual_minutes > max_minutes:
-            return JsonResponse({'error': f'Time too high. Max allowed: {max_minutes} min.'}, status=400)
-        if not (0 <= completion_percent <= 100):
-            return JsonResponse({'error': 'Quality must be between 0 and 100.'}, status=400)
-
-        session.actual_minutes = actual_minutes
-        session.completion_percent = completion_percent
-        session.notes = notes
-        session.status = 'completed' if mark_complete else 'in_progress'
-        session.save()
-
-        return JsonResponse({
-            'success': True,
-            'status': session.status,
-            'status_display': session.get_status_display(),
-            'actual_minutes': session.actual_minutes,
-            'completion_percent': session.completion_percent,
-        })
-
+        error = update_progress(session, json.loads(request.body))
     except (ValueError, TypeError, json.JSONDecodeError) as e:
         return JsonResponse({'error': f'Invalid data: {str(e)}'}, status=400)
+    if error:
+        return JsonResponse({'error': error}, status=400)
+
+    return JsonResponse({
+        'success': True,
+        'status': session.status,
+        'status_display': session.get_status_display(),
+        'actual_minutes': session.actual_minutes,
+        'completion_percent': session.completion_percent,
+    })
 
 
 @login_required
@@ -719,24 +735,30 @@ def session_reschedule(request, pk):
         if is_naive(new_end):
             new_end = make_aware(new_end)
 
-        conflicts = Session.objects.filter(
-            user=request.user,
-            planned_start__lt=new_end,
-            planned_end__gt=new_start,
-        ).exclude(status='cancelled').exclude(pk=pk)
-        if conflicts.exists():
-            return JsonResponse({'error': 'This time slot conflicts with another session.'}, status=400)
-
-        session.planned_start = new_start
-        session.planned_end = new_end
-        # Save time changes first (bug fix: was missing this save)
-        session.save()
-
-        # Then update status if needed
-        now = timezone.now()
-        if session.status == 'pending' and new_start <= now:
-            session.status = 'in_progress'
-            session.save(update_fields=['status'])
+        conflict_error = JsonResponse(
+            {'error': 'This time slot conflicts with another session.'}, status=400
+        )
+        with schedule_lock(request.user.pk):
+            conflicts = Session.objects.filter(
+                user=request.user,
+                planned_start__lt=new_end,
+                planned_end__gt=new_start,
+            ).exclude(status='cancelled').exclude(pk=pk)
+            if conflicts.exists():
+                return conflict_error
+
+            session.planned_start = new_start
+            session.planned_end = new_end
+            # Then update status if needed
+            if session.status == 'pending' and new_start <= timezone.now():
+                session.status = 'in_progress'
+            try:
+                with transaction.atomic():
+                    session.save()
+            except IntegrityError as e:
+                if not is_overlap_violation(e):
+                    raise
+                return conflict_error
 
         return JsonResponse({'success': True})
 
@@ -1,5 +1,6 @@
 from pathlib import Path
 import os
+import sys
 import dj_database_url
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -8,6 +9,10 @@ SECRET_KEY = os.environ.get('DJANGO_SECRET_KEY', 'django-insecure-trackit-dev-ke
 
 DEBUG = os.environ.get('DJANGO_DEBUG', 'True') == 'True'
 
+# Running under `manage.py test`: turns off what needs collectstatic or writes
+# files (manifest storage, request sampling, slow-query and metrics files).
+TESTING = sys.argv[1:2] == ['test']
+
 ALLOWED_HOSTS = [
     'localhost',
     '127.0.0.1',
@@ -32,10 +37,14 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'core.middleware.ServerTimingMiddleware',
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.NPlusOneMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.ProfilerMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -91,9 +100,139 @@ USE_TZ = True
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [BASE_DIR / 'static']
 STATIC_ROOT = BASE_DIR / 'staticfiles'
+# Hashed filenames plus gzip/brotli copies; WhiteNoise serves hashed files
+# with a far-future immutable Cache-Control. Tests run without collectstatic,
+# so they use the plain storage; one test collects into a temporary
+# STATIC_ROOT and renders pages with the manifest storage.
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {
+        'BACKEND': (
+            'django.contrib.staticfiles.storage.StaticFilesStorage'
+            if TESTING
+            else 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+        ),
+    },
+}
+# Serve Bootstrap, Font Awesome, flatpickr, Chart.js and the font from
+# static/vendor/ (see core.vendor) rather than their pinned CDN URLs. On once
+# the files are committed with static/vendor/SHA256SUMS.
+VENDOR_ASSETS_SELF_HOSTED = os.environ.get(
+    'VENDOR_ASSETS_SELF_HOSTED', str((BASE_DIR / 'static' / 'vendor' / 'SHA256SUMS').exists())
+) == 'True'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = '/login/'
+
+# Seconds the admin dashboard's platform numbers stay cached between writes.
+ADMIN_DASHBOARD_CACHE_SECONDS = int(os.environ.get('ADMIN_DASHBOARD_CACHE_SECONDS', '30'))
+
+# CACHE_BACKEND=locmem (default, per process), file or db. The file and
+# database caches are shared by all gunicorn workers on a host without
+# needing Redis; the db backend needs `python manage.py createcachetable`.
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'locmem')
+if CACHE_BACKEND == 'file':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('CACHE_LOCATION', str(BASE_DIR / '.cache')),
+        }
+    }
+elif CACHE_BACKEND == 'db':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': os.environ.get('CACHE_LOCATION', 'trackit_cache'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'trackit',
+        }
+    }
+
+# Upper bound on how long a user's cached dashboard/statistics/progress
+# context lives; writes to their sessions or tasks invalidate it sooner.
+USER_PAGE_CACHE_SECONDS = int(os.environ.get('USER_PAGE_CACHE_SECONDS', '300'))
+
+# SESSION_BACKEND=db (default), cached_db or signed_cookies. Both
+# alternatives take django_session off the per-request path. cached_db
+# needs a cache shared by all workers (CACHE_BACKEND=file or db) so a logout
+# is seen everywhere. signed_cookies keeps no server-side state at all.
+SESSION_BACKEND = os.environ.get('SESSION_BACKEND', 'db')
+SESSION_ENGINE = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}[SESSION_BACKEND]
+
+# Flash messages ride in their own cookie instead of writing the session.
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+
+# Fraction of requests timed by core.middleware.ServerTimingMiddleware (SQL,
+# template and Python time as a Server-Timing header and a JSON log line on
+# the core.timing logger). Off under the test runner; tests opt in.
+SERVER_TIMING_SAMPLE_RATE = float(os.environ.get(
+    'SERVER_TIMING_SAMPLE_RATE',
+    '0' if TESTING else '1' if DEBUG else '0.05',
+))
+# Send the Server-Timing header to every client, not only staff.
+SERVER_TIMING_PUBLIC = os.environ.get('SERVER_TIMING_PUBLIC', str(DEBUG)) == 'True'
+
+# Queries at least this slow (ms) are appended as NDJSON by core.slow_queries
+# to a per-process file next to SLOW_QUERY_LOG (slow_queries.<slot>.ndjson);
+# 0 turns the log off. Summarise with `python manage.py slow_queries`.
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', '0' if TESTING else '200'))
+SLOW_QUERY_LOG = os.environ.get('SLOW_QUERY_LOG', str(BASE_DIR / 'slow_queries.ndjson'))
+SLOW_QUERY_LOG_MAX_BYTES = int(os.environ.get('SLOW_QUERY_LOG_MAX_BYTES', str(10 * 1024 * 1024)))
+SLOW_QUERY_LOG_BACKUPS = int(os.environ.get('SLOW_QUERY_LOG_BACKUPS', '5'))
+
+# /metrics (Prometheus text format) is open to staff and to these addresses
+# or networks, e.g. METRICS_ALLOWED_IPS=127.0.0.1,10.0.0.0/8.
+METRICS_ALLOWED_IPS = [
+    ip.strip() for ip in os.environ.get('METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',') if ip.strip()
+]
+# Each worker process writes its metric totals here so /metrics can sum
+# them across gunicorn workers; exited workers' totals are folded into one
+# file. Keep it local to the host. Unset under the test runner, where only
+# the current process is reported.
+METRICS_DIR = os.environ.get('METRICS_DIR', '' if TESTING else str(BASE_DIR / '.metrics'))
+METRICS_FLUSH_SECONDS = float(os.environ.get('METRICS_FLUSH_SECONDS', '1'))
+
+# Fail any request that runs the same SELECT shape N_PLUS_ONE_THRESHOLD
+# times (core.nplusone). core/tests.py turns it on so N+1 regressions fail
+# CI; set N_PLUS_ONE_STRICT=True to get the error page in development.
+N_PLUS_ONE_STRICT = os.environ.get('N_PLUS_ONE_STRICT', 'False') == 'True'
+N_PLUS_ONE_THRESHOLD = int(os.environ.get('N_PLUS_ONE_THRESHOLD', '3'))
+
+# Staff can profile any request with ?_profile=1 (core.profiling); the newest
+# PROFILE_KEEP profiles are kept for /manage/profiles/.
+PROFILE_KEEP = int(os.environ.get('PROFILE_KEEP', '100'))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+        'slow_queries': {
+            # One file per live process (slow_queries.<slot>.ndjson), rotated by that process.
+            'class': 'core.slow_queries.ProcessFileHandler',
+            'filename': SLOW_QUERY_LOG,
+            'maxBytes': SLOW_QUERY_LOG_MAX_BYTES,
+            'backupCount': SLOW_QUERY_LOG_BACKUPS,
+            'formatter': 'message',
+        },
+    },
+    'loggers': {
+        'core.timing': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+        'core.slow_queries': {'handlers': ['slow_queries'], 'level': 'INFO', 'propagate': False},
+    },
+}